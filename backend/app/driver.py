@@ -1,14 +1,34 @@
 """
 File: backend/app/driver.py
 Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
-Description: Configures the Neo4j driver and initiates connection to the graph database.
+Description: Configures the Neo4j drivers and initiates connection to the graph database.
+             API routes use the async driver, imports and differences the sync one.
 """
 
 import os
 
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase, GraphDatabase
 
 user, password = os.getenv("NEO4J_AUTH").split("/")
 
-with GraphDatabase.driver("bolt://neo4j", auth=(user, password)) as driver:
+# Connection pool of each driver
+POOL_CONFIG = {
+    # Most connections open at once, further queries wait for a free one
+    "max_connection_pool_size": int(os.getenv("NEO4J_POOL_SIZE", "100")),
+    # Seconds a query waits for a free connection before failing
+    "connection_acquisition_timeout": float(
+        os.getenv("NEO4J_ACQUISITION_TIMEOUT", "30")
+    ),
+    # Records fetched from the server in one batch
+    "fetch_size": int(os.getenv("NEO4J_FETCH_SIZE", "1000")),
+}
+
+with GraphDatabase.driver(
+    "bolt://neo4j", auth=(user, password), **POOL_CONFIG
+) as driver:
     driver.verify_connectivity()
+
+# Connects on first use within the event loop, closed on shutdown
+async_driver = AsyncGraphDatabase.driver(
+    "bolt://neo4j", auth=(user, password), **POOL_CONFIG
+)
@@ -4,13 +4,28 @@ Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
 Description: Entry point of the FastAPI backend.
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 
-from .routers import csv_import, graphs
+from .driver import async_driver
+from .routers import csv_import, diff, graphs
+from .utils.schema import SCHEMA_QUERIES
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Indexes added since the graphs were imported
+    for query in SCHEMA_QUERIES:
+        await async_driver.execute_query(query)
+    yield
+    await async_driver.close()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 
 @app.exception_handler(HTTPException)
@@ -26,5 +41,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Responses with many elements are compressed, small ones are not worth it
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 app.include_router(csv_import.router)
 app.include_router(graphs.router)
+app.include_router(diff.jobs_router)
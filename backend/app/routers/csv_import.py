@@ -9,13 +9,17 @@ import io
 import logging
 import os
 import shutil
+import time
+from collections.abc import Iterable
 from typing import Annotated
 
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile
 
 from ..driver import driver
-from ..utils.conversions import invoke_from_csv, method_from_csv
-from ..utils.types import Invoke
+from ..utils import graph_cache, method_tree
+from ..utils.conversions import method_from_csv
+from ..utils.schema import SCHEMA_QUERIES
+from ..utils.streaming import invoke_method_ids, iter_chunks
 
 CSV_DIR = "csv"
 
@@ -25,6 +29,24 @@ logger.propagate = False
 router = APIRouter()
 
 
+def run_in_chunks(query: str, rows: Iterable[dict], graph: str) -> tuple[int, int]:
+    """Run the query once per chunk of rows, return row count and created element count."""
+    row_count = 0
+    created = 0
+    for chunk in iter_chunks(rows):
+        counters = driver.execute_query(query, data=chunk, graph=graph).summary.counters
+        row_count += len(chunk)
+        created += counters.nodes_created + counters.relationships_created
+    return row_count, created
+
+
+def log_throughput(what: str, count: int, started: float) -> float:
+    """Log the number of processed rows per second since the given start time."""
+    rate = count / max(time.perf_counter() - started, 1e-9)
+    logger.info(f"{what} imported: {count} ({rate:.0f} rows/s)")
+    return rate
+
+
 @router.post("/import")
 def import_csv(
     files: Annotated[list[UploadFile], File()],
@@ -60,6 +82,8 @@ def import_csv(
 
     # Delete all nodes and edges, create uniqueness constraints and indexes
     logger.info("Purging database")
+    graph_cache.invalidate(graph)
+    method_tree.invalidate(graph)
     driver.session().run(
         "MATCH (m {graph: $graph}) CALL (m) { DETACH DELETE m } IN TRANSACTIONS OF 10000 ROWS",
         graph=graph,
@@ -68,99 +92,91 @@ def import_csv(
     driver.execute_query(
         "MATCH (meta:Meta {graph_name: $graph}) DELETE meta", graph=graph
     )
-    driver.execute_query(
-        "CREATE CONSTRAINT unique_method_id IF NOT EXISTS "
-        "FOR (m:Method) REQUIRE (m.id, m.graph) IS UNIQUE"
-    )
-    driver.execute_query(
-        "CREATE CONSTRAINT unique_invoke_id IF NOT EXISTS "
-        "FOR (i:Invoke) REQUIRE (i.id, i.graph) IS UNIQUE"
-    )
-    driver.execute_query("CREATE INDEX method_id IF NOT EXISTS FOR (m:Method) ON m.id")
-    driver.execute_query("CREATE INDEX invoke_id IF NOT EXISTS FOR (i:Invoke) ON i.id")
-    driver.execute_query(
-        "CREATE INDEX method_graph IF NOT EXISTS FOR (m:Method) ON m.graph"
-    )
-    driver.execute_query(
-        "CREATE INDEX invoke_graph IF NOT EXISTS FOR (i:Invoke) ON i.graph"
-    )
+    for query in SCHEMA_QUERIES:
+        driver.execute_query(query)
+
+    started = time.perf_counter()
 
     # Create method nodes
     logger.info("Creating method nodes")
     methods_csv = io.TextIOWrapper(newest["methods"][0].file)
-
     reader = csv.DictReader(methods_csv)
-    summary = (
-        driver.session()
-        .run(
-            """
-            UNWIND $data AS row
-            CALL (row) {
-              CREATE (m:Method {graph: $graph}) SET m += row
-            } IN TRANSACTIONS OF 10000 ROWS
-            """,
-            data=[method_from_csv(row) for row in reader],
-            graph=graph,
-        )
-        .to_eager_result()
-        .summary
+    method_rows, node_count = run_in_chunks(
+        "UNWIND $data AS row CREATE (m:Method {graph: $graph}) SET m += row",
+        (method_from_csv(row) for row in reader),
+        graph,
     )
-    node_count = summary.counters.nodes_created
-
-    # Map method IDs to element IDs
-    logger.info("Mapping method IDs to element IDs")
-    records = driver.execute_query(
-        "MATCH (m {graph: $graph}) RETURN m.id AS id, elementId(m) AS element_id",
-        graph=graph,
-    ).records
-    element_ids: dict[str, str] = {
-        record["id"]: record["element_id"] for record in records
-    }
+    log_throughput("Method rows", method_rows, started)
 
-    # Create a map of invokes
+    # Map invoke IDs to caller IDs
     logger.info("Parsing invokes")
+    invokes_started = time.perf_counter()
     invokes_csv = io.TextIOWrapper(newest["invokes"][0].file)
-    reader = csv.DictReader(invokes_csv)
+    callers, invoke_rows = invoke_method_ids(csv.DictReader(invokes_csv))
+    log_throughput("Invoke rows", invoke_rows, invokes_started)
 
-    invokes: dict[str, Invoke] = {}
-    for row in reader:
-        invoke = invoke_from_csv(row)
-        invokes[invoke["id"]] = invoke
-
-    # Create edges between method nodes
+    # Create edges between method nodes, matched by the (id, graph) uniqueness constraint
     logger.info("Creating edges between method nodes")
+    edges_started = time.perf_counter()
     targets_csv = io.TextIOWrapper(newest["targets"][0].file)
     reader = csv.DictReader(targets_csv)
+    target_rows, edge_count = run_in_chunks(
+        """
+        UNWIND $data AS row
+        MATCH (s:Method {id: row.source_id, graph: $graph})
+        MATCH (t:Method {id: row.target_id, graph: $graph})
+        MERGE (s)-[:CALLS]->(t)
+        """,
+        (
+            {
+                "source_id": str(callers[int(row["InvokeId"])]),
+                "target_id": row["TargetId"],
+            }
+            for row in reader
+        ),
+        graph,
+    )
+    log_throughput("Target rows", target_rows, edges_started)
+
+    rate = log_throughput("Rows", method_rows + invoke_rows + target_rows, started)
+
+    # Warm up the cache with the new graph
+    graph_cache.invalidate(graph)
+    store = graph_cache.get_graph(graph) or graph_cache.GraphStore(graph)
+
+    # Index shortest paths from entry points
+    logger.info("Indexing entry point paths")
+    run_in_chunks(
+        """
+        UNWIND $data AS row
+        MATCH (m:Method {id: row.id, graph: $graph})
+        SET m.entry_parent = row.parent, m.entry_depth = row.depth
+        """,
+        store.entry_path_rows(),
+        graph,
+    )
+
+    # Save numbers of neighbors, lists of them are fetched by pages
+    logger.info("Saving neighbor counts")
+    run_in_chunks(
+        """
+        UNWIND $data AS row
+        MATCH (m:Method {id: row.id, graph: $graph})
+        SET m.caller_count = row.callers, m.callee_count = row.callees
+        """,
+        store.degree_rows(),
+        graph,
+    )
 
-    edges: list[dict[str, str]] = []
-    for row in reader:
-        invoke_id = row["InvokeId"]
-        invoke = invokes[invoke_id]
-        edge = {
-            "source_element_id": element_ids[invoke["method_id"]],
-            "target_element_id": element_ids[row["TargetId"]],
-        }
-        edges.append(edge)
-
-    summary = (
-        driver.session()
-        .run(
-            """
-            UNWIND $data AS row
-            CALL (row) {
-              MATCH (s:Method) WHERE elementId(s) = row.source_element_id
-              MATCH (t:Method) WHERE elementId(t) = row.target_element_id
-              MERGE (s)-[r:CALLS]->(t)
-            } IN TRANSACTIONS OF 10000 ROWS
-            """,
-            data=edges,
-            graph=graph,
-        )
-        .to_eager_result()
-        .summary
+    # Index methods by package and class prefixes for the method tree
+    logger.info("Indexing method tree")
+    method_tree.put(
+        graph,
+        method_tree.MethodTree(
+            zip(store.ids, store.columns["name"], store.columns["parent_class"])
+        ),
     )
-    edge_count = summary.counters.relationships_created
 
-    message = f"Imported {node_count} nodes and {edge_count} edges"
+    message = f"Imported {node_count} nodes and {edge_count} edges ({rate:.0f} rows/s)"
     logger.info(message)
     return {"message": message}
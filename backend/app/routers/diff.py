@@ -5,122 +5,121 @@ Description: Defines API endpoints for controlling the difference algorithm and
 """
 
 import asyncio
-import ctypes
 import os
 
-from diff_c.diff import EdgeDiff, diff
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
 
-from ..driver import driver
+from ..utils import diff_jobs
 from ..utils.database import fetch_edges
+from ..utils.responses import respond
+from ..utils.types import ResponseFormat
 from .csv_import import CSV_DIR
 
 router = APIRouter(prefix="/{graph_name}")
+jobs_router = APIRouter(prefix="/diff/jobs")
 
-iteration_count = ctypes.c_int(0)
-cancel_flag = ctypes.c_bool(False)
-edges: dict[tuple[str, str], EdgeDiff]
-
-
-def start_diff(graph_name: str, other_graph_name: str, max_iterations: int):
-    driver.execute_query(
-        "MATCH ({graph: $graph})-[r]->() SET r.value = 0", graph=graph_name
-    )
-
-    global edges
-    edges = diff(
-        os.path.join(CSV_DIR, graph_name),
-        os.path.join(CSV_DIR, other_graph_name),
-        max_iterations,
-        iteration_count,
-        cancel_flag,
-    )
-
-
-async def send_progress(websocket: WebSocket):
-    while True:
-        await websocket.send_text(str(iteration_count.value))
-        await asyncio.sleep(0.25)
 
+async def wait_for_cancel(websocket: WebSocket, job: diff_jobs.DiffJob):
+    """Cancel the job on the cancel command, return when the client leaves."""
+    try:
+        while True:
+            text = await websocket.receive_text()
+            if text == "cancel":
+                job.cancel()
+    except WebSocketDisconnect:
+        pass
 
-async def wait_for_cancel(websocket: WebSocket):
-    global cancel_flag
-    while not cancel_flag:
-        text = await websocket.receive_text()
-        if text == "cancel":
-            cancel_flag.value = True
-
-
-def save_progress(graph_name: str, other_graph_name: str) -> str:
-    driver.execute_query(
-        "UNWIND $data AS row "
-        "MATCH (:Method {id: row.source_id, graph: $graph})-[r]->(:Method {id: row.target_id, graph: $graph}) "
-        "SET r.value = row.value, r.relevant = row.relevant",
-        graph=graph_name,
-        data=[
-            {
-                "source_id": k[0],
-                "target_id": k[1],
-                "value": v["value"],
-                "relevant": v["relevant"],
-            }
-            for k, v in edges.items()
-        ],
-    )
 
-    driver.execute_query(
-        "MERGE (meta:Meta {graph_name: $graph}) "
-        "SET meta.other_graph = $other_graph, meta.iterations = $iterations",
-        graph=graph_name,
-        other_graph=other_graph_name,
-        iterations=iteration_count.value,
-    )
+async def follow_job(websocket: WebSocket, job: diff_jobs.DiffJob) -> bool:
+    """
+    Send progress of the job periodically until it finishes, then its outcome.
+    Return False if the client left before, the job continues without it.
+    """
+    # Task that listens for the cancel command
+    cancel_task = asyncio.create_task(wait_for_cancel(websocket, job))
+    try:
+        saving = False
+        while not job.done.is_set():
+            if cancel_task.done():
+                return False
+            if job.status == "saving":
+                if not saving:
+                    await websocket.send_text("saving")
+                    saving = True
+                await websocket.send_json({"saved": job.saved, "total": job.total})
+            else:
+                await websocket.send_text(str(job.iterations))
+            await asyncio.sleep(0.25)
 
-    return f"Difference with {other_graph_name} calculated: {iteration_count.value} iterations"
+        await websocket.send_json(
+            {"message": job.message, "iterations": job.iterations, "error": job.error}
+        )
+    except WebSocketDisconnect:
+        return False
+    finally:
+        cancel_task.cancel()
+    return True
 
 
 @router.websocket("/diff")
 async def diff_websocket(websocket: WebSocket):
-    iteration_count.value = 0
-    cancel_flag.value = False
-
+    """
+    Run a difference sent as "graph,other_graph,max_iterations[,fresh]", or follow
+    the job with the sent ID. With "fresh", the difference ignores the checkpoint of
+    an earlier difference of the same graphs. Leaving does not stop the job, only
+    the cancel command does.
+    """
     await websocket.accept()
     try:
         text = await websocket.receive_text()
-        graph_name, other_graph_name, max_iterations = text.split(",")
-
-        # Task that runs the difference algorithm
-        diff_task = asyncio.create_task(
-            asyncio.to_thread(
-                start_diff, graph_name, other_graph_name, int(max_iterations)
-            )
-        )
-
-        # Task that sends progress periodically
-        progress_task = asyncio.create_task(send_progress(websocket))
-        # Task that listens for the cancel command
-        cancel_task = asyncio.create_task(wait_for_cancel(websocket))
+        if "," in text:
+            graph_name, other_graph_name, max_iterations, *options = text.split(",")
+            try:
+                job = diff_jobs.submit(
+                    graph_name,
+                    other_graph_name,
+                    int(max_iterations),
+                    os.path.join(CSV_DIR, graph_name),
+                    os.path.join(CSV_DIR, other_graph_name),
+                    "fresh" in options,
+                )
+            except diff_jobs.JobError as e:
+                await websocket.send_json(
+                    {"message": str(e), "iterations": 0, "error": True}
+                )
+                await websocket.close()
+                return
+        else:
+            job = diff_jobs.get(text)
+            if job is None:
+                await websocket.send_json(
+                    {"message": f"Unknown job {text}", "iterations": 0, "error": True}
+                )
+                await websocket.close()
+                return
+
+        await websocket.send_json({"job": job.id})
+        if await follow_job(websocket, job):
+            await websocket.close()
+    except WebSocketDisconnect:
+        pass
 
-        # Wait until the algorithm ends
-        await diff_task
 
-        # Stop both tasks
-        progress_task.cancel()
-        cancel_task.cancel()
+@router.get("/topedges")
+async def get_top_edges(graph_name: str, n: int, format: ResponseFormat = "cytoscape"):
+    return await respond(
+        await fetch_edges(graph_name, limit=n, with_nodes=True), format
+    )
 
-        # Save progress
-        await websocket.send_text("saving")
-        await asyncio.sleep(0)
-        message = save_progress(graph_name, other_graph_name)
 
-        await websocket.send_json(
-            {"message": message, "iterations": iteration_count.value}
-        )
-        await websocket.close()
-    except WebSocketDisconnect:
-        pass
+@jobs_router.get("")
+def get_jobs():
+    return [job.to_dict() for job in diff_jobs.jobs()]
 
 
-@router.get("/topedges")
-def get_top_edges(graph_name: str, n: int):
-    return fetch_edges(graph_name, limit=n, with_nodes=True)
+@jobs_router.get("/{job_id}")
+def get_job(job_id: str):
+    job = diff_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(404, f"Job {job_id} not found")
+    return job.to_dict()
@@ -7,10 +7,19 @@ Description: Defines API endpoints for retrieving edge definitions.
 from fastapi import APIRouter
 
 from ..utils.database import fetch_edges
+from ..utils.responses import respond
+from ..utils.types import ResponseFormat
 
 router = APIRouter(prefix="/{graph_name}/edge")
 
 
 @router.get("/{id}")
-def get_edge_by_id(graph_name: str, id: str, with_nodes: bool = False):
-    return fetch_edges(graph_name, id, with_nodes=with_nodes)
+async def get_edge_by_id(
+    graph_name: str,
+    id: str,
+    with_nodes: bool = False,
+    format: ResponseFormat = "cytoscape",
+):
+    return await respond(
+        await fetch_edges(graph_name, id, with_nodes=with_nodes), format
+    )
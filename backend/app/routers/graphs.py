@@ -6,10 +6,13 @@ Description: Defines API endpoints for retrieving graph metadata and deleting gr
 
 import logging
 
-from fastapi import APIRouter
+from typing import Annotated
 
-from ..driver import driver
-from ..utils.conversions import methods_to_tree
+from fastapi import APIRouter, Query
+
+from ..driver import async_driver
+from ..utils import graph_cache, method_tree
+from ..utils.database import search_methods
 from . import diff, edges, methods
 
 logger = logging.getLogger("uvicorn")
@@ -18,39 +21,42 @@ logger.propagate = False
 router = APIRouter(prefix="/graphs")
 
 router.include_router(methods.router)
+router.include_router(methods.batch_router)
 router.include_router(edges.router)
 router.include_router(diff.router)
 
 
 @router.get("")
-def get_graphs():
-    records = driver.execute_query(
-        "MATCH (m:Method) "
-        "OPTIONAL MATCH (m)-[r]->() "
-        "WITH m.graph AS name, count(DISTINCT m) AS nodeCount, count(r) AS edgeCount "
-        "ORDER BY name "
-        "OPTIONAL MATCH (meta:Meta {graph_name: name}) "
-        "RETURN name, nodeCount, edgeCount, meta.other_graph AS otherGraph, "
-        "       meta.iterations AS iterations"
+async def get_graphs():
+    records = (
+        await async_driver.execute_query(
+            "MATCH (m:Method) "
+            "OPTIONAL MATCH (m)-[r]->() "
+            "WITH m.graph AS name, count(DISTINCT m) AS nodeCount, count(r) AS edgeCount "
+            "ORDER BY name "
+            "OPTIONAL MATCH (meta:Meta {graph_name: name}) "
+            "RETURN name, nodeCount, edgeCount, meta.other_graph AS otherGraph, "
+            "       meta.iterations AS iterations"
+        )
     ).records
     return [record.data() for record in records]
 
 
 @router.delete("/{graph_name}")
-def delete_graph(graph_name: str):
-    _, summary, _ = (
-        driver.session()
-        .run(
+async def delete_graph(graph_name: str):
+    graph_cache.invalidate(graph_name)
+    method_tree.invalidate(graph_name)
+    async with async_driver.session() as session:
+        result = await session.run(
             "MATCH (m {graph: $graph}) CALL (m) { DETACH DELETE m } IN TRANSACTIONS OF 10000 ROWS",
             graph=graph_name,
         )
-        .to_eager_result()
-    )
+        summary = await result.consume()
 
     node_count = summary.counters.nodes_deleted
     edge_count = summary.counters.relationships_deleted
 
-    driver.execute_query(
+    await async_driver.execute_query(
         "MATCH (meta:Meta {graph_name: $graph}) DELETE meta", graph=graph_name
     )
 
@@ -59,12 +65,22 @@ def delete_graph(graph_name: str):
     return {"message": message}
 
 
-@router.get("/{graph_name}/tree")
-def get_method_tree(graph_name: str):
-    records = driver.execute_query(
-        "MATCH (m {graph: $graph}) RETURN m.id AS id, m.name AS name, m.parent_class AS parent ORDER BY parent, name",
-        graph=graph_name,
-    ).records
-
-    methods = [record.data() for record in records]
-    return methods_to_tree(methods)
+@router.get("/{graph_name}/tree/children")
+async def get_tree_children(
+    graph_name: str,
+    prefix: str = "",
+    offset: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 200,
+):
+    tree = await method_tree.get_tree_async(graph_name)
+    return tree.children(prefix, offset, limit)
+
+
+@router.get("/{graph_name}/search")
+async def search(
+    graph_name: str,
+    q: str,
+    offset: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 50,
+):
+    return await search_methods(graph_name, q, offset, limit)
@@ -4,39 +4,93 @@ Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
 Description: Defines API endpoints for retrieving method and neighbor definitions.
 """
 
-from fastapi import APIRouter
+from typing import Annotated
+
+from fastapi import APIRouter, Body, Query
 
 from ..utils.database import (
+    NEIGHBOR_LIMIT,
     fetch_method,
     fetch_method_neighbors,
     fetch_method_with_entry_point,
+    fetch_methods,
 )
+from ..utils.responses import respond
+from ..utils.types import ResponseFormat
 
 router = APIRouter(prefix="/{graph_name}/method")
+batch_router = APIRouter(prefix="/{graph_name}/methods")
+
+
+@batch_router.post("")
+async def get_methods(
+    graph_name: str,
+    methods: list[str] = Body([]),
+    edges: list[str] = Body([]),
+    format: ResponseFormat = "cytoscape",
+):
+    return await respond(await fetch_methods(graph_name, methods, edges), format)
 
 
 @router.get("/{id}")
-def get_method_by_id(graph_name: str, id: str, with_entry_point: bool = False):
+async def get_method_by_id(
+    graph_name: str,
+    id: str,
+    with_entry_point: bool = False,
+    format: ResponseFormat = "cytoscape",
+):
     if with_entry_point:
-        return fetch_method_with_entry_point(id, graph_name)
-    return fetch_method(id, graph_name)
+        return await respond(
+            await fetch_method_with_entry_point(id, graph_name), format
+        )
+    return await respond(await fetch_method(id, graph_name), format)
 
 
 @router.get("/{id}/callers")
-def get_all_method_callers(graph_name: str, id: str):
-    return fetch_method_neighbors(graph_name, id, "callers")
+async def get_all_method_callers(
+    graph_name: str,
+    id: str,
+    offset: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=1000)] = NEIGHBOR_LIMIT,
+    format: ResponseFormat = "cytoscape",
+):
+    return await respond(
+        await fetch_method_neighbors(
+            graph_name, id, "callers", offset=offset, limit=limit
+        ),
+        format,
+    )
 
 
 @router.get("/{id}/callers/{caller_id}")
-def get_method_caller(graph_name: str, id: str, caller_id):
-    return fetch_method_neighbors(graph_name, id, "callers", caller_id)
+async def get_method_caller(
+    graph_name: str, id: str, caller_id, format: ResponseFormat = "cytoscape"
+):
+    return await respond(
+        await fetch_method_neighbors(graph_name, id, "callers", caller_id), format
+    )
 
 
 @router.get("/{id}/callees")
-def get_all_method_callees(graph_name: str, id: str):
-    return fetch_method_neighbors(graph_name, id, "callees")
+async def get_all_method_callees(
+    graph_name: str,
+    id: str,
+    offset: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=1000)] = NEIGHBOR_LIMIT,
+    format: ResponseFormat = "cytoscape",
+):
+    return await respond(
+        await fetch_method_neighbors(
+            graph_name, id, "callees", offset=offset, limit=limit
+        ),
+        format,
+    )
 
 
 @router.get("/{id}/callees/{callee_id}")
-def get_method_callee(graph_name: str, id: str, callee_id: str):
-    return fetch_method_neighbors(graph_name, id, "callees", callee_id)
+async def get_method_callee(
+    graph_name: str, id: str, callee_id: str, format: ResponseFormat = "cytoscape"
+):
+    return await respond(
+        await fetch_method_neighbors(graph_name, id, "callees", callee_id), format
+    )
@@ -10,7 +10,6 @@ from .types import (
     Edge,
     Invoke,
     Method,
-    Tree,
 )
 
 
@@ -107,14 +106,58 @@ def edge_to_cy(edge: Edge) -> dict[str, CytoscapeEdge]:
     return {id: {"group": "edges", "data": {"id": id, **edge}}}
 
 
-def methods_to_tree(methods: list[dict]) -> Tree:
-    """Convert a list of methods to tree structure based on type hierarchy."""
-    tree: Tree = {}
-    for m in methods:
-        node: dict = tree
-        for part in m["parent"].split("."):
-            if part not in node:
-                node[part] = {}
-            node = node[part]
-        node[m["name"]] = m["id"]
-    return tree
+def payload_to_compact(payload: dict) -> dict:
+    """
+    Convert a response with Cytoscape.js definitions to the compact format.
+
+    Each method and each compound node is sent once and referenced by its index
+    into `methods` or `compounds`. Compound nodes are `[id, label, parent index]`,
+    edges are `[source, target, value, relevant]`.
+    """
+    compounds: list[tuple[str, str, int | None]] = []
+    compound_indices: dict[str, int] = {}
+    methods: list[dict] = []
+    method_indices: dict[str, int] = {}
+
+    def add_compounds(parents: list[CytoscapeNode]) -> int | None:
+        """Add compound nodes from the outermost one, return index of the innermost."""
+        if parents and parents[0]["data"]["id"] in compound_indices:
+            return compound_indices[parents[0]["data"]["id"]]
+        index = None
+        for parent in reversed(parents):
+            id = parent["data"]["id"]
+            if id not in compound_indices:
+                compound_indices[id] = len(compounds)
+                compounds.append((id, parent["data"]["label"], index))
+            index = compound_indices[id]
+        return index
+
+    def add_method(node_with_parents: list[CytoscapeNode]) -> int:
+        data: dict = node_with_parents[0]["data"]
+        k = method_indices.get(data["id"])
+        if k is None:
+            k = method_indices[data["id"]] = len(methods)
+            methods.append({**data, "parent": add_compounds(node_with_parents[1:])})
+        for neighbor_type in ("callers", "callees"):
+            if neighbor_type in data:
+                methods[k][neighbor_type] = [add_method(n) for n in data[neighbor_type]]
+        return k
+
+    def compact_edges(edges: list[CytoscapeEdge]) -> list[tuple]:
+        return [
+            (
+                e["data"]["source"],
+                e["data"]["target"],
+                e["data"].get("value"),
+                e["data"].get("relevant"),
+            )
+            for e in edges
+        ]
+
+    result = {
+        "nodes": [add_method(n) for n in payload["nodes"]],
+        "edges": compact_edges(payload["edges"]),
+    }
+    if "topEdges" in payload:
+        result["topEdges"] = compact_edges(payload["topEdges"])
+    return {"compounds": compounds, "methods": methods, **result}
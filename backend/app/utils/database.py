@@ -4,28 +4,206 @@ Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
 Description: Utility functions for fetching elements from Neo4j.
 """
 
-from ..driver import driver
+import asyncio
+import os
+import re
+
+from ..driver import async_driver
 from ..utils.conversions import edge_to_cy, node_to_cy
+from .graph_cache import GraphStore, get_graph_async
 from .types import CytoscapeEdge, CytoscapeNode, Edge, NeighborType
 
+# Callers and callees listed with each method, further ones are fetched by pages
+NEIGHBOR_LIMIT = int(os.getenv("NEIGHBOR_LIMIT", "100"))
+
+
+def neighbors_subqueries(node: str, prefix: str = "") -> str:
+    """Subqueries collecting callers and callees of a node with the highest edge values."""
+    return f"""
+    CALL ({node}) {{
+      OPTIONAL MATCH (caller)-[caller_edge]->({node})
+      WITH caller, caller_edge
+      ORDER BY coalesce(caller_edge.value, 0) DESC, caller.id
+      LIMIT $neighbor_limit
+      RETURN collect(caller) AS {prefix}callers, collect(caller_edge) AS {prefix}caller_edges
+    }}
+    CALL ({node}) {{
+      OPTIONAL MATCH ({node})-[callee_edge]->(callee)
+      WITH callee, callee_edge
+      ORDER BY coalesce(callee_edge.value, 0) DESC, callee.id
+      LIMIT $neighbor_limit
+      RETURN collect(callee) AS {prefix}callees, collect(callee_edge) AS {prefix}callee_edges
+    }}
+    """
 
-def fetch_method(
-    id: str,
-    graph_name: str,
+
+def add_cached_method(
+    store: GraphStore,
+    i: int,
+    cy_nodes: dict[str, list[CytoscapeNode]],
+    cy_edges: dict[str, CytoscapeEdge],
 ):
-    query = """
-    MATCH (m {id: $id, graph: $graph})
-    OPTIONAL MATCH (caller)-[caller_edge]->(m)
-    OPTIONAL MATCH (m)-[callee_edge]->(callee)
-    RETURN m, collect(DISTINCT caller) AS callers, collect(DISTINCT caller_edge) AS caller_edges,
-           collect(DISTINCT callee) AS callees, collect(DISTINCT callee_edge) AS callee_edges
-    """
+    """Add a cached method with lists of its top neighbors and edges to them."""
+    m = store.method(i)
+    id = m["id"]
+    cy_nodes |= node_to_cy(m)
+
+    method_node = cy_nodes[id][0]
+    method_node["data"]["callers"] = []
+    method_node["data"]["callees"] = []
+
+    for caller, value, relevant in store.neighbor_page(i, "callers", 0, NEIGHBOR_LIMIT):
+        caller_method = store.method(caller)
+        definition = list(node_to_cy(caller_method).values())[0]
+        method_node["data"]["callers"].append(definition)
+        edge: Edge = {
+            "source": caller_method["id"],
+            "target": id,
+            "value": value,  # type: ignore
+            "relevant": relevant,  # type: ignore
+        }
+        cy_edges |= edge_to_cy(edge)
+    for callee, value, relevant in store.neighbor_page(i, "callees", 0, NEIGHBOR_LIMIT):
+        callee_method = store.method(callee)
+        definition = list(node_to_cy(callee_method).values())[0]
+        method_node["data"]["callees"].append(definition)
+        edge: Edge = {
+            "source": id,
+            "target": callee_method["id"],
+            "value": value,  # type: ignore
+            "relevant": relevant,  # type: ignore
+        }
+        cy_edges |= edge_to_cy(edge)
+
+
+def cached_method(store: GraphStore, id: str):
+    cy_nodes: dict[str, list[CytoscapeNode]] = {}
+    cy_edges: dict[str, CytoscapeEdge] = {}
+
+    if id in store.index:
+        add_cached_method(store, store.index[id], cy_nodes, cy_edges)
+    return {
+        "nodes": list(cy_nodes.values()),
+        "edges": list(cy_edges.values()),
+    }
+
+
+def cached_method_with_entry_point(store: GraphStore, id: str):
+    """Path from an entry point to the method, None if the path is not indexed."""
+    cy_nodes: dict[str, list[CytoscapeNode]] = {}
+    cy_edges: dict[str, CytoscapeEdge] = {}
+
+    # Follow parent pointers of the cached entry point path index
+    path_indices = store.entry_path(store.index[id])
+    if path_indices is None:
+        return None
+    for i in path_indices:
+        add_cached_method(store, i, cy_nodes, cy_edges)
+    # Edges of the path may not be among the top neighbors of its nodes
+    for source, target in zip(path_indices, path_indices[1:]):
+        for callee, value, relevant in store.callees(source):
+            if callee == target:
+                edge: Edge = {
+                    "source": store.ids[source],
+                    "target": store.ids[target],
+                    "value": value,  # type: ignore
+                    "relevant": relevant,  # type: ignore
+                }
+                cy_edges |= edge_to_cy(edge)
+    cy_nodes[id][0]["data"]["path"] = [store.ids[i] for i in path_indices]
+    return {
+        "nodes": list(cy_nodes.values()),
+        "edges": list(cy_edges.values()),
+    }
+
+
+def cached_method_neighbors(
+    store: GraphStore,
+    method_id: str,
+    neighbor_type: NeighborType,
+    neighbor_id: str | None = None,
+    offset: int = 0,
+    limit: int = NEIGHBOR_LIMIT,
+):
+    cy_nodes: dict[str, list[CytoscapeNode]] = {}
+    cy_edges: dict[str, CytoscapeEdge] = {}
+
+    i = store.index.get(method_id)
+    if i is not None:
+        if neighbor_id is None:
+            neighbors = store.neighbor_page(i, neighbor_type, offset, limit)
+        else:
+            neighbors = [
+                n
+                for n in (
+                    store.callers(i) if neighbor_type == "callers" else store.callees(i)
+                )
+                if store.ids[n[0]] == neighbor_id
+            ]
+        for neighbor, value, relevant in neighbors:
+            add_cached_method(store, neighbor, cy_nodes, cy_edges)
+            # The method may not be among the top neighbors of a hub
+            id = store.ids[neighbor]
+            edge: Edge = {
+                "source": id if neighbor_type == "callers" else method_id,
+                "target": method_id if neighbor_type == "callers" else id,
+                "value": value,  # type: ignore
+                "relevant": relevant,  # type: ignore
+            }
+            cy_edges |= edge_to_cy(edge)
+    return {"nodes": list(cy_nodes.values()), "edges": list(cy_edges.values())}
 
-    records = driver.execute_query(query, id=id, graph=graph_name).records
 
+def cached_methods(store: GraphStore, ids: list[str], edge_ids: list[str]):
     cy_nodes: dict[str, list[CytoscapeNode]] = {}
     cy_edges: dict[str, CytoscapeEdge] = {}
 
+    for id in ids:
+        if id in store.index:
+            add_cached_method(store, store.index[id], cy_nodes, cy_edges)
+    for edge_id in edge_ids:
+        source_id, _, target_id = edge_id.partition("->")
+        if edge_id in cy_edges or source_id not in store.index:
+            continue
+        for target, value, relevant in store.callees(store.index[source_id]):
+            if store.ids[target] == target_id:
+                edge: Edge = {
+                    "source": source_id,
+                    "target": target_id,
+                    "value": value,  # type: ignore
+                    "relevant": relevant,  # type: ignore
+                }
+                cy_edges |= edge_to_cy(edge)
+    return {
+        "nodes": list(cy_nodes.values()),
+        "edges": list(cy_edges.values()),
+    }
+
+
+async def fetch_method(
+    id: str,
+    graph_name: str,
+):
+    cy_nodes: dict[str, list[CytoscapeNode]] = {}
+    cy_edges: dict[str, CytoscapeEdge] = {}
+
+    store = await get_graph_async(graph_name)
+    if store is not None:
+        # Neighbors of hub methods would block the event loop for too long
+        return await asyncio.to_thread(cached_method, store, id)
+
+    query = f"""
+    MATCH (m {{id: $id, graph: $graph}})
+    {neighbors_subqueries("m")}
+    RETURN m, callers, caller_edges, callees, callee_edges
+    """
+
+    records = (
+        await async_driver.execute_query(
+            query, id=id, graph=graph_name, neighbor_limit=NEIGHBOR_LIMIT
+        )
+    ).records
+
     for record in records:
         m, callers, caller_edges, callees, callee_edges = record
 
@@ -64,30 +242,137 @@ def fetch_method(
     }
 
 
-def fetch_method_with_entry_point(id: str, graph_name: str):
-    query = """
-    MATCH p = SHORTEST 1 (e {graph: $graph})-->*({id: $id, graph: $graph})
-    WHERE e.is_entry_point
-    LIMIT 1
+async def fetch_methods(graph_name: str, ids: list[str], edge_ids: list[str]):
+    """Methods with their neighbors and edges, and edges between other methods."""
+    cy_nodes: dict[str, list[CytoscapeNode]] = {}
+    cy_edges: dict[str, CytoscapeEdge] = {}
 
-    UNWIND nodes(p) AS pn
-    OPTIONAL MATCH (caller)-[caller_edge]->(pn)
-    WITH p, pn, collect(DISTINCT { node: caller, edge: caller_edge }) AS callers
-    OPTIONAL MATCH (pn)-[callee_edge]->(callee)
-    WITH p, pn, callers, collect(DISTINCT { node: callee, edge: callee_edge }) AS callees
+    store = await get_graph_async(graph_name)
+    if store is not None:
+        return await asyncio.to_thread(cached_methods, store, ids, edge_ids)
 
-    RETURN p AS path, collect({ callers: callers, callees: callees }) AS path_neighbors
+    # Callers and callees are collected separately to avoid a product of both lists
+    query = f"""
+    CALL () {{
+      UNWIND $ids AS id
+      MATCH (m:Method {{id: id, graph: $graph}})
+      {neighbors_subqueries("m")}
+      RETURN collect([m, callers, caller_edges, callees, callee_edges]) AS methods
+    }}
+    CALL () {{
+      UNWIND $edges AS edge
+      MATCH (source:Method {{id: edge[0], graph: $graph}})-[r]->(target:Method {{id: edge[1], graph: $graph}})
+      RETURN collect({{source: source.id, target: target.id, value: r.value, relevant: r.relevant}}) AS edges
+    }}
+    RETURN methods, edges
     """
 
-    records = driver.execute_query(query, id=id, graph=graph_name).records
+    records = (
+        await async_driver.execute_query(
+            query,
+            ids=ids,
+            edges=[edge_id.partition("->")[::2] for edge_id in edge_ids],
+            graph=graph_name,
+            neighbor_limit=NEIGHBOR_LIMIT,
+        )
+    ).records
+    methods, edges = records[0]
+
+    for m, callers, caller_edges, callees, callee_edges in methods:
+        id = m["id"]
+        cy_nodes |= node_to_cy(m)
+
+        method_node = cy_nodes[id][0]
+        method_node["data"]["callers"] = []
+        method_node["data"]["callees"] = []
+
+        for caller in callers:
+            definition = list(node_to_cy(caller).values())[0]
+            method_node["data"]["callers"].append(definition)
+        for callee in callees:
+            definition = list(node_to_cy(callee).values())[0]
+            method_node["data"]["callees"].append(definition)
+        for r in caller_edges:
+            edge: Edge = {
+                "source": r.start_node["id"],
+                "target": id,
+                "value": r["value"],
+                "relevant": r["relevant"],
+            }
+            cy_edges |= edge_to_cy(edge)
+        for r in callee_edges:
+            edge: Edge = {
+                "source": id,
+                "target": r.end_node["id"],
+                "value": r["value"],
+                "relevant": r["relevant"],
+            }
+            cy_edges |= edge_to_cy(edge)
+
+    for edge in edges:
+        cy_edges |= edge_to_cy(edge)
+
+    return {
+        "nodes": list(cy_nodes.values()),
+        "edges": list(cy_edges.values()),
+    }
+
 
+async def fetch_method_with_entry_point(id: str, graph_name: str):
     cy_nodes: dict[str, list[CytoscapeNode]] = {}
     cy_edges: dict[str, CytoscapeEdge] = {}
 
-    path, path_neighbors = records[0]
+    store = await get_graph_async(graph_name)
+    if store is not None and id in store.index:
+        result = await asyncio.to_thread(cached_method_with_entry_point, store, id)
+        if result is not None:
+            return result
+
+    neighbors_query = f"""
+    UNWIND path_nodes AS pn
+    {neighbors_subqueries("pn")}
+    RETURN path_nodes, path_edges, collect({{
+      callers: callers, caller_edges: caller_edges,
+      callees: callees, callee_edges: callee_edges
+    }}) AS path_neighbors
+    """
+
+    # Follow parent pointers saved at import back from the method, one caller a step
+    indexed_query = f"""
+    MATCH p = (m:Method {{id: $id, graph: $graph}})
+              ((c)<--(a) WHERE c.entry_parent = a.id)*
+              (e {{entry_depth: 0}})
+    WHERE m.entry_depth IS NOT NULL
+    WITH reverse(nodes(p)) AS path_nodes, reverse(relationships(p)) AS path_edges
+    LIMIT 1
+    {neighbors_query}
+    """
+
+    # Search for the shortest path in graphs imported without the index
+    search_query = f"""
+    MATCH p = SHORTEST 1 (e {{graph: $graph}})-->*({{id: $id, graph: $graph}})
+    WHERE e.is_entry_point
+    WITH nodes(p) AS path_nodes, relationships(p) AS path_edges
+    LIMIT 1
+    {neighbors_query}
+    """
+
+    records = (
+        await async_driver.execute_query(
+            indexed_query, id=id, graph=graph_name, neighbor_limit=NEIGHBOR_LIMIT
+        )
+    ).records
+    if not records:
+        records = (
+            await async_driver.execute_query(
+                search_query, id=id, graph=graph_name, neighbor_limit=NEIGHBOR_LIMIT
+            )
+        ).records
+
+    path_nodes, path_edges, path_neighbors = records[0]
 
     # Every node on the path from entry point
-    for i, pn in enumerate(path.nodes):
+    for i, pn in enumerate(path_nodes):
         cy_nodes |= node_to_cy(pn)
         pn_id = pn["id"]
 
@@ -98,37 +383,43 @@ def fetch_method_with_entry_point(id: str, graph_name: str):
         neighbors = path_neighbors[i]
 
         # Callers and edges from them
-        for caller in neighbors["callers"]:
-            if caller["node"] is None:
-                break
-            definition = list(node_to_cy(caller["node"]).values())[0]
+        for caller, r in zip(neighbors["callers"], neighbors["caller_edges"]):
+            definition = list(node_to_cy(caller).values())[0]
             pn_method_node["data"]["callers"].append(definition)
 
             edge: Edge = {
-                "source": caller["node"]["id"],
+                "source": caller["id"],
                 "target": pn_id,
-                "value": caller["edge"]["value"],
-                "relevant": caller["edge"]["relevant"],
+                "value": r["value"],
+                "relevant": r["relevant"],
             }
             cy_edges |= edge_to_cy(edge)
 
         # Callees and edges to them
-        for callee in neighbors["callees"]:
-            if callee["node"] is None:
-                break
-            definition = list(node_to_cy(callee["node"]).values())[0]
+        for callee, r in zip(neighbors["callees"], neighbors["callee_edges"]):
+            definition = list(node_to_cy(callee).values())[0]
             pn_method_node["data"]["callees"].append(definition)
 
             edge: Edge = {
                 "source": pn_id,
-                "target": callee["node"]["id"],
-                "value": callee["edge"]["value"],
-                "relevant": callee["edge"]["relevant"],
+                "target": callee["id"],
+                "value": r["value"],
+                "relevant": r["relevant"],
             }
             cy_edges |= edge_to_cy(edge)
 
+    # Edges of the path may not be among the top neighbors of its nodes
+    for r in path_edges:
+        edge: Edge = {
+            "source": r.start_node["id"],
+            "target": r.end_node["id"],
+            "value": r["value"],
+            "relevant": r["relevant"],
+        }
+        cy_edges |= edge_to_cy(edge)
+
     # Save entry point path to the fetched node data
-    cy_nodes[id][0]["data"]["path"] = [n[0]["data"]["id"] for n in cy_nodes.values()]
+    cy_nodes[id][0]["data"]["path"] = [pn["id"] for pn in path_nodes]
 
     return {
         "nodes": list(cy_nodes.values()),
@@ -136,12 +427,30 @@ def fetch_method_with_entry_point(id: str, graph_name: str):
     }
 
 
-def fetch_method_neighbors(
+async def fetch_method_neighbors(
     graph_name: str,
     method_id: str,
     neighbor_type: NeighborType,
     neighbor_id: str | None = None,
+    offset: int = 0,
+    limit: int = NEIGHBOR_LIMIT,
 ):
+    """A page of callers or callees ordered by value of the edge, highest first."""
+    cy_nodes: dict[str, list[CytoscapeNode]] = {}
+    cy_edges: dict[str, CytoscapeEdge] = {}
+
+    store = await get_graph_async(graph_name)
+    if store is not None:
+        return await asyncio.to_thread(
+            cached_method_neighbors,
+            store,
+            method_id,
+            neighbor_type,
+            neighbor_id,
+            offset,
+            limit,
+        )
+
     if neighbor_type == "callers":
         match_pattern = (
             "(neighbor {id: $neighbor_id})-[r]->(m)"
@@ -157,31 +466,42 @@ def fetch_method_neighbors(
 
     query = f"""
     MATCH (m {{id: $id, graph: $graph}})
-    OPTIONAL MATCH {match_pattern}
-    OPTIONAL MATCH (neighbor_caller)-[neighbor_caller_edge]->(neighbor)
-    OPTIONAL MATCH (neighbor)-[neighbor_callee_edge]->(neighbor_callee)
-    RETURN neighbor, r,
-           collect(DISTINCT neighbor_caller) AS n_callers,
-           collect(DISTINCT neighbor_caller_edge) AS n_caller_edges,
-           collect(DISTINCT neighbor_callee) AS n_callees,
-           collect(DISTINCT neighbor_callee_edge) AS n_callee_edges
+    MATCH {match_pattern}
+    WITH neighbor, r
+    ORDER BY coalesce(r.value, 0) DESC, neighbor.id
+    SKIP $offset
+    LIMIT $limit
+    {neighbors_subqueries("neighbor", "n_")}
+    RETURN neighbor, r, n_callers, n_caller_edges, n_callees, n_callee_edges
+    ORDER BY coalesce(r.value, 0) DESC, neighbor.id
     """
 
-    records = driver.execute_query(
-        query, id=method_id, neighbor_id=neighbor_id, graph=graph_name
+    records = (
+        await async_driver.execute_query(
+            query,
+            id=method_id,
+            neighbor_id=neighbor_id,
+            graph=graph_name,
+            offset=offset,
+            limit=limit,
+            neighbor_limit=NEIGHBOR_LIMIT,
+        )
     ).records
 
-    cy_nodes: dict[str, list[CytoscapeNode]] = {}
-    cy_edges: dict[str, CytoscapeEdge] = {}
-
     for record in records:
         neighbor, r, n_callers, n_caller_edges, n_callees, n_callee_edges = record
 
-        if neighbor is None:
-            continue
-
         cy_nodes |= node_to_cy(neighbor)
 
+        # The method may not be among the top neighbors of a hub
+        edge: Edge = {
+            "source": r.start_node["id"],
+            "target": r.end_node["id"],
+            "value": r["value"],
+            "relevant": r["relevant"],
+        }
+        cy_edges |= edge_to_cy(edge)
+
         neighbor_node = cy_nodes[neighbor["id"]][0]
         neighbor_node["data"]["callers"] = []
         neighbor_node["data"]["callees"] = []
@@ -216,7 +536,7 @@ def fetch_method_neighbors(
     return {"nodes": list(cy_nodes.values()), "edges": list(cy_edges.values())}
 
 
-def fetch_edges(
+async def fetch_edges(
     graph_name: str,
     edge_id: str | None = None,
     limit: int = 1,
@@ -227,36 +547,62 @@ def fetch_edges(
 
     if edge_id is not None:
         source_id, target_id = edge_id.split("->")
-        match_pattern = (
-            "(source {id: $source_id, graph: $graph})-[r]->(target {id: $target_id})"
+        queries = ["""
+            MATCH (source:Method {id: $source_id, graph: $graph})-[r]->
+                  (target:Method {id: $target_id, graph: $graph})
+            """]
+        order = "r.value DESC"
+    else:
+        queries = [
+            # Ranks of relevant edges are stored with the values of a difference
+            """
+            MATCH (source:Method)-[r:CALLS]->(target:Method)
+            USING INDEX r:CALLS(rank)
+            WHERE r.rank < $limit AND source.graph = $graph
+            """,
+            # Differences saved before edges were ranked
+            """
+            MATCH (source:Method {graph: $graph})-[r]->(target)
+            WHERE r.relevant
+            WITH source, r, target
+            ORDER BY r.value DESC
+            LIMIT $limit
+            """,
+        ]
+        order = "r.rank, r.value DESC"
+
+    # Each list is collected in its own subquery, without a product of the others
+    if with_nodes:
+        neighbors = neighbors_subqueries("source", "s_") + neighbors_subqueries(
+            "target", "t_"
         )
-        where = ""
     else:
-        match_pattern = "(source {graph: $graph})-[r]->(target)"
-        where = "WHERE r.relevant"
-
-    query = f"""
-    MATCH {match_pattern}
-    WITH source, r, target
-    {where}
-    ORDER BY r.value DESC
-    LIMIT $limit
-
-    OPTIONAL MATCH (source_caller)-[source_caller_edge]->(source)
-    OPTIONAL MATCH (source)-[source_callee_edge]->(source_callee)
-    OPTIONAL MATCH (target_caller)-[target_caller_edge]->(target)
-    OPTIONAL MATCH (target)-[target_callee_edge]->(target_callee)
-
-    RETURN source, r, target,
-           collect(DISTINCT source_caller) AS s_callers, collect(DISTINCT source_callee) AS s_callees,
-           collect(DISTINCT source_caller_edge) AS s_caller_edges, collect(DISTINCT source_callee_edge) AS s_callee_edges,
-           collect(DISTINCT target_caller) AS t_callers, collect(DISTINCT target_callee) AS t_callees,
-           collect(DISTINCT target_caller_edge) AS t_caller_edges, collect(DISTINCT target_callee_edge) AS t_callee_edges
-    """
-
-    records = driver.execute_query(
-        query, source_id=source_id, target_id=target_id, graph=graph_name, limit=limit
-    ).records
+        neighbors = """
+        WITH source, r, target, [] AS s_callers, [] AS s_caller_edges,
+             [] AS s_callees, [] AS s_callee_edges, [] AS t_callers,
+             [] AS t_caller_edges, [] AS t_callees, [] AS t_callee_edges
+        """
+
+    for match in queries:
+        query = f"""
+        {match}
+        {neighbors}
+        RETURN source, r, target, s_callers, s_callees, s_caller_edges, s_callee_edges,
+               t_callers, t_callees, t_caller_edges, t_callee_edges
+        ORDER BY {order}
+        """
+        records = (
+            await async_driver.execute_query(
+                query,
+                source_id=source_id,
+                target_id=target_id,
+                graph=graph_name,
+                limit=limit,
+                neighbor_limit=NEIGHBOR_LIMIT,
+            )
+        ).records
+        if records:
+            break
 
     cy_nodes: dict[str, list[CytoscapeNode]] = {}
     cy_edges: dict[str, CytoscapeEdge] = {}
@@ -356,3 +702,68 @@ def fetch_edges(
         "edges": list(cy_edges.values()),
         "topEdges": list(cy_top_edges.values()),
     }
+
+
+# Properties of methods searched for words of the text
+SEARCH_FIELDS = ("name", "parent_class", "parameters", "display")
+
+
+def analyzed_words(text: str) -> list[str]:
+    """Words of the text as split by the simple analyzer of the index, at non-letters."""
+    return re.findall(r"[^\W\d_]+", text.lower())
+
+
+def search_query(text: str, graph_name: str) -> str | None:
+    """
+    Lucene query matching methods of the graph with all words of the text,
+    None if the text has no words.
+
+    Each word matches as a prefix, whole words and words in method names rank higher.
+    Graphs whose names have the same words are told apart only by the caller.
+    """
+    words = analyzed_words(text)
+    if not words:
+        return None
+    # Unqualified terms would also match the graph name
+    query = " AND ".join(
+        "("
+        + " OR ".join(
+            [f"name:{w}^4"]
+            + [f"{field}:{w}^2" for field in SEARCH_FIELDS]
+            + [f"{field}:{w}*" for field in SEARCH_FIELDS]
+        )
+        + ")"
+        for w in words
+    )
+    graph_words = analyzed_words(graph_name)
+    if graph_words:
+        query = f'graph:"{" ".join(graph_words)}" AND {query}'
+    return query
+
+
+async def search_methods(graph_name: str, text: str, offset: int, limit: int):
+    """Methods of the graph matching the text, best matches first."""
+    query = search_query(text, graph_name)
+    if query is None:
+        return {"methods": [], "more": False}
+
+    # The index only narrows hits down to graphs with the same words in their name.
+    # One extra hit tells whether there are more pages.
+    records = (
+        await async_driver.execute_query(
+            "CALL db.index.fulltext.queryNodes('method_graph_search', $query) "
+            "YIELD node, score "
+            "WHERE node.graph = $graph "
+            "RETURN node.id AS id, node.name AS name, node.parent_class AS parentClass, "
+            "       node.display AS display, score "
+            "SKIP $offset LIMIT $limit",
+            query=query,
+            graph=graph_name,
+            offset=offset,
+            limit=limit + 1,
+        )
+    ).records
+    return {
+        "methods": [record.data() for record in records[:limit]],
+        "more": len(records) > limit,
+    }
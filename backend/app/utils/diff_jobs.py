@@ -0,0 +1,401 @@
+"""
+File: backend/app/utils/diff_jobs.py
+Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+Description: Jobs running the difference algorithm in worker processes, each with
+             its own progress and cancellation, with a limit on concurrent jobs
+             and a queue of waiting jobs.
+"""
+
+import ctypes
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from ..driver import driver
+from . import diff_worker, graph_cache, result_store
+from .streaming import CHUNK_SIZE, iter_chunks
+
+# Number of jobs running at once, each in its own worker process
+DIFF_JOBS = int(os.getenv("DIFF_JOBS", "1"))
+# Number of jobs waiting for a worker, further jobs are rejected
+DIFF_QUEUE_SIZE = int(os.getenv("DIFF_QUEUE_SIZE", "16"))
+# Number of threads running iterations of the difference algorithm in each job
+DIFF_THREADS = int(os.getenv("DIFF_THREADS", "1"))
+# Whether iterations skip edges whose methods did not change, on a single thread
+DIFF_ACTIVE_SET = os.getenv("DIFF_ACTIVE_SET", "0") == "1"
+# Number of concurrent sessions writing results of a job to Neo4j
+SAVE_WORKERS = int(os.getenv("SAVE_WORKERS", "4"))
+# Number of finished jobs kept for reporting their outcome
+JOB_HISTORY = 100
+
+logger = logging.getLogger("uvicorn")
+logger.propagate = False
+
+_context = multiprocessing.get_context("spawn")
+# Iteration count and cancel flag of the job in each worker slot, shared with workers
+_iteration_counts = _context.RawArray(ctypes.c_int, DIFF_JOBS)
+_cancel_flags = _context.RawArray(ctypes.c_bool, DIFF_JOBS)
+
+_lock = threading.Lock()
+_jobs: OrderedDict[str, "DiffJob"] = OrderedDict()
+_queue: queue.Queue["DiffJob"] = queue.Queue(DIFF_QUEUE_SIZE)
+_executor: ProcessPoolExecutor | None = None
+_dispatchers: list[threading.Thread] = []
+
+
+class JobError(Exception):
+    """Raised when a job cannot be submitted."""
+
+
+class DiffJob:
+    """Difference of two graphs, from submission until its result is saved."""
+
+    def __init__(
+        self,
+        graph_name: str,
+        other_graph_name: str,
+        max_iterations: int,
+        supergraph_directory: str,
+        subgraph_directory: str,
+        fresh: bool = False,
+    ):
+        self.id = uuid.uuid4().hex
+        self.graph_name = graph_name
+        self.other_graph_name = other_graph_name
+        self.max_iterations = max_iterations
+        self.supergraph_directory = supergraph_directory
+        self.subgraph_directory = subgraph_directory
+        # Ignore the checkpoint of previous differences of the same graphs
+        self.fresh = fresh
+
+        # Queued, calculating, saving, done, cancelled, or failed
+        self.status = "queued"
+        # Worker slot of the job while the algorithm runs
+        self.slot: int | None = None
+        self.cancel_requested = False
+        self.saved = 0
+        self.total = 0
+        self.message: str | None = None
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.done = threading.Event()
+        self._iterations = 0
+
+    @property
+    def iterations(self) -> int:
+        slot = self.slot
+        if slot is not None:
+            return _iteration_counts[slot]
+        return self._iterations
+
+    @property
+    def error(self) -> bool:
+        return self.status == "failed"
+
+    def cancel(self):
+        """Stop the algorithm, values computed so far are still saved."""
+        with _lock:
+            self.cancel_requested = True
+            if self.slot is not None:
+                _cancel_flags[self.slot] = True
+
+    def finish(self, status: str, message: str):
+        self.status = status
+        self.message = message
+        self.finished_at = time.time()
+        self.done.set()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "graph": self.graph_name,
+            "otherGraph": self.other_graph_name,
+            "maxIterations": self.max_iterations,
+            "status": self.status,
+            "iterations": self.iterations,
+            "saved": self.saved,
+            "total": self.total,
+            "message": self.message,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+        }
+
+
+def submit(
+    graph_name: str,
+    other_graph_name: str,
+    max_iterations: int,
+    supergraph_directory: str,
+    subgraph_directory: str,
+    fresh: bool = False,
+) -> DiffJob:
+    """
+    Queue a difference, or return the unfinished job with the same parameters.
+
+    Raises `JobError` if a different difference is saving to the same graph,
+    or if the queue is full.
+    """
+    with _lock:
+        for job in _jobs.values():
+            if job.graph_name != graph_name or job.done.is_set():
+                continue
+            if (job.other_graph_name, job.max_iterations) == (
+                other_graph_name,
+                max_iterations,
+            ):
+                return job
+            raise JobError(
+                f"Difference of {graph_name} with {job.other_graph_name} "
+                "is already in progress"
+            )
+
+        job = DiffJob(
+            graph_name,
+            other_graph_name,
+            max_iterations,
+            supergraph_directory,
+            subgraph_directory,
+            fresh,
+        )
+        try:
+            _queue.put_nowait(job)
+        except queue.Full:
+            raise JobError("Too many differences are waiting, try again later")
+        _jobs[job.id] = job
+
+        # Forget the oldest finished jobs
+        finished = [j.id for j in _jobs.values() if j.done.is_set()]
+        for job_id in finished[: max(0, len(finished) - JOB_HISTORY)]:
+            del _jobs[job_id]
+
+        if not _dispatchers:
+            for slot in range(DIFF_JOBS):
+                thread = threading.Thread(target=dispatch, args=(slot,), daemon=True)
+                thread.start()
+                _dispatchers.append(thread)
+
+    return job
+
+
+def get(job_id: str) -> DiffJob | None:
+    with _lock:
+        return _jobs.get(job_id)
+
+
+def jobs() -> list[DiffJob]:
+    with _lock:
+        return list(_jobs.values())
+
+
+def executor() -> ProcessPoolExecutor:
+    """Pool of worker processes, created on first use and after a worker crashes."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                DIFF_JOBS,
+                mp_context=_context,
+                initializer=diff_worker.init,
+                initargs=(_iteration_counts, _cancel_flags),
+            )
+        return _executor
+
+
+def dispatch(slot: int):
+    """Run queued jobs one by one in the given worker slot."""
+    global _executor
+    while True:
+        job = _queue.get()
+        if job.cancel_requested:
+            job.finish("cancelled", f"Difference with {job.other_graph_name} cancelled")
+            continue
+
+        job.started_at = time.time()
+        try:
+            run(job, slot)
+        except BrokenProcessPool:
+            logger.error(f"Worker process of job {job.id} terminated abruptly")
+            with _lock:
+                _executor = None
+            job.finish(
+                "failed",
+                f"Difference with {job.other_graph_name} failed: worker crashed",
+            )
+        except Exception as e:
+            logger.exception(f"Job {job.id} failed")
+            job.finish("failed", f"Difference with {job.other_graph_name} failed: {e}")
+
+
+def run(job: DiffJob, slot: int):
+    key = result_store.result_key(
+        job.supergraph_directory,
+        job.subgraph_directory,
+        job.max_iterations,
+        DIFF_ACTIVE_SET,
+    )
+    saved_key, saved_iterations = saved_result(job.graph_name)
+    if saved_key == key:
+        # The graph already holds this result
+        job._iterations = saved_iterations
+        job.finish(
+            "done",
+            f"Difference with {job.other_graph_name} already calculated: "
+            f"{saved_iterations} iterations",
+        )
+        return
+
+    checkpoint_path = result_store.checkpoint_path(
+        job.supergraph_directory, job.subgraph_directory
+    )
+    if job.fresh:
+        result_store.remove_checkpoint(checkpoint_path)
+
+    data = None
+    result = result_store.get(key)
+    if result is None:
+        with _lock:
+            _iteration_counts[slot] = 0
+            _cancel_flags[slot] = job.cancel_requested
+            job.slot = slot
+            job.status = "calculating"
+        try:
+            data = (
+                executor()
+                .submit(
+                    diff_worker.run,
+                    slot,
+                    job.supergraph_directory,
+                    job.subgraph_directory,
+                    job.max_iterations,
+                    DIFF_THREADS,
+                    checkpoint_path,
+                    DIFF_ACTIVE_SET,
+                )
+                .result()
+            )
+        finally:
+            with _lock:
+                job._iterations = _iteration_counts[slot]
+                job.slot = None
+        result = result_store.decode(data)
+        if result is None:
+            # Do not store or save what the worker returned
+            job.finish(
+                "failed",
+                f"Difference with {job.other_graph_name} failed: "
+                "the worker returned an invalid result",
+            )
+            return
+    else:
+        # Skip the algorithm, only write the stored values
+        job._iterations = result.iterations
+
+    # A cancelled difference is incomplete and must not be reused
+    complete = not job.cancel_requested
+    if complete and data is not None:
+        result_store.put(key, data)
+    converged = job.max_iterations <= 0 or job.iterations < job.max_iterations
+    if complete and converged:
+        # A difference stopped at the maximum is continued by a longer one
+        result_store.remove_checkpoint(checkpoint_path)
+
+    job.status = "saving"
+    with result:
+        save_result(job, result)
+
+    driver.execute_query(
+        "MERGE (meta:Meta {graph_name: $graph}) "
+        "SET meta.other_graph = $other_graph, meta.iterations = $iterations, "
+        "    meta.result_key = $key",
+        graph=job.graph_name,
+        other_graph=job.other_graph_name,
+        iterations=job.iterations,
+        key=key if complete else None,
+    )
+    graph_cache.invalidate(job.graph_name)
+
+    job.finish(
+        "done" if complete else "cancelled",
+        f"Difference with {job.other_graph_name} calculated: {job.iterations} iterations",
+    )
+
+
+def saved_result(graph_name: str) -> tuple[str | None, int | None]:
+    """Key and iteration count of the result whose values are saved in the graph."""
+    records = driver.execute_query(
+        "MATCH (meta:Meta {graph_name: $graph}) "
+        "RETURN meta.result_key AS key, meta.iterations AS iterations",
+        graph=graph_name,
+    ).records
+    return (records[0]["key"], records[0]["iterations"]) if records else (None, None)
+
+
+def reset_values(graph_name: str):
+    """Set values of all edges changed by a previous difference back to zero."""
+    with driver.session() as session:
+        session.run(
+            "MATCH (:Method {graph: $graph})-[r]->() "
+            "WHERE r.value IS NULL OR r.value <> 0 OR r.relevant IS NOT NULL "
+            "   OR r.rank IS NOT NULL "
+            "CALL (r) { SET r.value = 0, r.relevant = null, r.rank = null } "
+            "IN TRANSACTIONS OF $batch_size ROWS",
+            graph=graph_name,
+            batch_size=CHUNK_SIZE,
+        ).consume()
+
+
+def edge_ranks(result) -> list[int | None]:
+    """Position of each relevant edge of the result by value, highest first."""
+    ranks: list[int | None] = [None] * len(result)
+    relevant = [k for k in range(len(result)) if result.relevant[k]]
+    relevant.sort(key=result.values.__getitem__, reverse=True)
+    for rank, k in enumerate(relevant):
+        ranks[k] = rank
+    return ranks
+
+
+def save_batch(
+    graph_name: str, result, positions: list[int], ranks: list[int | None]
+) -> int:
+    """Write values of edges at the given positions of the result, return the count."""
+    driver.execute_query(
+        "UNWIND range(0, size($values) - 1) AS k "
+        "MATCH (:Method {id: toString($source_ids[k]), graph: $graph})-[r]->"
+        "(:Method {id: toString($target_ids[k]), graph: $graph}) "
+        "SET r.value = $values[k], r.relevant = $relevant[k], r.rank = $ranks[k]",
+        graph=graph_name,
+        source_ids=[result.source_ids[k] for k in positions],
+        target_ids=[result.target_ids[k] for k in positions],
+        values=[result.values[k] for k in positions],
+        relevant=[result.relevant[k] for k in positions],
+        ranks=[ranks[k] for k in positions],
+    )
+    return len(positions)
+
+
+def save_result(job: DiffJob, result: result_store.StoredResult):
+    """Replace values of edges of the graph with the result, counting saved edges."""
+    job.saved = 0
+    job.total = len(result)
+
+    # Top edges are read in the order of their stored rank
+    ranks = edge_ranks(result)
+
+    # Edges left at zero are covered by the reset
+    reset_values(job.graph_name)
+    with ThreadPoolExecutor(SAVE_WORKERS) as executor:
+        batches = [
+            executor.submit(save_batch, job.graph_name, result, batch, ranks)
+            for batch in iter_chunks(range(len(result)))
+        ]
+        for batch in as_completed(batches):
+            job.saved += batch.result()
@@ -0,0 +1,52 @@
+"""
+File: backend/app/utils/diff_worker.py
+Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+Description: Runs the difference algorithm in worker processes, reporting progress
+             and reading cancellation through memory shared with the server.
+"""
+
+import ctypes
+
+from diff_c.diff import diff
+
+from . import result_store
+
+# Iteration counts and cancel flags of all worker slots, set in each worker process
+_iteration_counts = None
+_cancel_flags = None
+
+
+def init(iteration_counts, cancel_flags):
+    """Initialize a worker process with the shared slot arrays."""
+    global _iteration_counts, _cancel_flags
+    _iteration_counts = iteration_counts
+    _cancel_flags = cancel_flags
+
+
+def run(
+    slot: int,
+    supergraph_directory: str,
+    subgraph_directory: str,
+    max_iterations: int,
+    thread_count: int,
+    checkpoint_path: str | None,
+    active_set: bool,
+) -> bytes:
+    """Run the difference algorithm in the given slot, return the encoded result."""
+    iteration_count = ctypes.c_int.from_buffer(
+        _iteration_counts, slot * ctypes.sizeof(ctypes.c_int)
+    )
+    cancel_flag = ctypes.c_bool.from_buffer(
+        _cancel_flags, slot * ctypes.sizeof(ctypes.c_bool)
+    )
+    with diff(
+        supergraph_directory,
+        subgraph_directory,
+        max_iterations,
+        iteration_count,
+        cancel_flag,
+        thread_count,
+        checkpoint_path,
+        active_set,
+    ) as result:
+        return result_store.encode(result, iteration_count.value)
@@ -0,0 +1,290 @@
+"""
+File: backend/app/utils/graph_cache.py
+Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+Description: In-memory copies of imported call graphs for answering method queries without Neo4j.
+"""
+
+import asyncio
+import heapq
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict, deque
+from collections.abc import Iterator
+from concurrent.futures import Future
+
+from ..driver import driver
+from .types import Method, NeighborType
+
+# Number of graphs kept in memory, 0 disables the cache
+GRAPH_CACHE_SIZE = int(os.getenv("GRAPH_CACHE_SIZE", "2"))
+
+logger = logging.getLogger("uvicorn")
+logger.propagate = False
+
+type Neighbor = tuple[int, float | None, bool | None]
+
+
+class GraphStore:
+    """
+    Read-only copy of one call graph.
+
+    Method properties are stored column-wise, indexed by a dense method index.
+    Callees and callers are stored as compressed sparse rows: the neighbors of method
+    `i` are `targets[offsets[i]:offsets[i + 1]]`. Edge values and relevance flags are
+    stored in callee order, callers refer to them through `caller_edges`.
+    """
+
+    def __init__(self, graph_name: str):
+        self.ids: list[str] = []
+        self.index: dict[str, int] = {}
+        self.columns: dict[str, list] = {}
+
+        with driver.session() as session:
+            result = session.run(
+                "MATCH (m:Method {graph: $graph}) RETURN properties(m) AS m",
+                graph=graph_name,
+            )
+            for record in result:
+                self._add_method(record["m"])
+
+            edges: list[tuple[int, int, float | None, bool | None]] = []
+            result = session.run(
+                "MATCH (s:Method {graph: $graph})-[r]->(t) "
+                "RETURN s.id AS s, t.id AS t, r.value AS value, r.relevant AS relevant",
+                graph=graph_name,
+            )
+            for record in result:
+                edges.append(
+                    (
+                        self.index[record["s"]],
+                        self.index[record["t"]],
+                        record["value"],
+                        record["relevant"],
+                    )
+                )
+
+        n = len(self.ids)
+        edges.sort(key=lambda e: e[0])
+        self.callee_offsets = self._offsets((e[0] for e in edges), n)
+        self.targets = array("i", (e[1] for e in edges))
+        self.values = array("d", (math.nan if e[2] is None else e[2] for e in edges))
+        self.relevant = array("b", (-1 if e[3] is None else e[3] for e in edges))
+
+        # Positions of edges sorted by their target
+        by_target = sorted(range(len(edges)), key=lambda k: edges[k][1])
+        self.caller_offsets = self._offsets((edges[k][1] for k in by_target), n)
+        self.sources = array("i", (edges[k][0] for k in by_target))
+        self.caller_edges = array("i", by_target)
+
+        # Same properties as saved to Neo4j
+        self.columns["caller_count"] = [
+            self.caller_offsets[i + 1] - self.caller_offsets[i] for i in range(n)
+        ]
+        self.columns["callee_count"] = [
+            self.callee_offsets[i + 1] - self.callee_offsets[i] for i in range(n)
+        ]
+
+        self._index_entry_paths()
+
+    def _index_entry_paths(self):
+        """Run a breadth-first search from all entry points, store parents and depths."""
+        n = len(self.ids)
+        self.entry_parents = array("i", [-1]) * n
+        self.entry_depths = array("i", [-1]) * n
+
+        queue: deque[int] = deque()
+        for i, is_entry_point in enumerate(self.columns.get("is_entry_point", [])):
+            if is_entry_point:
+                self.entry_depths[i] = 0
+                queue.append(i)
+        while queue:
+            i = queue.popleft()
+            for k in range(self.callee_offsets[i], self.callee_offsets[i + 1]):
+                callee = self.targets[k]
+                if self.entry_depths[callee] == -1:
+                    self.entry_depths[callee] = self.entry_depths[i] + 1
+                    self.entry_parents[callee] = i
+                    queue.append(callee)
+
+        # Same properties as saved to Neo4j
+        self.columns["entry_parent"] = [
+            self.ids[p] if p != -1 else None for p in self.entry_parents
+        ]
+        self.columns["entry_depth"] = [
+            d if d != -1 else None for d in self.entry_depths
+        ]
+
+    def _add_method(self, properties: dict):
+        i = len(self.ids)
+        self.ids.append(properties["id"])
+        self.index[properties["id"]] = i
+        for key, value in properties.items():
+            if isinstance(value, str):
+                value = sys.intern(value)
+            if key not in self.columns:
+                self.columns[key] = [None] * i
+            self.columns[key].append(value)
+        for column in self.columns.values():
+            if len(column) == i:
+                column.append(None)
+
+    @staticmethod
+    def _offsets(sorted_keys: Iterator[int], n: int) -> array:
+        offsets = array("i", bytes(4 * (n + 1)))
+        for key in sorted_keys:
+            offsets[key + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+        return offsets
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def method(self, i: int) -> Method:
+        """Properties of the method with the given index."""
+        return {
+            key: column[i]  # type: ignore
+            for key, column in self.columns.items()
+            if column[i] is not None
+        }
+
+    def entry_path(self, i: int) -> list[int] | None:
+        """Indices of methods on a shortest path from an entry point to the method."""
+        if self.entry_depths[i] == -1:
+            return None
+        path = [i]
+        while self.entry_parents[path[-1]] != -1:
+            path.append(self.entry_parents[path[-1]])
+        return path[::-1]
+
+    def entry_path_rows(self) -> Iterator[dict]:
+        """Parents and depths of reachable methods for saving to Neo4j."""
+        for i, depth in enumerate(self.entry_depths):
+            if depth != -1:
+                parent = self.entry_parents[i]
+                yield {
+                    "id": self.ids[i],
+                    "parent": self.ids[parent] if parent != -1 else None,
+                    "depth": depth,
+                }
+
+    def degree_rows(self) -> Iterator[dict]:
+        """Numbers of callers and callees of methods for saving to Neo4j."""
+        for i, id in enumerate(self.ids):
+            yield {
+                "id": id,
+                "callers": self.columns["caller_count"][i],
+                "callees": self.columns["callee_count"][i],
+            }
+
+    def _edge(self, k: int) -> tuple[float | None, bool | None]:
+        value = self.values[k]
+        relevant = self.relevant[k]
+        return (
+            None if math.isnan(value) else value,
+            None if relevant == -1 else bool(relevant),
+        )
+
+    def callees(self, i: int) -> Iterator[Neighbor]:
+        """Callee indices of a method, with values and relevance of the edges to them."""
+        for k in range(self.callee_offsets[i], self.callee_offsets[i + 1]):
+            yield self.targets[k], *self._edge(k)
+
+    def callers(self, i: int) -> Iterator[Neighbor]:
+        """Caller indices of a method, with values and relevance of the edges from them."""
+        for k in range(self.caller_offsets[i], self.caller_offsets[i + 1]):
+            yield self.sources[k], *self._edge(self.caller_edges[k])
+
+    def neighbor_page(
+        self, i: int, neighbor_type: NeighborType, offset: int, limit: int
+    ) -> list[Neighbor]:
+        """Callers or callees of a method ordered by value of the edge, highest first."""
+        neighbors = self.callers(i) if neighbor_type == "callers" else self.callees(i)
+        return heapq.nsmallest(
+            offset + limit,
+            neighbors,
+            key=lambda n: (-(n[1] or 0), self.ids[n[0]]),
+        )[offset:]
+
+
+_lock = threading.Lock()
+_stores: OrderedDict[str, GraphStore] = OrderedDict()
+_generations: dict[str, int] = {}
+# Graphs being loaded, concurrent misses wait for the first load
+_loading: dict[str, Future[GraphStore]] = {}
+
+
+def get_graph(graph_name: str) -> GraphStore | None:
+    """Get the cached copy of a graph, load it if missing. None if the cache is disabled."""
+    if GRAPH_CACHE_SIZE <= 0:
+        return None
+
+    with _lock:
+        store = _stores.get(graph_name)
+        if store is not None:
+            _stores.move_to_end(graph_name)
+            return store
+        loading = _loading.get(graph_name)
+        if loading is None:
+            future = _loading[graph_name] = Future()
+        generation = _generations.get(graph_name, 0)
+
+    if loading is not None:
+        return loading.result()
+
+    try:
+        started = time.perf_counter()
+        store = GraphStore(graph_name)
+        logger.info(
+            f"Graph {graph_name} cached: {len(store)} methods, "
+            f"{len(store.targets)} edges in {time.perf_counter() - started:.2f} s"
+        )
+    except BaseException as e:
+        with _lock:
+            if _loading.get(graph_name) is future:
+                del _loading[graph_name]
+        future.set_exception(e)
+        raise
+
+    with _lock:
+        if _loading.get(graph_name) is future:
+            del _loading[graph_name]
+        # Do not keep a copy loaded before the graph was invalidated
+        if _generations.get(graph_name, 0) == generation:
+            _stores[graph_name] = store
+            _stores.move_to_end(graph_name)
+            while len(_stores) > GRAPH_CACHE_SIZE:
+                _stores.popitem(last=False)
+    future.set_result(store)
+    return store
+
+
+async def get_graph_async(graph_name: str) -> GraphStore | None:
+    """Like `get_graph`, but a missing graph is loaded in a worker thread."""
+    if GRAPH_CACHE_SIZE <= 0:
+        return None
+
+    with _lock:
+        store = _stores.get(graph_name)
+        if store is not None:
+            _stores.move_to_end(graph_name)
+            return store
+        loading = _loading.get(graph_name)
+    if loading is not None:
+        # Wait without holding a worker thread
+        return await asyncio.wrap_future(loading)
+    return await asyncio.to_thread(get_graph, graph_name)
+
+
+def invalidate(graph_name: str):
+    """Drop the cached copy of a graph after it was changed in Neo4j."""
+    with _lock:
+        _stores.pop(graph_name, None)
+        # Later misses start a new load instead of waiting for the outdated one
+        _loading.pop(graph_name, None)
+        _generations[graph_name] = _generations.get(graph_name, 0) + 1
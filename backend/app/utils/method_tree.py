@@ -0,0 +1,126 @@
+"""
+File: backend/app/utils/method_tree.py
+Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+Description: In-memory index of methods by package and class prefixes, listing children
+             of one node of the method tree at a time.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+
+from ..driver import driver
+from .types import TreeChildren
+
+# Number of graphs whose method tree is kept in memory
+METHOD_TREE_CACHE_SIZE = int(os.getenv("METHOD_TREE_CACHE_SIZE", "8"))
+
+logger = logging.getLogger("uvicorn")
+logger.propagate = False
+
+
+class MethodTree:
+    """
+    Children of every package and class prefix of one graph.
+
+    Children of a prefix are its types with the number of methods below them,
+    followed by its methods, each sorted by name.
+    """
+
+    def __init__(self, methods: Iterable[tuple[str, str, str]]):
+        by_type: dict[str, list[tuple[str, str]]] = {}
+        for id, name, parent_class in methods:
+            by_type.setdefault(parent_class, []).append((name, id))
+
+        # Count methods below each type once per distinct type, not per method
+        counts: dict[str, dict[str, int]] = {}
+        for parent_class, type_methods in by_type.items():
+            prefix = ""
+            for part in parent_class.split("."):
+                children = counts.setdefault(prefix, {})
+                children[part] = children.get(part, 0) + len(type_methods)
+                prefix = f"{prefix}.{part}" if prefix else part
+
+        self.types = {prefix: sorted(c.items()) for prefix, c in counts.items()}
+        self.methods = {prefix: sorted(m) for prefix, m in by_type.items()}
+        self.method_count = sum(len(m) for m in by_type.values())
+
+    def children(self, prefix: str, offset: int, limit: int) -> TreeChildren:
+        """A page of children of the given prefix, the empty prefix being the root."""
+        types = self.types.get(prefix, [])
+        methods = self.methods.get(prefix, [])
+
+        page = types[offset : offset + limit]
+        method_offset = max(0, offset - len(types))
+        method_limit = limit - len(page)
+        return {
+            "types": [{"name": name, "count": count} for name, count in page],
+            "methods": [
+                {"name": name, "id": id}
+                for name, id in methods[method_offset : method_offset + method_limit]
+            ],
+            "total": len(types) + len(methods),
+        }
+
+
+_lock = threading.Lock()
+_trees: OrderedDict[str, MethodTree] = OrderedDict()
+_generations: dict[str, int] = {}
+
+
+def put(graph_name: str, tree: MethodTree, generation: int | None = None):
+    """Keep the tree of a graph, unless the graph changed since the given generation."""
+    with _lock:
+        if generation is not None and _generations.get(graph_name, 0) != generation:
+            return
+        _trees[graph_name] = tree
+        _trees.move_to_end(graph_name)
+        while len(_trees) > METHOD_TREE_CACHE_SIZE:
+            _trees.popitem(last=False)
+
+
+def get_tree(graph_name: str) -> MethodTree:
+    """Get the method tree of a graph, build it from Neo4j if missing."""
+    with _lock:
+        tree = _trees.get(graph_name)
+        if tree is not None:
+            _trees.move_to_end(graph_name)
+            return tree
+        generation = _generations.get(graph_name, 0)
+
+    started = time.perf_counter()
+    with driver.session() as session:
+        result = session.run(
+            "MATCH (m:Method {graph: $graph}) "
+            "RETURN m.id AS id, m.name AS name, m.parent_class AS parent",
+            graph=graph_name,
+        )
+        tree = MethodTree((r["id"], r["name"], r["parent"]) for r in result)
+    logger.info(
+        f"Method tree of {graph_name} indexed: {tree.method_count} methods "
+        f"in {time.perf_counter() - started:.2f} s"
+    )
+
+    put(graph_name, tree, generation)
+    return tree
+
+
+async def get_tree_async(graph_name: str) -> MethodTree:
+    """Like `get_tree`, but a missing tree is built in a worker thread."""
+    with _lock:
+        tree = _trees.get(graph_name)
+        if tree is not None:
+            _trees.move_to_end(graph_name)
+            return tree
+    return await asyncio.to_thread(get_tree, graph_name)
+
+
+def invalidate(graph_name: str):
+    """Drop the tree of a graph after its methods were changed in Neo4j."""
+    with _lock:
+        _trees.pop(graph_name, None)
+        _generations[graph_name] = _generations.get(graph_name, 0) + 1
@@ -0,0 +1,24 @@
+"""
+File: backend/app/utils/responses.py
+Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+Description: Builds responses with graph elements in the format requested by the client.
+"""
+
+import asyncio
+
+from fastapi.responses import ORJSONResponse
+
+from .conversions import payload_to_compact
+from .types import ResponseFormat
+
+
+def compact_response(payload: dict) -> ORJSONResponse:
+    return ORJSONResponse(payload_to_compact(payload))
+
+
+async def respond(payload: dict, format: ResponseFormat):
+    """Return the payload as is, or in the compact format serialized by orjson."""
+    if format == "compact":
+        # Payloads of hub methods would block the event loop for too long
+        return await asyncio.to_thread(compact_response, payload)
+    return payload
@@ -0,0 +1,231 @@
+"""
+File: backend/app/utils/result_store.py
+Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+Description: On-disk store of difference results and checkpoints, keyed by the compared
+             reports and the parameters of the algorithm, so that repeated differences
+             are not recomputed. Differences stopped at their maximum number of
+             iterations or cancelled keep a checkpoint that longer ones continue from,
+             a converged difference removes it.
+"""
+
+import contextlib
+import hashlib
+import logging
+import os
+import struct
+import threading
+import time
+from array import array
+
+from diff_c.diff import ALPHA, EPSILON
+
+RESULT_DIR = os.getenv("RESULT_DIR", "results")
+# Total size of stored results in megabytes, 0 disables the store
+RESULT_STORE_SIZE = int(os.getenv("RESULT_STORE_SIZE", "256"))
+# Age in days after which unused results are deleted
+RESULT_MAX_AGE = float(os.getenv("RESULT_MAX_AGE", "30"))
+
+REPORTS = ["call_tree_methods.csv", "call_tree_invokes.csv", "call_tree_targets.csv"]
+
+MAGIC = b"EDGERSLT"
+# Increase when the layout of the file or the meaning of its fields changes
+VERSION = 1
+# Magic, version, edge count, iteration count, padding to align the values
+HEADER = struct.Struct("<8sIIi4x")
+# Bytes per edge: value, source ID, target ID, and relevance, each in its own column
+EDGE_SIZE = 8 + 4 + 4 + 1
+
+logger = logging.getLogger("uvicorn")
+logger.propagate = False
+
+_lock = threading.Lock()
+# Digests of report directories by their path, valid while sizes and mtimes match
+_digests: dict[str, tuple[list[tuple[int, int]], str]] = {}
+
+
+class StoredResult:
+    """
+    Edges with a non-zero value in a stored result, in the order of the computed result.
+
+    Columns have the same names and types as those of `diff_c.diff.DiffResult`.
+    """
+
+    def __init__(self, data: bytes, iterations: int):
+        self.iterations = iterations
+        count = (len(data) - HEADER.size) // EDGE_SIZE
+        view = memoryview(data)[HEADER.size :]
+        self.values = view[: 8 * count].cast("d")
+        self.source_ids = view[8 * count : 12 * count].cast("i")
+        self.target_ids = view[12 * count : 16 * count].cast("i")
+        self.relevant = view[16 * count : 17 * count].cast("?")
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for view in (self.values, self.source_ids, self.target_ids, self.relevant):
+            view.release()
+
+
+def reports_digest(directory: str) -> str:
+    """SHA-256 of the reports of a graph, recomputed only when they change."""
+    stats = []
+    for filename in REPORTS:
+        st = os.stat(os.path.join(directory, filename))
+        stats.append((st.st_size, st.st_mtime_ns))
+
+    with _lock:
+        cached = _digests.get(directory)
+    if cached is not None and cached[0] == stats:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    for filename in REPORTS:
+        with open(os.path.join(directory, filename), "rb") as f:
+            digest.update(hashlib.file_digest(f, "sha256").digest())
+
+    with _lock:
+        _digests[directory] = (stats, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def result_key(
+    supergraph_directory: str,
+    subgraph_directory: str,
+    max_iterations: int | None,
+    active_set: bool = False,
+) -> str:
+    """
+    Key of the result of a difference with the given inputs and parameters.
+
+    Without a maximum number of iterations, the key is shared by differences
+    of the same graphs, whose checkpoints can continue each other.
+    """
+    parts = [
+        reports_digest(supergraph_directory),
+        reports_digest(subgraph_directory),
+        repr(ALPHA),
+        repr(EPSILON),
+    ]
+    if max_iterations is not None:
+        parts.append(str(max_iterations))
+    if active_set:
+        # Results of the active set differ within epsilon, and it may stop sooner
+        parts.append("active")
+    return hashlib.sha256(":".join(parts).encode()).hexdigest()
+
+
+def entry_path(key: str) -> str:
+    return os.path.join(RESULT_DIR, f"{key}.bin")
+
+
+def checkpoint_path(supergraph_directory: str, subgraph_directory: str) -> str | None:
+    """Path of the checkpoint of a difference of the given graphs, None if disabled."""
+    if RESULT_STORE_SIZE <= 0:
+        return None
+    os.makedirs(RESULT_DIR, exist_ok=True)
+    key = result_key(supergraph_directory, subgraph_directory, None)
+    return os.path.join(RESULT_DIR, f"{key}.ckpt")
+
+
+def remove_checkpoint(path: str | None):
+    """Delete a checkpoint, so that the next difference starts from zero."""
+    if path is not None:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+
+
+def encode(result, iterations: int) -> bytes:
+    """Edges of a result with a non-zero value, in the format of stored results."""
+    positions = [k for k, value in enumerate(result.values) if value != 0]
+    return b"".join(
+        (
+            HEADER.pack(MAGIC, VERSION, len(positions), iterations),
+            array("d", (result.values[k] for k in positions)).tobytes(),
+            array("i", (result.source_ids[k] for k in positions)).tobytes(),
+            array("i", (result.target_ids[k] for k in positions)).tobytes(),
+            bytes(result.relevant[k] for k in positions),
+        )
+    )
+
+
+def decode(data: bytes) -> StoredResult | None:
+    """Result in the format of stored results, None if the data is not valid."""
+    if len(data) < HEADER.size:
+        return None
+    magic, version, edge_count, iterations = HEADER.unpack_from(data)
+    if (
+        magic != MAGIC
+        or version != VERSION
+        or len(data) != HEADER.size + EDGE_SIZE * edge_count
+    ):
+        return None
+    return StoredResult(data, iterations)
+
+
+def get(key: str) -> StoredResult | None:
+    """Stored result with the given key, None if there is none."""
+    if RESULT_STORE_SIZE <= 0:
+        return None
+
+    path = entry_path(key)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        # Recently used results are evicted last
+        os.utime(path)
+    except OSError:
+        return None
+
+    result = decode(data)
+    if result is None:
+        logger.warning(f"Discarding invalid stored result {path}")
+        with contextlib.suppress(OSError):
+            os.remove(path)
+    return result
+
+
+def put(key: str, data: bytes):
+    """Store an encoded result, then evict old results."""
+    if RESULT_STORE_SIZE <= 0:
+        return
+
+    os.makedirs(RESULT_DIR, exist_ok=True)
+    path = entry_path(key)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Cannot store result {path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
+
+    evict()
+
+
+def evict():
+    """Delete results unused for too long, then the least recently used over the limit."""
+    entries = []
+    for entry in os.scandir(RESULT_DIR):
+        if entry.name.endswith((".bin", ".ckpt")):
+            st = entry.stat()
+            entries.append((st.st_mtime, st.st_size, entry.path))
+    entries.sort()
+
+    total_size = sum(size for _, size, _ in entries)
+    oldest_allowed = time.time() - RESULT_MAX_AGE * 86400
+    for mtime, size, path in entries:
+        if mtime >= oldest_allowed and total_size <= RESULT_STORE_SIZE * 2**20:
+            break
+        with contextlib.suppress(OSError):
+            os.remove(path)
+            total_size -= size
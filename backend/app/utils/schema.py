@@ -0,0 +1,24 @@
+"""
+File: backend/app/utils/schema.py
+Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+Description: Uniqueness constraints and indexes of the graph database.
+"""
+
+SCHEMA_QUERIES = [
+    "CREATE CONSTRAINT unique_method_id IF NOT EXISTS "
+    "FOR (m:Method) REQUIRE (m.id, m.graph) IS UNIQUE",
+    "CREATE CONSTRAINT unique_invoke_id IF NOT EXISTS "
+    "FOR (i:Invoke) REQUIRE (i.id, i.graph) IS UNIQUE",
+    "CREATE INDEX method_id IF NOT EXISTS FOR (m:Method) ON m.id",
+    "CREATE INDEX invoke_id IF NOT EXISTS FOR (i:Invoke) ON i.id",
+    "CREATE INDEX method_graph IF NOT EXISTS FOR (m:Method) ON m.graph",
+    "CREATE INDEX invoke_graph IF NOT EXISTS FOR (i:Invoke) ON i.graph",
+    # Top edges of a difference by their stored rank
+    "CREATE INDEX calls_rank IF NOT EXISTS FOR ()-[r:CALLS]-() ON (r.rank)",
+    # Method search, the simple analyzer splits qualified names at dots. The graph is
+    # indexed to skip hits of other graphs, the index without it is replaced.
+    "DROP INDEX method_search IF EXISTS",
+    "CREATE FULLTEXT INDEX method_graph_search IF NOT EXISTS "
+    "FOR (m:Method) ON EACH [m.graph, m.name, m.parent_class, m.parameters, m.display] "
+    "OPTIONS {indexConfig: {`fulltext.analyzer`: 'simple'}}",
+]
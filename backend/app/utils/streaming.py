@@ -0,0 +1,35 @@
+"""
+File: backend/app/utils/streaming.py
+Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+Description: Utility functions for processing CSV reports in bounded-size chunks.
+"""
+
+from array import array
+from collections.abc import Iterable, Iterator
+from itertools import islice, repeat
+
+CHUNK_SIZE = 10000
+
+
+def iter_chunks[T](rows: Iterable[T], size: int = CHUNK_SIZE) -> Iterator[list[T]]:
+    """Split an iterable into lists of at most `size` items."""
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def invoke_method_ids(rows: Iterable[dict[str, str]]) -> tuple[array, int]:
+    """
+    Map invoke IDs to IDs of their calling methods, using 4 bytes per invoke.
+
+    Return the mapping indexed by invoke ID and the number of parsed rows.
+    """
+    method_ids = array("i")
+    count = 0
+    for row in rows:
+        invoke_id = int(row["Id"])
+        if invoke_id >= len(method_ids):
+            method_ids.extend(repeat(-1, invoke_id + 1 - len(method_ids)))
+        method_ids[invoke_id] = int(row["MethodId"])
+        count += 1
+    return method_ids, count
@@ -86,9 +86,27 @@ class CytoscapeEdge(TypedDict):
     data: CytoscapeEdgeData
 
 
+class TreeType(TypedDict):
+    name: str
+    count: int
+
+
+class TreeMethod(TypedDict):
+    name: str
+    id: str
+
+
+class TreeChildren(TypedDict):
+    types: list[TreeType]
+    methods: list[TreeMethod]
+    total: int
+
+
 type CytoscapeNode = CytoscapeCompoundNode | CytoscapeMethodNode
 type CytoscapeElement = CytoscapeNode | CytoscapeEdge
 
 
 type NeighborType = Literal["callers"] | Literal["callees"]
-type Tree = dict[str, Tree | str]
+
+# Cytoscape.js definitions, or each method and compound node once referenced by index
+ResponseFormat = Literal["cytoscape", "compact"]
@@ -0,0 +1,96 @@
+"""
+File: backend/benchmarks/api_latency.py
+Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+Description: Measures latency percentiles of API endpoints of a running backend
+             with different numbers of concurrent clients.
+"""
+
+import asyncio
+import math
+import statistics
+import sys
+import time
+from collections import Counter
+
+import httpx
+
+# Numbers of clients sending requests at the same time
+CONCURRENCY = (1, 10, 50, 100, 200, 400)
+# Requests sent at each level of concurrency, spread over the given paths
+REQUESTS = 2000
+
+
+async def client(
+    base_url: str,
+    paths: list[str],
+    queue: asyncio.Queue,
+    latencies: list[float],
+    errors: list[str],
+):
+    """Send requests one after another until the queue is empty."""
+    # A pool shared by all clients costs more CPU per request than the server
+    limits = httpx.Limits(max_connections=1)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as http:
+        # Open the connection before measuring
+        try:
+            await http.get(paths[0])
+        except httpx.HTTPError:
+            pass
+
+        while not queue.empty():
+            k = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                response = await http.get(paths[k % len(paths)])
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                errors.append(type(e).__name__)
+                continue
+            latencies.append(time.perf_counter() - started)
+
+
+async def measure(
+    base_url: str, paths: list[str], concurrency: int
+) -> tuple[list[float], list[str], float]:
+    """Latencies of successful requests, failed requests, and the total time."""
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for k in range(REQUESTS):
+        queue.put_nowait(k)
+    latencies: list[float] = []
+    errors: list[str] = []
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(client(base_url, paths, queue, latencies, errors) for _ in range(concurrency))
+    )
+    return latencies, errors, time.perf_counter() - started
+
+
+def percentile(latencies: list[float], p: int) -> float:
+    """Latency at the given percentile, NaN with fewer than two successful requests."""
+    if len(latencies) < 2:
+        return math.nan
+    return statistics.quantiles(latencies, n=100, method="inclusive")[p - 1]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(
+            "Usage: python api_latency.py BASE_URL PATH...\n"
+            "Example: python api_latency.py http://localhost:3001 /graphs "
+            "/graphs/app/method/42/callers",
+            file=sys.stderr,
+        )
+        exit(1)
+
+    base_url, paths = sys.argv[1], sys.argv[2:]
+    print(f"{REQUESTS} requests to {len(paths)} paths at each level")
+    for concurrency in CONCURRENCY:
+        latencies, errors, elapsed = asyncio.run(measure(base_url, paths, concurrency))
+        if errors:
+            print(f"  {concurrency:>4} clients: {Counter(errors)}")
+        print(
+            f"  {concurrency:>4} clients: p50 {percentile(latencies, 50) * 1000:8.1f} ms, "
+            f"p99 {percentile(latencies, 99) * 1000:8.1f} ms, "
+            f"{len(latencies) / elapsed:7.0f} requests/s, {len(errors)} failed"
+        )
@@ -0,0 +1,56 @@
+"""
+File: backend/benchmarks/load_time.py
+Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+Description: Measures the time of loading call graphs from CSV reports in both engines,
+             without and with a snapshot of the parsed graph.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path[:0] = [BACKEND, os.path.join(BACKEND, "diff_py")]
+
+import snapshot  # noqa: E402
+from call_graph import CallGraph  # noqa: E402
+
+
+def load_python(directory: str) -> tuple[float, int]:
+    started = time.perf_counter()
+    cg = CallGraph(directory, "Graph")
+    return time.perf_counter() - started, cg.reachable_count
+
+
+def load_c(directory: str) -> tuple[float, int]:
+    from diff_c.diff import diff_lib
+
+    started = time.perf_counter()
+    cg = diff_lib.call_graph_create(directory.encode(), b"Graph")
+    elapsed = time.perf_counter() - started
+    reachable_count = cg.contents.reachable_count
+    diff_lib.call_graph_destroy(cg)
+    return elapsed, reachable_count
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python load_time.py REPORT_DIR...", file=sys.stderr)
+        exit(1)
+
+    for directory in map(os.path.abspath, sys.argv[1:]):
+        print(directory)
+        snapshot_path = os.path.join(directory, snapshot.FILENAME)
+        for engine, load in [("diff_py", load_python), ("libdiff", load_c)]:
+            if os.path.exists(snapshot_path):
+                os.remove(snapshot_path)
+            for run in ("parsed", "snapshot"):
+                try:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        elapsed, reachable_count = load(directory)
+                except OSError as e:
+                    print(f"  {engine}: unavailable ({e})")
+                    break
+                print(f"  {engine} {run}: {elapsed:.3f} s, {reachable_count} reachable")
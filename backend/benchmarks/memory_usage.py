@@ -0,0 +1,89 @@
+"""
+File: backend/benchmarks/memory_usage.py
+Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+Description: Measures the resident memory of both engines after loading
+             a supergraph and a subgraph for a difference.
+"""
+
+import contextlib
+import io
+import os
+import resource
+import subprocess
+import sys
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path[:0] = [BACKEND, os.path.join(BACKEND, "diff_py")]
+
+import snapshot  # noqa: E402
+
+ENGINES = ("diff_py", "libdiff")
+
+
+def resident_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def peak_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+
+
+def load_graphs(engine: str, sup_dir: str, sub_dir: str) -> list:
+    """Load both graphs in this process, report the resident and peak memory."""
+    baseline = resident_mb()
+    if engine == "diff_py":
+        from call_graph import CallGraph
+        from string_pool import StringPool
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            pool = StringPool()
+            graphs = [
+                CallGraph(sup_dir, "Supergraph", pool),
+                CallGraph(sub_dir, "Subgraph", pool),
+            ]
+    else:
+        from diff_c.diff import diff_lib
+
+        graphs = [
+            diff_lib.call_graph_create(sup_dir.encode(), b"Supergraph"),
+            diff_lib.call_graph_create(sub_dir.encode(), b"Subgraph"),
+        ]
+
+    # Output of libdiff goes to stdout, which is discarded by the parent process
+    print(f"{resident_mb() - baseline:.1f} {peak_mb() - baseline:.1f}", file=sys.stderr)
+    return graphs
+
+
+def measure(engine: str, sup_dir: str, sub_dir: str) -> tuple[float, float]:
+    """Resident and peak memory of loading the graphs in a fresh process, in MB."""
+    output = subprocess.run(
+        [sys.executable, __file__, "--engine", engine, sup_dir, sub_dir],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr.split()
+    return float(output[0]), float(output[1])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 5 and sys.argv[1] == "--engine":
+        load_graphs(sys.argv[2], sys.argv[3], sys.argv[4])
+        exit()
+
+    if len(sys.argv) < 3:
+        print("Usage: python memory_usage.py SUP_DIR SUB_DIR", file=sys.stderr)
+        exit(1)
+
+    sup_dir, sub_dir = map(os.path.abspath, sys.argv[1:3])
+    for engine in ENGINES:
+        for directory in (sup_dir, sub_dir):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(directory, snapshot.FILENAME))
+        for run in ("parsed", "snapshot"):
+            try:
+                resident, peak = measure(engine, sup_dir, sub_dir)
+            except subprocess.CalledProcessError as e:
+                print(f"{engine}: unavailable ({e.stderr.strip().splitlines()[-1]})")
+                break
+            print(f"{engine} {run}: {resident:.1f} MB resident, {peak:.1f} MB peak")
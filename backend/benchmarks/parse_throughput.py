@@ -0,0 +1,74 @@
+"""
+File: backend/benchmarks/parse_throughput.py
+Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+Description: Measures the throughput of the libdiff CSV parser on each report file.
+"""
+
+import ctypes
+import os
+import sys
+import time
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND)
+
+from benchmarks.thread_scaling import silenced  # noqa: E402
+from diff_c.diff import diff_lib  # noqa: E402
+
+REPORTS = [
+    ("call_tree_methods.csv", 8),
+    ("call_tree_invokes.csv", 5),
+    ("call_tree_targets.csv", 2),
+]
+
+
+class CsvTable(ctypes.Structure):
+    _fields_ = [
+        ("field_count", ctypes.c_int),
+        ("row_count", ctypes.c_int),
+        ("fields", ctypes.POINTER(ctypes.c_char_p)),
+        ("data", ctypes.c_void_p),
+        ("size", ctypes.c_size_t),
+    ]
+
+
+diff_lib.csv_read.argtypes = (ctypes.c_char_p, ctypes.c_int, ctypes.POINTER(CsvTable))
+diff_lib.csv_read.restype = ctypes.c_bool
+diff_lib.csv_table_free.argtypes = (ctypes.POINTER(CsvTable),)
+
+
+def parse(path: str, field_count: int) -> tuple[float, int]:
+    """Parse a report, return the time and number of rows."""
+    table = CsvTable()
+    with silenced():
+        started = time.perf_counter()
+        ok = diff_lib.csv_read(path.encode(), field_count, ctypes.byref(table))
+        elapsed = time.perf_counter() - started
+    row_count = table.row_count
+    if not ok:
+        raise OSError(f"cannot read {path}")
+    diff_lib.csv_table_free(ctypes.byref(table))
+    return elapsed, row_count
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python parse_throughput.py REPORT_DIR...", file=sys.stderr)
+        exit(1)
+
+    print(f"{os.cpu_count()} CPUs available")
+    for directory in map(os.path.abspath, sys.argv[1:]):
+        print(directory)
+        total_size = 0
+        total_time = 0.0
+        for filename, field_count in REPORTS:
+            path = os.path.join(directory, filename)
+            size = os.path.getsize(path)
+            elapsed, row_count = parse(path, field_count)
+            total_size += size
+            total_time += elapsed
+            print(
+                f"  {filename}: {size / 1e6:.1f} MB, {row_count} rows, "
+                f"{size / 1e6 / elapsed:.0f} MB/s"
+            )
+        print(f"  all reports: {total_size / 1e6 / total_time:.0f} MB/s")
@@ -0,0 +1,126 @@
+"""
+File: backend/benchmarks/synthetic.py
+Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+Description: Generates synthetic CSV reports for benchmarking the difference algorithm.
+"""
+
+import csv
+import os
+import random
+import sys
+
+METHODS_HEADER = [
+    "Id",
+    "Name",
+    "Type",
+    "Parameters",
+    "Return",
+    "Display",
+    "Flags",
+    "IsEntryPoint",
+]
+INVOKES_HEADER = ["Id", "MethodId", "BytecodeIndexes", "TargetId", "IsDirect"]
+TARGETS_HEADER = ["InvokeId", "TargetId"]
+
+type Report = tuple[list[list], list[list], list[list]]
+
+
+def write_report(directory: str, report: Report):
+    os.makedirs(directory, exist_ok=True)
+    methods, invokes, targets = report
+    for name, header, rows in [
+        ("methods", METHODS_HEADER, methods),
+        ("invokes", INVOKES_HEADER, invokes),
+        ("targets", TARGETS_HEADER, targets),
+    ]:
+        path = os.path.join(directory, f"call_tree_{name}.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(header)
+            writer.writerows(rows)
+
+
+def method_row(id: int, params: str = "empty", flags: str = "", entry=False) -> list:
+    package = f"com.example.p{id % 50}.s{id % 7}"
+    return [
+        id,
+        f"m{id}",
+        f"{package}.C{id % 400}",
+        params,
+        "void",
+        f"C{id % 400}.m{id}",
+        flags,
+        "true" if entry else "false",
+    ]
+
+
+def chain(n: int) -> Report:
+    """A single path from one entry point, with invokes listed from the deepest."""
+    methods = [method_row(id, entry=id == 0) for id in range(n)]
+    invokes = [[k, n - 2 - k, "1", n - 1 - k, "true"] for k in range(n - 1)]
+    targets = [[id, target] for id, _, _, target, _ in invokes]
+    return methods, invokes, targets
+
+
+def random_graph(n: int, seed: int = 1, fanout: int = 4) -> Report:
+    """Random call graph with a few entry points and occasional virtual calls."""
+    rnd = random.Random(seed)
+    methods = [
+        method_row(
+            id,
+            rnd.choice(["empty", "int", "java.lang.String int", "long"]),
+            rnd.choice(["", "s", "i"]),
+            id < 5,
+        )
+        for id in range(n)
+    ]
+    invokes: list[list] = []
+    targets: list[list] = []
+    for id in range(n):
+        for _ in range(rnd.randint(1, fanout)):
+            invoke_id = len(invokes)
+            target = rnd.randrange(n)
+            is_direct = rnd.random() < 0.7
+            invokes.append([invoke_id, id, "1", target, str(is_direct).lower()])
+            targets.append([invoke_id, target])
+            if not is_direct:
+                targets.append([invoke_id, rnd.randrange(n)])
+    return methods, invokes, targets
+
+
+def subgraph(report: Report, drop: float = 0.05, seed: int = 2) -> Report:
+    """Remove a fraction of non-entry methods with their invokes, renumbering IDs."""
+    methods, invokes, targets = report
+    rnd = random.Random(seed)
+    kept = [m for m in methods if m[7] == "true" or rnd.random() >= drop]
+    method_ids = {m[0]: new_id for new_id, m in enumerate(kept)}
+    kept_invokes = [
+        i for i in invokes if i[1] in method_ids and i[3] in method_ids
+    ]
+    invoke_ids = {i[0]: new_id for new_id, i in enumerate(kept_invokes)}
+    return (
+        [[method_ids[m[0]], *m[1:]] for m in kept],
+        [
+            [invoke_ids[i[0]], method_ids[i[1]], i[2], method_ids[i[3]], i[4]]
+            for i in kept_invokes
+        ],
+        [
+            [invoke_ids[t[0]], method_ids[t[1]]]
+            for t in targets
+            if t[0] in invoke_ids and t[1] in method_ids
+        ],
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4 or sys.argv[1] not in ("chain", "pair"):
+        print("Usage: python synthetic.py chain|pair METHOD_COUNT DIR", file=sys.stderr)
+        exit(1)
+
+    n = int(sys.argv[2])
+    if sys.argv[1] == "chain":
+        write_report(sys.argv[3], chain(n))
+    else:
+        sup = random_graph(n)
+        write_report(os.path.join(sys.argv[3], "sup"), sup)
+        write_report(os.path.join(sys.argv[3], "sub"), subgraph(sup))
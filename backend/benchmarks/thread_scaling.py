@@ -0,0 +1,97 @@
+"""
+File: backend/benchmarks/thread_scaling.py
+Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+Description: Measures the iteration speed of libdiff with different numbers of threads.
+"""
+
+import contextlib
+import ctypes
+import os
+import sys
+import time
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND)
+
+from diff_c.diff import CallGraph, diff_lib  # noqa: E402
+
+diff_lib.diff.argtypes = (
+    ctypes.POINTER(CallGraph),
+    ctypes.POINTER(CallGraph),
+    ctypes.c_int,
+    ctypes.c_int,
+    ctypes.c_bool,
+    ctypes.c_char_p,
+    ctypes.POINTER(ctypes.c_int),
+    ctypes.POINTER(ctypes.c_bool),
+)
+
+
+@contextlib.contextmanager
+def silenced():
+    """Discard output of the C library, which bypasses sys.stdout."""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with open(os.devnull, "w") as devnull:
+        os.dup2(devnull.fileno(), 1)
+    try:
+        yield
+    finally:
+        os.dup2(saved, 1)
+        os.close(saved)
+
+
+def run(sup_dir: str, sub_dir: str, iterations: int, threads: int) -> tuple[float, int]:
+    """Run the algorithm on freshly loaded graphs, return the time and iteration count."""
+    with silenced():
+        sup = diff_lib.call_graph_create(sup_dir.encode(), b"Supergraph")
+        sub = diff_lib.call_graph_create(sub_dir.encode(), b"Subgraph")
+    sup.contents.other_graph = sub
+    sub.contents.other_graph = sup
+
+    iteration_count = ctypes.c_int(0)
+    cancel_flag = ctypes.c_bool(False)
+    with silenced():
+        started = time.perf_counter()
+        diff_lib.diff(
+            sup,
+            sub,
+            iterations,
+            threads,
+            False,
+            None,
+            ctypes.byref(iteration_count),
+            ctypes.byref(cancel_flag),
+        )
+        elapsed = time.perf_counter() - started
+
+    diff_lib.call_graph_destroy(sub)
+    diff_lib.call_graph_destroy(sup)
+    return elapsed, iteration_count.value
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(
+            "Usage: python thread_scaling.py DIR1 DIR2 [iterations] [threads,...]",
+            file=sys.stderr,
+        )
+        exit(1)
+
+    sup_dir, sub_dir = map(os.path.abspath, sys.argv[1:3])
+    iterations = int(sys.argv[3]) if len(sys.argv) >= 4 else 1000
+    thread_counts = (
+        [int(t) for t in sys.argv[4].split(",")]
+        if len(sys.argv) >= 5
+        else [1, 2, 4, 8]
+    )
+
+    print(f"{os.cpu_count()} CPUs available")
+    baseline = None
+    for threads in thread_counts:
+        elapsed, count = run(sup_dir, sub_dir, iterations, threads)
+        baseline = baseline or elapsed
+        print(
+            f"  {threads} threads: {elapsed:.3f} s, {count / elapsed:.0f} iterations/s, "
+            f"speedup {baseline / elapsed:.2f}x"
+        )
@@ -0,0 +1,214 @@
+"""
+File: backend/bulk_import.py
+Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+Description: Converts directories of CSV reports to input files of the Neo4j offline bulk importer.
+"""
+
+import csv
+import os
+import shutil
+import sys
+import time
+from collections import deque
+
+from app.utils.conversions import method_from_csv
+from app.utils.schema import SCHEMA_QUERIES
+from app.utils.streaming import invoke_method_ids
+
+KEYS = ["methods", "invokes", "targets"]
+
+METHOD_HEADER = [
+    "id:ID({graph})",
+    "graph",
+    "name",
+    "parent_class",
+    "parameters:string[]",
+    "return_type",
+    "display",
+    "flags",
+    "is_entry_point:boolean",
+    "entry_parent",
+    "entry_depth:int",
+]
+CALLS_HEADER = [":START_ID({graph})", ":END_ID({graph})"]
+
+# The bulk importer cannot represent empty arrays, restore them after the import
+POST_IMPORT_QUERIES = [
+    *SCHEMA_QUERIES,
+    "MATCH (m:Method) WHERE m.parameters IS NULL SET m.parameters = []",
+    # Empty strings are imported as values, entry points have no parent
+    "MATCH (m:Method) WHERE m.entry_parent = '' REMOVE m.entry_parent",
+    # Numbers of neighbors, as saved by the API import
+    "MATCH (m:Method) CALL (m) { "
+    "SET m.caller_count = COUNT { ()-[:CALLS]->(m) }, "
+    "m.callee_count = COUNT { (m)-[:CALLS]->() } "
+    "} IN TRANSACTIONS OF 10000 ROWS",
+]
+
+
+def find_reports(directory: str) -> dict[str, str]:
+    """Find the most recent report file of each kind in the directory."""
+    newest: dict[str, str] = {}
+    for filename in os.listdir(directory):
+        path = os.path.join(directory, filename)
+        for key in KEYS:
+            if key not in filename or ".csv" not in filename:
+                continue
+            if key not in newest or os.path.getmtime(path) > os.path.getmtime(
+                newest[key]
+            ):
+                newest[key] = path
+    return newest
+
+
+def read_entry_points(report: str) -> list[int]:
+    """Read IDs of entry points from a methods report."""
+    with open(report, newline="") as f:
+        return [
+            int(row["Id"]) for row in csv.DictReader(f) if row["IsEntryPoint"] == "true"
+        ]
+
+
+def entry_paths(
+    entry_points: list[int], callees: dict[int, list[int]]
+) -> dict[int, tuple[int | None, int]]:
+    """
+    Run a breadth-first search from all entry points, as the graph cache does for
+    the API import, return parents and depths of reachable methods.
+    """
+    paths: dict[int, tuple[int | None, int]] = {}
+    queue: deque[int] = deque()
+    for i in entry_points:
+        if i not in paths:
+            paths[i] = (None, 0)
+            queue.append(i)
+    while queue:
+        i = queue.popleft()
+        depth = paths[i][1] + 1
+        for callee in callees.get(i, []):
+            if callee not in paths:
+                paths[callee] = (i, depth)
+                queue.append(callee)
+    return paths
+
+
+def convert_methods(
+    report: str, output: str, graph: str, paths: dict[int, tuple[int | None, int]]
+) -> int:
+    """Write method nodes of one graph with their entry paths, return their count."""
+    count = 0
+    with open(report, newline="") as src, open(output, "w", newline="") as dst:
+        writer = csv.writer(dst)
+        writer.writerow(h.format(graph=graph) for h in METHOD_HEADER)
+        for row in csv.DictReader(src):
+            m = method_from_csv(row)
+            parent, depth = paths.get(int(m["id"]), (None, None))
+            writer.writerow(
+                [
+                    m["id"],
+                    graph,
+                    m["name"],
+                    m["parent_class"],
+                    ";".join(m["parameters"]),
+                    m["return_type"],
+                    m["display"],
+                    m["flags"],
+                    "true" if m["is_entry_point"] else "false",
+                    "" if parent is None else parent,
+                    "" if depth is None else depth,
+                ]
+            )
+            count += 1
+    return count
+
+
+def convert_calls(
+    invokes: str, targets: str, output: str, graph: str
+) -> dict[int, list[int]]:
+    """Write deduplicated CALLS relationships of one graph, return callees of methods."""
+    with open(invokes, newline="") as f:
+        callers, _ = invoke_method_ids(csv.DictReader(f))
+
+    seen: set[int] = set()
+    callees: dict[int, list[int]] = {}
+    with open(targets, newline="") as src, open(output, "w", newline="") as dst:
+        writer = csv.writer(dst)
+        writer.writerow(h.format(graph=graph) for h in CALLS_HEADER)
+        for row in csv.DictReader(src):
+            source_id = callers[int(row["InvokeId"])]
+            target_id = int(row["TargetId"])
+            key = source_id << 32 | target_id
+            if key in seen:
+                continue
+            seen.add(key)
+            writer.writerow([source_id, target_id])
+            callees.setdefault(source_id, []).append(target_id)
+    return callees
+
+
+def convert(reports_directory: str, output_directory: str, csv_directory: str):
+    os.makedirs(output_directory, exist_ok=True)
+    nodes: list[str] = []
+    relationships: list[str] = []
+
+    for graph in sorted(os.listdir(reports_directory)):
+        directory = os.path.join(reports_directory, graph)
+        if not os.path.isdir(directory):
+            continue
+        reports = find_reports(directory)
+        if any(key not in reports for key in KEYS):
+            print(f"Skipping {directory}: missing report files", file=sys.stderr)
+            continue
+
+        started = time.perf_counter()
+        methods_file = os.path.join(output_directory, f"methods_{graph}.csv")
+        calls_file = os.path.join(output_directory, f"calls_{graph}.csv")
+        callees = convert_calls(
+            reports["invokes"], reports["targets"], calls_file, graph
+        )
+        edge_count = sum(len(targets) for targets in callees.values())
+        # Same entry paths as written after the API import
+        paths = entry_paths(read_entry_points(reports["methods"]), callees)
+        node_count = convert_methods(reports["methods"], methods_file, graph, paths)
+        nodes.append(methods_file)
+        relationships.append(calls_file)
+
+        # The difference algorithm reads the original reports
+        location = os.path.join(csv_directory, graph)
+        os.makedirs(location, exist_ok=True)
+        for key in KEYS:
+            shutil.copyfile(
+                reports[key], os.path.join(location, f"call_tree_{key}.csv")
+            )
+
+        elapsed = time.perf_counter() - started
+        print(
+            f"{graph}: {node_count} nodes and {edge_count} edges "
+            f"converted in {elapsed:.2f} s"
+        )
+
+    post_import = os.path.join(output_directory, "post_import.cypher")
+    with open(post_import, "w") as f:
+        f.writelines(f"{query};\n" for query in POST_IMPORT_QUERIES)
+
+    print("\nImport into a fresh, stopped database with:")
+    print(
+        "  neo4j-admin database import full "
+        + " ".join(f"--nodes=Method={path}" for path in nodes)
+        + " "
+        + " ".join(f"--relationships=CALLS={path}" for path in relationships)
+        + " --overwrite-destination neo4j"
+    )
+    print("Then start the database and run:")
+    print(f"  cypher-shell -f {post_import}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(
+            "Usage: python bulk_import.py REPORTS_DIR OUTPUT_DIR [csv_dir]",
+            file=sys.stderr,
+        )
+        exit(1)
+
+    convert(sys.argv[1], sys.argv[2], sys.argv[3] if len(sys.argv) >= 4 else "csv")
@@ -0,0 +1,226 @@
+/**
+ * File: backend/app/diff_c/active.c
+ * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+ * Description: Implements an active set of edges of a compact graph, and running iterations
+ *              of the difference algorithm only on edges whose methods changed.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+#include "active.h"
+
+active_set_t* active_set_create(compact_graph_t* compact)
+{
+    active_set_t* active = malloc(sizeof(active_set_t));
+    if (active == NULL) {
+        return NULL;
+    }
+
+    // Count edges of each method, then fill them in ascending order of position
+    active->offsets = calloc(compact->method_count + 1, sizeof(int));
+    for (int k = 0; k < compact->edge_count; k++) {
+        if (compact->sources[k] != -1) {
+            active->offsets[compact->sources[k] + 1]++;
+        }
+        if (compact->targets[k] != -1) {
+            active->offsets[compact->targets[k] + 1]++;
+        }
+    }
+    for (int m = 0; m < compact->method_count; m++) {
+        active->offsets[m + 1] += active->offsets[m];
+    }
+
+    active->edges = malloc(active->offsets[compact->method_count] * sizeof(int));
+    int* cursor = malloc(compact->method_count * sizeof(int));
+    memcpy(cursor, active->offsets, compact->method_count * sizeof(int));
+    for (int k = 0; k < compact->edge_count; k++) {
+        if (compact->sources[k] != -1) {
+            active->edges[cursor[compact->sources[k]]++] = k;
+        }
+        if (compact->targets[k] != -1) {
+            active->edges[cursor[compact->targets[k]]++] = k;
+        }
+    }
+    free(cursor);
+
+    // All edges are active at first, the first iteration is dense and ignores the bitmap
+    active->word_count = (compact->edge_count + 63) / 64;
+    active->current = calloc(active->word_count, sizeof(uint64_t));
+    active->next = calloc(active->word_count, sizeof(uint64_t));
+    active->count = compact->edge_count;
+    active->next_count = 0;
+
+    active->method_word_count = (compact->method_count + 63) / 64;
+    active->changed = calloc(active->method_word_count, sizeof(uint64_t));
+    active->last_change = malloc(compact->method_count * sizeof(int));
+    active->activated = calloc(compact->method_count, sizeof(int));
+    active->iteration = 1;
+
+    return active;
+}
+
+void active_set_destroy(active_set_t* active)
+{
+    free(active->offsets);
+    free(active->edges);
+    free(active->current);
+    free(active->next);
+    free(active->changed);
+    free(active->last_change);
+    free(active->activated);
+    free(active);
+}
+
+/// Record a change of a method by the edge at the given position
+static inline void method_changed(active_set_t* active, int method, int position, bool dense)
+{
+    // All edges are processed in a dense iteration, later ones need not be activated
+    if (!dense && active->activated[method] != active->iteration) {
+        active->activated[method] = active->iteration;
+        for (int e = active->offsets[method + 1] - 1; e >= active->offsets[method]; e--) {
+            int k = active->edges[e];
+            if (k <= position) {
+                break;
+            }
+            if (!(active->current[k / 64] & 1ULL << k % 64)) {
+                active->current[k / 64] |= 1ULL << k % 64;
+                active->count++;
+            }
+        }
+    }
+
+    active->last_change[method] = position;
+    active->changed[method / 64] |= 1ULL << method % 64;
+}
+
+/// Process the edge at the given position, update the maximum level seen
+static inline void process_edge(compact_graph_t* compact, active_set_t* active, int k, double* max,
+                                bool dense)
+{
+    double* levels = compact->levels;
+    int source = compact->sources[k];
+    int target = compact->targets[k];
+    double l2 = target != -1 ? levels[target] : 0;
+    double l1 = source != -1 ? levels[source] : 0;
+
+    if (l2 > *max) {
+        *max = l2;
+    }
+    if (l1 > *max) {
+        *max = l1;
+    }
+
+    double diff = ALPHA * (l2 - l1);
+
+    if (diff > 0) {
+        compact->values[k] += diff;
+        if (target != -1) {
+            levels[target] -= diff;
+        }
+        if (source != -1) {
+            levels[source] += diff;
+        }
+
+        if (diff > ACTIVE_THRESHOLD) {
+            if (target != -1) {
+                method_changed(active, target, k, dense);
+            }
+            if (source != -1) {
+                method_changed(active, source, k, dense);
+            }
+        }
+    }
+}
+
+/// Activate edges of changed methods up to their last change for the next iteration
+void activate_next(active_set_t* active)
+{
+    for (int w = 0; w < active->method_word_count; w++) {
+        while (active->changed[w] != 0) {
+            int m = w * 64 + __builtin_ctzll(active->changed[w]);
+            active->changed[w] &= active->changed[w] - 1;
+
+            for (int e = active->offsets[m]; e < active->offsets[m + 1]; e++) {
+                int k = active->edges[e];
+                if (k > active->last_change[m]) {
+                    break;
+                }
+                if (!(active->next[k / 64] & 1ULL << k % 64)) {
+                    active->next[k / 64] |= 1ULL << k % 64;
+                    active->next_count++;
+                }
+            }
+        }
+    }
+}
+
+/**
+ * Process active edges in order of position, update the maximum level seen,
+ * and return the number of processed edges.
+ *
+ * Scattered edges are much slower to process than consecutive ones,
+ * so if many edges are active, all of them are processed.
+ */
+int active_process(compact_graph_t* compact, active_set_t* active, double* max)
+{
+    double local_max = *max;
+
+    if (active->count >= ACTIVE_DENSE_SHARE * compact->edge_count) {
+        active->count = compact->edge_count;
+        memset(active->current, 0, active->word_count * sizeof(uint64_t));
+        for (int k = 0; k < compact->edge_count; k++) {
+            process_edge(compact, active, k, &local_max, true);
+        }
+    } else {
+        for (int w = 0; w < active->word_count; w++) {
+            // Edges activated later in this word are picked up by reading it again
+            while (active->current[w] != 0) {
+                int k = w * 64 + __builtin_ctzll(active->current[w]);
+                active->current[w] &= active->current[w] - 1;
+                process_edge(compact, active, k, &local_max, false);
+            }
+        }
+    }
+    activate_next(active);
+
+    // Start the next iteration, the current bitmap is now all zeros
+    int processed = active->count;
+    uint64_t* current = active->current;
+    active->current = active->next;
+    active->next = current;
+    active->count = active->next_count;
+    active->next_count = 0;
+    active->iteration++;
+
+    *max = local_max;
+    return processed;
+}
+
+/// Run iterations only on edges whose methods changed, until no edge is active
+void active_diff(compact_graph_t* compact, int max_iterations, int* i, double* max,
+                 bool* cancel_flag, checkpoint_t* checkpoint)
+{
+    active_set_t* active = active_set_create(compact);
+    long long processed = 0;
+    int start = *i;
+
+    while (active->count > 0 && *i < max_iterations && !*cancel_flag) {
+        *max = 0;
+        int count = active_process(compact, active, max);
+        processed += count;
+
+        (*i)++;
+        if (*i % 100 == 0 || *i == max_iterations || active->count == 0)
+            printf("Iteration %d, max %g, %d of %d edges processed\n", *i, *max, count,
+                   compact->edge_count);
+        checkpoint_tick(checkpoint, compact, *i, *max);
+    }
+
+    if (*i > start) {
+        printf("Processed %lld edges, %.1f%% of full iterations\n", processed,
+               100.0 * processed / ((double)compact->edge_count * (*i - start)));
+    }
+    active_set_destroy(active);
+}
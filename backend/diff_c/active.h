@@ -0,0 +1,59 @@
+/**
+ * File: backend/app/diff_c/active.h
+ * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+ * Description: Declares an active set of edges of a compact graph, and functions for running
+ *              iterations of the difference algorithm only on edges whose methods changed.
+ */
+
+#ifndef ACTIVE_H
+#define ACTIVE_H
+
+#include <stdbool.h>
+#include <stdint.h>
+
+#include "checkpoint.h"
+#include "compact.h"
+#include "diff.h"
+
+/// Smallest change of a level that makes edges of the method active again
+#define ACTIVE_THRESHOLD (EPSILON * 1e-4)
+/// Iterations with at least this share of edges active process all edges in order
+#define ACTIVE_DENSE_SHARE 0.25
+
+/**
+ * Edges of a compact graph that can change in the current iteration.
+ *
+ * An edge is inactive if neither of its methods changed since it was last processed
+ * and did nothing, so processing it again would do nothing either. A changed method
+ * activates its edges after the changing edge in the current iteration, and its edges
+ * up to the last changing edge in the next one. Iterations thus give the same results
+ * as iterations over all edges, apart from changes below the threshold.
+ */
+typedef struct active_set {
+    int word_count;
+    /// Bitmaps of active edge positions in the current and the next iteration
+    uint64_t* current;
+    uint64_t* next;
+    /// Number of edges active in the current iteration, including those activated during it
+    int count;
+    int next_count;
+    /// Positions of edges of each indexed method, ascending, starting at offsets[m]
+    int* offsets;
+    int* edges;
+    int method_word_count;
+    /// Bitmap of methods changed in the current iteration
+    uint64_t* changed;
+    /// Position of the last edge that changed each method in the current iteration
+    int* last_change;
+    /// Iteration in which later edges of each method were last activated
+    int* activated;
+    int iteration;
+} active_set_t;
+
+active_set_t* active_set_create(compact_graph_t* compact);
+void active_set_destroy(active_set_t* active);
+int active_process(compact_graph_t* compact, active_set_t* active, double* max);
+void active_diff(compact_graph_t* compact, int max_iterations, int* i, double* max,
+                 bool* cancel_flag, checkpoint_t* checkpoint);
+
+#endif
@@ -0,0 +1,62 @@
+/**
+ * File: backend/app/diff_c/arena.c
+ * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+ * Description: Implements an arena owning large allocations and memory-mapped files.
+ */
+
+#include <stdlib.h>
+#include <sys/mman.h>
+
+#include "arena.h"
+
+arena_t* arena_create()
+{
+    arena_t* arena = malloc(sizeof(arena_t));
+    if (arena == NULL) {
+        return NULL;
+    }
+
+    arena->blocks = NULL;
+    return arena;
+}
+
+void arena_destroy(arena_t* arena)
+{
+    arena_block_t* next;
+    for (arena_block_t* block = arena->blocks; block != NULL; block = next) {
+        next = block->next;
+        if (block->mapped) {
+            munmap(block->data, block->size);
+        } else {
+            free(block->data);
+        }
+        free(block);
+    }
+    free(arena);
+}
+
+void arena_add_block(arena_t* arena, void* data, size_t size, bool mapped)
+{
+    arena_block_t* block = malloc(sizeof(arena_block_t));
+    block->data = data;
+    block->size = size;
+    block->mapped = mapped;
+    block->next = arena->blocks;
+    arena->blocks = block;
+}
+
+/// Allocate memory released together with the arena
+void* arena_alloc(arena_t* arena, size_t size)
+{
+    void* data = malloc(size > 0 ? size : 1);
+    if (data != NULL) {
+        arena_add_block(arena, data, size, false);
+    }
+    return data;
+}
+
+/// Make the arena unmap the given mapping when destroyed
+void arena_add_mapping(arena_t* arena, void* data, size_t size)
+{
+    arena_add_block(arena, data, size, true);
+}
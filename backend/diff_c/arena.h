@@ -0,0 +1,31 @@
+/**
+ * File: backend/app/diff_c/arena.h
+ * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+ * Description: Declares an arena owning large allocations and memory-mapped files,
+ *              which are all released at once, and functions for manipulating it.
+ */
+
+#ifndef ARENA_H
+#define ARENA_H
+
+#include <stdbool.h>
+#include <stddef.h>
+
+typedef struct arena_block {
+    void* data;
+    size_t size;
+    /// Whether the block is a memory mapping, otherwise allocated by malloc
+    bool mapped;
+    struct arena_block* next;
+} arena_block_t;
+
+typedef struct arena {
+    arena_block_t* blocks;
+} arena_t;
+
+arena_t* arena_create();
+void arena_destroy(arena_t* arena);
+void* arena_alloc(arena_t* arena, size_t size);
+void arena_add_mapping(arena_t* arena, void* data, size_t size);
+
+#endif
@@ -0,0 +1,250 @@
+/**
+ * File: backend/app/diff_c/batch.c
+ * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+ * Description: Implements a supergraph loaded once for differences with many subgraphs,
+ *              and running them sequentially or on parallel workers.
+ */
+
+#include <pthread.h>
+#include <stdio.h>
+#include <stdlib.h>
+
+#include "batch.h"
+#include "diff.h"
+#include "edge.h"
+#include "hashtable.h"
+
+/// Supergraph of a single difference, sharing strings and invokes with the batch supergraph
+typedef struct overlay {
+    call_graph_t graph;
+    /// Copies of methods of the supergraph by ID
+    method_t* methods;
+} overlay_t;
+
+/// Subgraphs waiting for a worker
+typedef struct batch_queue {
+    batch_t* batch;
+    char** subgraph_directories;
+    const char** checkpoint_paths;
+    int count;
+    int max_iterations;
+    int thread_count;
+    bool active_set;
+    int* iterations;
+    bool* cancel_flag;
+    diff_result_t** results;
+    pthread_mutex_t lock;
+    int next;
+} batch_queue_t;
+
+batch_t* batch_create(char* supergraph_directory)
+{
+    batch_t* batch = malloc(sizeof(batch_t));
+    if (batch == NULL) {
+        return NULL;
+    }
+
+    batch->sup = call_graph_create(supergraph_directory, "Supergraph");
+    batch->id_bound = call_graph_id_bound(batch->sup);
+    batch->methods = calloc(batch->id_bound, sizeof(method_t*));
+
+    ht_iter it = ht_iterator(batch->sup->methods);
+    while (ht_next(&it)) {
+        method_t* m = it.value;
+        batch->methods[m->id] = m;
+    }
+
+    return batch;
+}
+
+void batch_destroy(batch_t* batch)
+{
+    call_graph_destroy(batch->sup);
+    free(batch->methods);
+    free(batch);
+}
+
+/// Copy the supergraph, link the copies to the subgraph and purge common edges
+overlay_t* overlay_create(batch_t* batch, call_graph_t* sub)
+{
+    overlay_t* overlay = malloc(sizeof(overlay_t));
+    if (overlay == NULL) {
+        return NULL;
+    }
+
+    overlay->graph = *batch->sup;
+    overlay->graph.other_graph = sub;
+    sub->other_graph = &overlay->graph;
+
+    overlay->methods = malloc(batch->id_bound * sizeof(method_t));
+    ht_iter it = ht_iterator(batch->sup->methods);
+    while (ht_next(&it)) {
+        method_t* m = it.value;
+        method_t* copy = &overlay->methods[m->id];
+        *copy = *m;
+        copy->equivalent = ht_get(sub->methods, it.key);
+        if (copy->equivalent != NULL) {
+            copy->equivalent->equivalent = copy;
+        }
+    }
+
+    edge_t** tail = &overlay->graph.edges;
+    for (edge_t* e = batch->sup->edges; e != NULL; e = e->next) {
+        edge_t* copy =
+            edge_create(&overlay->methods[e->source->id], &overlay->methods[e->target->id], e->id);
+        copy->value = e->value;
+        *tail = copy;
+        tail = &copy->next;
+    }
+    *tail = NULL;
+    purge_common_edges(&overlay->graph);
+
+    return overlay;
+}
+
+void overlay_destroy(overlay_t* overlay)
+{
+    edge_t* next_e;
+    for (edge_t* e = overlay->graph.edges; e != NULL; e = next_e) {
+        next_e = e->next;
+        edge_destroy(e);
+    }
+
+    free(overlay->methods);
+    free(overlay);
+}
+
+/// Run the difference with the given subgraph, leaving the batch supergraph unchanged
+diff_result_t* batch_diff(batch_t* batch, char* subgraph_directory, int max_iterations,
+                          int thread_count, bool active_set, const char* checkpoint_path, int* i,
+                          bool* cancel_flag)
+{
+    call_graph_t* sub = call_graph_create(subgraph_directory, "Subgraph");
+    call_graph_print(sub);
+    overlay_t* overlay = overlay_create(batch, sub);
+    call_graph_print(&overlay->graph);
+
+    diff_purged(&overlay->graph, max_iterations, thread_count, active_set, checkpoint_path, i,
+                cancel_flag);
+    diff_result_t* result = diff_result_create(&overlay->graph);
+
+    overlay_destroy(overlay);
+    call_graph_destroy(sub);
+    return result;
+}
+
+void* batch_worker(void* arg)
+{
+    batch_queue_t* queue = arg;
+
+    while (true) {
+        pthread_mutex_lock(&queue->lock);
+        int k = queue->next++;
+        pthread_mutex_unlock(&queue->lock);
+        if (k >= queue->count) {
+            break;
+        }
+
+        const char* checkpoint_path =
+            queue->checkpoint_paths != NULL ? queue->checkpoint_paths[k] : NULL;
+        queue->results[k] =
+            batch_diff(queue->batch, queue->subgraph_directories[k], queue->max_iterations,
+                       queue->thread_count, queue->active_set, checkpoint_path,
+                       &queue->iterations[k], queue->cancel_flag);
+    }
+
+    return NULL;
+}
+
+/**
+ * Run differences with all given subgraphs, each taken by the next free worker.
+ * Stores the result and iteration count of each subgraph at its index.
+ * Checkpoint paths are optional, as is each of them.
+ */
+void batch_diff_all(batch_t* batch, char** subgraph_directories, int count, int worker_count,
+                    int max_iterations, int thread_count, bool active_set,
+                    const char** checkpoint_paths, int* iterations, bool* cancel_flag,
+                    diff_result_t** results)
+{
+    batch_queue_t queue = {
+        .batch = batch,
+        .subgraph_directories = subgraph_directories,
+        .checkpoint_paths = checkpoint_paths,
+        .count = count,
+        .max_iterations = max_iterations,
+        .thread_count = thread_count,
+        .active_set = active_set,
+        .iterations = iterations,
+        .cancel_flag = cancel_flag,
+        .results = results,
+        .next = 0,
+    };
+    pthread_mutex_init(&queue.lock, NULL);
+
+    if (worker_count > count) {
+        worker_count = count;
+    }
+    if (worker_count > 1) {
+        printf("Running %d differences on %d workers\n", count, worker_count);
+    }
+
+    // The calling thread takes part as the first worker
+    pthread_t* threads = malloc(worker_count * sizeof(pthread_t));
+    for (int w = 1; w < worker_count; w++) {
+        pthread_create(&threads[w], NULL, batch_worker, &queue);
+    }
+    batch_worker(&queue);
+    for (int w = 1; w < worker_count; w++) {
+        pthread_join(threads[w], NULL);
+    }
+
+    free(threads);
+    pthread_mutex_destroy(&queue.lock);
+}
+
+int compare_values(const void* a, const void* b)
+{
+    double a_value = ((edge_t*)a)->value;
+    double b_value = ((edge_t*)b)->value;
+    return b_value > a_value ? 1 : -1;
+}
+
+/// Print the highest-ranked edges of a result whose caller is present in both graphs
+void batch_print_top_edges(batch_t* batch, diff_result_t* result, int n)
+{
+    edge_t* edges = malloc(result->edge_count * sizeof(edge_t));
+    for (int k = 0; k < result->edge_count; k++) {
+        edges[k] = (edge_t){.id = k,
+                            .source = batch->methods[result->source_ids[k]],
+                            .target = batch->methods[result->target_ids[k]],
+                            .value = result->values[k],
+                            .next = NULL};
+    }
+
+    qsort(edges, result->edge_count, sizeof(edge_t), compare_values);
+
+    int count = 0;
+    for (int k = 0; count < n && k < result->edge_count; k++) {
+        if (!result->relevant[edges[k].id]) {
+            // Caller not present in both graphs
+            continue;
+        }
+        edge_print(&edges[k], batch->sup->strings);
+        count++;
+    }
+
+    free(edges);
+}
+
+/// Load the supergraph once, run differences with all given subgraphs, then destroy it
+void diff_batch_from_dirs(char* supergraph_directory, char** subgraph_directories, int count,
+                          int worker_count, int max_iterations, int thread_count, bool active_set,
+                          const char** checkpoint_paths, int* iterations, bool* cancel_flag,
+                          diff_result_t** results)
+{
+    batch_t* batch = batch_create(supergraph_directory);
+    call_graph_print(batch->sup);
+    batch_diff_all(batch, subgraph_directories, count, worker_count, max_iterations, thread_count,
+                   active_set, checkpoint_paths, iterations, cancel_flag, results);
+    batch_destroy(batch);
+}
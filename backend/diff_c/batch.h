@@ -0,0 +1,45 @@
+/**
+ * File: backend/app/diff_c/batch.h
+ * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+ * Description: Declares a supergraph loaded once for differences with many subgraphs,
+ *              and functions for running them sequentially or on parallel workers.
+ */
+
+#ifndef BATCH_H
+#define BATCH_H
+
+#include <stdbool.h>
+
+#include "call_graph.h"
+#include "method.h"
+#include "result.h"
+
+/**
+ * Supergraph shared by differences with many subgraphs.
+ *
+ * Each difference works on an overlay with its own copies of methods and edges,
+ * so the supergraph is never changed and differences can run concurrently.
+ */
+typedef struct batch {
+    call_graph_t* sup;
+    /// Methods of the supergraph by ID, NULL for unused IDs
+    method_t** methods;
+    int id_bound;
+} batch_t;
+
+batch_t* batch_create(char* supergraph_directory);
+void batch_destroy(batch_t* batch);
+diff_result_t* batch_diff(batch_t* batch, char* subgraph_directory, int max_iterations,
+                          int thread_count, bool active_set, const char* checkpoint_path, int* i,
+                          bool* cancel_flag);
+void batch_diff_all(batch_t* batch, char** subgraph_directories, int count, int worker_count,
+                    int max_iterations, int thread_count, bool active_set,
+                    const char** checkpoint_paths, int* iterations, bool* cancel_flag,
+                    diff_result_t** results);
+void batch_print_top_edges(batch_t* batch, diff_result_t* result, int n);
+void diff_batch_from_dirs(char* supergraph_directory, char** subgraph_directories, int count,
+                          int worker_count, int max_iterations, int thread_count, bool active_set,
+                          const char** checkpoint_paths, int* iterations, bool* cancel_flag,
+                          diff_result_t** results);
+
+#endif
@@ -18,6 +18,7 @@
 #include "invoke.h"
 #include "map.h"
 #include "method.h"
+#include "snapshot.h"
 
 void create_edges(call_graph_t* cg)
 {
@@ -58,40 +59,81 @@ void create_edges(call_graph_t* cg)
 
 void compute_reachability(call_graph_t* cg)
 {
-    // Set all entry points to reachable
+    // Index edges and invokes by the ID of their calling method
+    int method_slots = call_graph_id_bound(cg);
+
+    int* edge_offsets = calloc(method_slots + 1, sizeof(int));
+    int* invoke_offsets = calloc(method_slots + 1, sizeof(int));
+    int invoke_count = 0;
+    for (edge_t* e = cg->edges; e != NULL; e = e->next) {
+        edge_offsets[e->source->id + 1]++;
+    }
+    for (invoke_t* i = cg->invokes; i != NULL; i = i->next) {
+        invoke_offsets[i->method->id + 1]++;
+        invoke_count++;
+    }
+    for (int id = 0; id < method_slots; id++) {
+        edge_offsets[id + 1] += edge_offsets[id];
+        invoke_offsets[id + 1] += invoke_offsets[id];
+    }
+
+    method_t** callees = malloc(cg->edge_count * sizeof(method_t*));
+    method_t** invoked = malloc(invoke_count * sizeof(method_t*));
+    int* cursor = malloc(method_slots * sizeof(int));
+    memcpy(cursor, edge_offsets, method_slots * sizeof(int));
+    for (edge_t* e = cg->edges; e != NULL; e = e->next) {
+        callees[cursor[e->source->id]++] = e->target;
+    }
+    memcpy(cursor, invoke_offsets, method_slots * sizeof(int));
+    for (invoke_t* i = cg->invokes; i != NULL; i = i->next) {
+        invoked[cursor[i->method->id]++] = i->target;
+    }
+    free(cursor);
+
+    // Queue of reached methods, starting with all entry points
+    method_t** queue = malloc(method_slots * sizeof(method_t*));
+    int head = 0;
+    int tail = 0;
+
     ht_iter it = ht_iterator(cg->methods);
     while (ht_next(&it)) {
         method_t* m = it.value;
         if (m->is_entry_point) {
             m->is_reachable = true;
             cg->reachable_count++;
+            queue[tail++] = m;
         }
     }
 
-    int changed;
-    do {
-        changed = 0;
-        for (edge_t* e = cg->edges; e != NULL; e = e->next) {
-            if (!e->source->is_reachable) {
-                continue;
-            }
-
-            if (!e->target->is_reachable) {
-                e->target->is_reachable = true;
-                e->target->value = 1;
+    while (head < tail) {
+        method_t* m = queue[head++];
+        for (int k = edge_offsets[m->id]; k < edge_offsets[m->id + 1]; k++) {
+            method_t* target = callees[k];
+            if (!target->is_reachable) {
+                target->is_reachable = true;
+                target->value = 1;
                 cg->reachable_count++;
-                changed++;
+                queue[tail++] = target;
             }
         }
-    } while (changed > 0);
+    }
 
-    // Abstract methods
-    for (invoke_t* i = cg->invokes; i != NULL; i = i->next) {
-        if (i->method->is_reachable && !i->target->is_reachable) {
-            i->target->is_reachable = true;
-            cg->reachable_count++;
+    // Abstract methods, invoked from reached methods but without edges to them
+    for (int q = 0; q < tail; q++) {
+        method_t* m = queue[q];
+        for (int k = invoke_offsets[m->id]; k < invoke_offsets[m->id + 1]; k++) {
+            if (!invoked[k]->is_reachable) {
+                invoked[k]->is_reachable = true;
+                cg->reachable_count++;
+            }
         }
     }
+
+    free(queue);
+    free(callees);
+    free(invoked);
+    free(edge_offsets);
+    free(invoke_offsets);
 }
 
 call_graph_t* call_graph_create(char* dirname, char* name)
@@ -103,21 +145,34 @@ call_graph_t* call_graph_create(char* dirname, char* name)
 
     cg->name = malloc(strlen(name) + 1);
     strcpy(cg->name, name);
-    cg->methods = ht_create(method_destroy);
     cg->other_graph = NULL;
+    cg->invokes = NULL;
+    cg->edges = NULL;
+    cg->arena = arena_create();
+    cg->strings = string_pool_create(cg->arena);
+
+    if (snapshot_load(cg, dirname)) {
+        printf("Loaded snapshot of %s\n", dirname);
+        return cg;
+    }
+
+    // Methods and their qualified names are owned by the arena
+    cg->methods = ht_create_borrowing(NULL);
 
     method_map_t* methods_by_id = method_map_create();
     invoke_map_t* invokes_by_id = invoke_map_create();
-    csv_load_methods(dirname, &cg->methods, methods_by_id);
-    csv_load_invokes(dirname, &cg->invokes, methods_by_id, invokes_by_id);
-    csv_load_targets(dirname, methods_by_id, invokes_by_id);
+    csv_load_methods(dirname, cg->methods, methods_by_id, cg->strings, cg->arena);
+    csv_load_invokes(dirname, &cg->invokes, methods_by_id, invokes_by_id, cg->strings, cg->arena);
+    csv_load_targets(dirname, cg->invokes, methods_by_id, invokes_by_id, cg->arena);
     method_map_destroy(methods_by_id);
     invoke_map_destroy(invokes_by_id);
 
     cg->method_count = cg->methods->size;
     cg->edge_count = 0;
+    cg->reachable_count = 0;
     create_edges(cg);
     compute_reachability(cg);
+    snapshot_save(cg, dirname);
 
     return cg;
 }
@@ -126,18 +181,14 @@ void call_graph_destroy(call_graph_t* cg)
 {
     ht_destroy(cg->methods);
 
-    invoke_t* next_i;
-    for (invoke_t* i = cg->invokes; i != NULL; i = next_i) {
-        next_i = i->next;
-        invoke_destroy(i);
-    }
-
     edge_t* next_e;
     for (edge_t* e = cg->edges; e != NULL; e = next_e) {
         next_e = e->next;
         edge_destroy(e);
     }
 
+    string_pool_destroy(cg->strings);
+    arena_destroy(cg->arena);
     free(cg->name);
     free(cg);
 }
@@ -148,6 +199,38 @@ void call_graph_print(call_graph_t* cg)
            cg->reachable_count, cg->edge_count);
 }
 
+/// Raise the bound above the ID of the method, if any
+static void id_bound_include(int* bound, method_t* m)
+{
+    if (m != NULL && m->id >= *bound) {
+        *bound = m->id + 1;
+    }
+}
+
+/// Upper bound of method IDs, for arrays indexed by method ID
+int call_graph_id_bound(call_graph_t* cg)
+{
+    int bound = 0;
+    ht_iter it = ht_iterator(cg->methods);
+    while (ht_next(&it)) {
+        id_bound_include(&bound, it.value);
+    }
+
+    // Methods replaced in the hash table by a duplicate can still be referred to
+    for (edge_t* e = cg->edges; e != NULL; e = e->next) {
+        id_bound_include(&bound, e->source);
+        id_bound_include(&bound, e->target);
+    }
+    for (invoke_t* i = cg->invokes; i != NULL; i = i->next) {
+        id_bound_include(&bound, i->method);
+        id_bound_include(&bound, i->target);
+        for (int k = 0; k < i->target_count; k++) {
+            id_bound_include(&bound, i->targets[k]);
+        }
+    }
+    return bound;
+}
+
 void purge_common_edges(call_graph_t* cg)
 {
     edge_t* prev = NULL;
@@ -174,7 +257,7 @@ void link_equivalents(call_graph_t* cg1, call_graph_t* cg2)
 
     while (ht_next(&it)) {
         method_t* m1 = it.value;
-        method_t* m2 = ht_get(cg2->methods, m1->qualified_name);
+        method_t* m2 = ht_get(cg2->methods, it.key);
         if (m2 != NULL) {
             m1->equivalent = m2;
             m2->equivalent = m1;
@@ -207,7 +290,7 @@ void print_top_edges(call_graph_t* cg, int n)
             // Caller not present in both graphs
             continue;
         }
-        edge_print(edges[i]);
+        edge_print(edges[i], cg->strings);
         count++;
     }
 }
@@ -12,11 +12,13 @@
 
 #include <stdlib.h>
 
+#include "arena.h"
 #include "edge.h"
 #include "hashtable.h"
 #include "invoke.h"
 #include "map.h"
 #include "method.h"
+#include "string_pool.h"
 
 typedef struct call_graph {
     char* name;
@@ -30,11 +32,16 @@ typedef struct call_graph {
     /// Linked list of edges
     edge_t* edges;
     struct call_graph* other_graph;
+    /// Owner of methods, invokes, and their strings
+    arena_t* arena;
+    /// Strings of methods and invokes, each stored once
+    string_pool_t* strings;
 } call_graph_t;
 
 call_graph_t* call_graph_create(char* dirname, char* name);
 void call_graph_destroy(call_graph_t* cg);
 void call_graph_print(call_graph_t* cg);
+int call_graph_id_bound(call_graph_t* cg);
 
 void purge_common_edges(call_graph_t* cg);
 void link_equivalents(call_graph_t* cg1, call_graph_t* cg2);
@@ -0,0 +1,157 @@
+/**
+ * File: backend/app/diff_c/checkpoint.c
+ * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+ * Description: Implements saving the iteration state of the difference algorithm to checkpoints,
+ *              and resuming iterations from them.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+#include <unistd.h>
+
+#include "checkpoint.h"
+#include "diff.h"
+
+/// Current monotonic time in seconds
+double monotonic_time()
+{
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+/// FNV-1a hash of indexed method IDs and edge endpoints
+uint64_t layout_hash(compact_graph_t* compact)
+{
+    uint64_t h = 14695981039346656037ULL;
+    for (int m = 0; m < compact->method_count; m++) {
+        h = (h ^ (uint32_t)compact->methods[m]->id) * 1099511628211ULL;
+    }
+    for (int k = 0; k < compact->edge_count; k++) {
+        h = (h ^ (uint32_t)compact->sources[k]) * 1099511628211ULL;
+        h = (h ^ (uint32_t)compact->targets[k]) * 1099511628211ULL;
+    }
+    return h;
+}
+
+void checkpoint_init(checkpoint_t* checkpoint, const char* path, compact_graph_t* compact)
+{
+    checkpoint->path = path;
+    checkpoint->layout_hash = path != NULL ? layout_hash(compact) : 0;
+    checkpoint->saved_at = monotonic_time();
+}
+
+/**
+ * Replace levels and values of the compact graph with those of the checkpoint,
+ * set the iteration count and maximum level it was saved with.
+ *
+ * Returns false and keeps the graph unchanged if there is no usable checkpoint.
+ * A checkpoint past the maximum iterations is kept, and is not overwritten by this difference.
+ */
+bool checkpoint_load(checkpoint_t* checkpoint, compact_graph_t* compact, int max_iterations, int* i,
+                     double* max)
+{
+    if (checkpoint->path == NULL) {
+        return false;
+    }
+    FILE* f = fopen(checkpoint->path, "rb");
+    if (f == NULL) {
+        return false;
+    }
+
+    checkpoint_header_t header;
+    bool ok = fread(&header, sizeof(header), 1, f) == 1 &&
+              memcmp(header.magic, CHECKPOINT_MAGIC, sizeof(header.magic)) == 0 &&
+              header.version == CHECKPOINT_VERSION &&
+              header.method_count == (uint32_t)compact->method_count &&
+              header.edge_count == (uint32_t)compact->edge_count &&
+              header.layout_hash == checkpoint->layout_hash && header.alpha == ALPHA &&
+              header.epsilon == EPSILON;
+    if (!ok) {
+        printf("Ignoring checkpoint %s of a different difference\n", checkpoint->path);
+        fclose(f);
+        return false;
+    }
+    if (header.iterations > max_iterations) {
+        printf("Checkpoint %s is past %d iterations, starting from zero\n", checkpoint->path,
+               max_iterations);
+        checkpoint->path = NULL;
+        fclose(f);
+        return false;
+    }
+
+    // Read into new arrays, so that a truncated file leaves the graph unchanged
+    double* levels = malloc(compact->method_count * sizeof(double));
+    double* values = malloc(compact->edge_count * sizeof(double));
+    ok = fread(levels, sizeof(double), compact->method_count, f) == (size_t)compact->method_count &&
+         fread(values, sizeof(double), compact->edge_count, f) == (size_t)compact->edge_count;
+    fclose(f);
+    if (!ok) {
+        printf("Ignoring truncated checkpoint %s\n", checkpoint->path);
+        free(levels);
+        free(values);
+        return false;
+    }
+
+    free(compact->levels);
+    free(compact->values);
+    compact->levels = levels;
+    compact->values = values;
+    *i = header.iterations;
+    *max = header.max;
+    printf("Resuming from checkpoint %s, %d iterations\n", checkpoint->path, *i);
+    return true;
+}
+
+void checkpoint_save(checkpoint_t* checkpoint, compact_graph_t* compact, int i, double max)
+{
+    if (checkpoint->path == NULL) {
+        return;
+    }
+    checkpoint->saved_at = monotonic_time();
+
+    checkpoint_header_t header = {
+        .version = CHECKPOINT_VERSION,
+        .method_count = compact->method_count,
+        .edge_count = compact->edge_count,
+        .iterations = i,
+        .layout_hash = checkpoint->layout_hash,
+        .alpha = ALPHA,
+        .epsilon = EPSILON,
+        .max = max,
+    };
+    memcpy(header.magic, CHECKPOINT_MAGIC, sizeof(header.magic));
+
+    // Write to a temporary file first, so that a crash never leaves a partial checkpoint
+    char* tmp_path = malloc(strlen(checkpoint->path) + 32);
+    sprintf(tmp_path, "%s.%d.tmp", checkpoint->path, getpid());
+
+    FILE* f = fopen(tmp_path, "wb");
+    if (f == NULL) {
+        printf("Cannot save checkpoint %s\n", checkpoint->path);
+        free(tmp_path);
+        return;
+    }
+    bool ok = fwrite(&header, sizeof(header), 1, f) == 1 &&
+              fwrite(compact->levels, sizeof(double), compact->method_count, f) ==
+                  (size_t)compact->method_count &&
+              fwrite(compact->values, sizeof(double), compact->edge_count, f) ==
+                  (size_t)compact->edge_count;
+    ok = fclose(f) == 0 && ok;
+    if (!ok || rename(tmp_path, checkpoint->path) != 0) {
+        printf("Cannot save checkpoint %s\n", checkpoint->path);
+        remove(tmp_path);
+    }
+    free(tmp_path);
+}
+
+/// Save a checkpoint if the interval has passed since the last one
+void checkpoint_tick(checkpoint_t* checkpoint, compact_graph_t* compact, int i, double max)
+{
+    if (checkpoint->path != NULL &&
+        monotonic_time() - checkpoint->saved_at >= CHECKPOINT_INTERVAL) {
+        checkpoint_save(checkpoint, compact, i, max);
+    }
+}
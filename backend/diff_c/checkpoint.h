@@ -0,0 +1,56 @@
+/**
+ * File: backend/app/diff_c/checkpoint.h
+ * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+ * Description: Declares the checkpoint format of the iteration state of the difference algorithm,
+ *              and functions for saving checkpoints and resuming from them.
+ */
+
+#ifndef CHECKPOINT_H
+#define CHECKPOINT_H
+
+#include <stdbool.h>
+#include <stdint.h>
+
+#include "compact.h"
+
+#define CHECKPOINT_MAGIC "EDGECKPT"
+/// Increase when the layout of the file or the meaning of its fields changes
+#define CHECKPOINT_VERSION 1
+/// Seconds between checkpoints saved during iterations
+#define CHECKPOINT_INTERVAL 60
+
+/**
+ * Start of a checkpoint file, followed by levels of indexed methods and values of edges
+ * in the order of the compact layout. All integers are little-endian.
+ */
+typedef struct checkpoint_header {
+    char magic[8];
+    uint32_t version;
+    uint32_t method_count;
+    uint32_t edge_count;
+    /// Number of iterations done
+    int32_t iterations;
+    /// Hash of indexed method IDs and edge endpoints, identifies the compact layout
+    uint64_t layout_hash;
+    double alpha;
+    double epsilon;
+    /// Maximum level seen by the last iteration, the algorithm converged if below epsilon
+    double max;
+} checkpoint_header_t;
+
+/// Checkpoint file of a running difference, saved periodically
+typedef struct checkpoint {
+    /// Path of the checkpoint file, NULL if checkpoints are disabled
+    const char* path;
+    uint64_t layout_hash;
+    /// Monotonic time of the last save, in seconds
+    double saved_at;
+} checkpoint_t;
+
+void checkpoint_init(checkpoint_t* checkpoint, const char* path, compact_graph_t* compact);
+bool checkpoint_load(checkpoint_t* checkpoint, compact_graph_t* compact, int max_iterations, int* i,
+                     double* max);
+void checkpoint_save(checkpoint_t* checkpoint, compact_graph_t* compact, int i, double max);
+void checkpoint_tick(checkpoint_t* checkpoint, compact_graph_t* compact, int i, double max);
+
+#endif
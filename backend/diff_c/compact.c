@@ -0,0 +1,229 @@
+/**
+ * File: backend/app/diff_c/compact.c
+ * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+ * Description: Implements a compact representation of a purged supergraph used by iterations
+ *              of the difference algorithm, and functions for creating, running and destroying it.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+#include "compact.h"
+#include "diff.h"
+#include "edge.h"
+
+/// Assign indices to methods whose level can change, return an array of indices by method ID
+int* index_methods(compact_graph_t* compact, call_graph_t* cg)
+{
+    // Edges can refer to methods replaced in the hash table by a duplicate
+    int method_slots = call_graph_id_bound(cg);
+    int* indices = malloc(method_slots * sizeof(int));
+    for (int id = 0; id < method_slots; id++) {
+        indices[id] = -1;
+    }
+
+    compact->method_count = 0;
+    for (edge_t* e = cg->edges; e != NULL; e = e->next) {
+        method_t* methods[] = {e->source, e->target};
+        for (int k = 0; k < 2; k++) {
+            if (indices[methods[k]->id] == -1 && !method_is_pinned(methods[k])) {
+                indices[methods[k]->id] = compact->method_count++;
+            }
+        }
+    }
+
+    compact->levels = malloc(compact->method_count * sizeof(double));
+    compact->methods = malloc(compact->method_count * sizeof(method_t*));
+    for (edge_t* e = cg->edges; e != NULL; e = e->next) {
+        method_t* methods[] = {e->source, e->target};
+        for (int k = 0; k < 2; k++) {
+            int index = indices[methods[k]->id];
+            if (index != -1) {
+                compact->levels[index] = methods[k]->value;
+                compact->methods[index] = methods[k];
+            }
+        }
+    }
+
+    return indices;
+}
+
+/// Assign each edge the round after the last round of its indexed methods, -1 if left out
+int* assign_rounds(compact_graph_t* compact, call_graph_t* cg, int* indices)
+{
+    int* last_round = malloc(compact->method_count * sizeof(int));
+    for (int m = 0; m < compact->method_count; m++) {
+        last_round[m] = -1;
+    }
+
+    int* rounds = malloc(compact->list_length * sizeof(int));
+    int k = 0;
+    compact->round_count = 0;
+
+    for (edge_t* e = cg->edges; e != NULL; e = e->next, k++) {
+        int source = indices[e->source->id];
+        int target = indices[e->target->id];
+        if (source == -1 && target == -1) {
+            // Levels of both methods are always zero, the edge never changes
+            rounds[k] = -1;
+            continue;
+        }
+
+        int round = 0;
+        if (source != -1 && last_round[source] >= round) {
+            round = last_round[source] + 1;
+        }
+        if (target != -1 && last_round[target] >= round) {
+            round = last_round[target] + 1;
+        }
+        if (source != -1) {
+            last_round[source] = round;
+        }
+        if (target != -1) {
+            last_round[target] = round;
+        }
+
+        rounds[k] = round;
+        if (round >= compact->round_count) {
+            compact->round_count = round + 1;
+        }
+    }
+
+    free(last_round);
+    return rounds;
+}
+
+compact_graph_t* compact_create(call_graph_t* cg)
+{
+    compact_graph_t* compact = malloc(sizeof(compact_graph_t));
+    if (compact == NULL) {
+        return NULL;
+    }
+
+    compact->list_length = cg->edge_count;
+    int* indices = index_methods(compact, cg);
+    int* rounds = assign_rounds(compact, cg, indices);
+
+    // Counting sort of edges by round
+    int* offsets = calloc(compact->round_count + 1, sizeof(int));
+    for (int k = 0; k < compact->list_length; k++) {
+        if (rounds[k] >= 0) {
+            offsets[rounds[k] + 1]++;
+        }
+    }
+    for (int r = 0; r < compact->round_count; r++) {
+        offsets[r + 1] += offsets[r];
+    }
+
+    compact->edge_count = offsets[compact->round_count];
+    compact->sources = malloc(compact->edge_count * sizeof(int));
+    compact->targets = malloc(compact->edge_count * sizeof(int));
+    compact->values = malloc(compact->edge_count * sizeof(double));
+    compact->positions = malloc(compact->list_length * sizeof(int));
+
+    int* cursor = malloc((compact->round_count + 1) * sizeof(int));
+    memcpy(cursor, offsets, (compact->round_count + 1) * sizeof(int));
+    int k = 0;
+    for (edge_t* e = cg->edges; e != NULL; e = e->next, k++) {
+        if (rounds[k] == -1) {
+            compact->positions[k] = -1;
+            continue;
+        }
+        int position = cursor[rounds[k]]++;
+        compact->positions[k] = position;
+        compact->sources[position] = indices[e->source->id];
+        compact->targets[position] = indices[e->target->id];
+        compact->values[position] = e->value;
+    }
+    free(cursor);
+    free(rounds);
+    free(indices);
+
+    // Large rounds are split between threads, others are merged into serial segments
+    compact->segments = malloc(compact->round_count * sizeof(segment_t));
+    compact->segment_count = 0;
+    for (int r = 0; r < compact->round_count; r++) {
+        bool parallel = offsets[r + 1] - offsets[r] >= MIN_PARALLEL_ROUND;
+        segment_t* last = &compact->segments[compact->segment_count - 1];
+
+        if (!parallel && compact->segment_count > 0 && !last->parallel) {
+            last->end = offsets[r + 1];
+            continue;
+        }
+        compact->segments[compact->segment_count++] =
+            (segment_t){.start = offsets[r], .end = offsets[r + 1], .parallel = parallel};
+    }
+    free(offsets);
+
+    return compact;
+}
+
+void compact_destroy(compact_graph_t* compact)
+{
+    free(compact->levels);
+    free(compact->methods);
+    free(compact->sources);
+    free(compact->targets);
+    free(compact->values);
+    free(compact->positions);
+    free(compact->segments);
+    free(compact);
+}
+
+/// Size of the arrays read and written by iterations, in bytes
+size_t compact_size(compact_graph_t* compact)
+{
+    return compact->method_count * sizeof(double) +
+           compact->edge_count * (2 * sizeof(int) + sizeof(double)) +
+           compact->segment_count * sizeof(segment_t);
+}
+
+/// Process edges in the given range of positions, update the maximum level seen
+void compact_process(compact_graph_t* compact, int start, int end, double* max)
+{
+    double* levels = compact->levels;
+    double local_max = *max;
+
+    for (int k = start; k < end; k++) {
+        int source = compact->sources[k];
+        int target = compact->targets[k];
+        double l2 = target != -1 ? levels[target] : 0;
+        double l1 = source != -1 ? levels[source] : 0;
+
+        if (l2 > local_max) {
+            local_max = l2;
+        }
+        if (l1 > local_max) {
+            local_max = l1;
+        }
+
+        double diff = ALPHA * (l2 - l1);
+
+        if (diff > 0) {
+            compact->values[k] += diff;
+            if (target != -1) {
+                levels[target] -= diff;
+            }
+            if (source != -1) {
+                levels[source] += diff;
+            }
+        }
+    }
+
+    *max = local_max;
+}
+
+/// Copy values of edges and indexed methods back to the call graph
+void compact_write_back(compact_graph_t* compact, call_graph_t* cg)
+{
+    int k = 0;
+    for (edge_t* e = cg->edges; e != NULL; e = e->next, k++) {
+        if (compact->positions[k] != -1) {
+            e->value = compact->values[compact->positions[k]];
+        }
+    }
+    for (int m = 0; m < compact->method_count; m++) {
+        compact->methods[m]->value = compact->levels[m];
+    }
+}
@@ -0,0 +1,66 @@
+/**
+ * File: backend/app/diff_c/compact.h
+ * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+ * Description: Declares a compact representation of a purged supergraph used by iterations
+ *              of the difference algorithm, and functions for creating, running and destroying it.
+ */
+
+#ifndef COMPACT_H
+#define COMPACT_H
+
+#include <stdbool.h>
+#include <stddef.h>
+
+#include "call_graph.h"
+#include "method.h"
+
+/// Rounds with fewer edges are not worth splitting between threads
+#define MIN_PARALLEL_ROUND 4096
+
+typedef struct segment {
+    int start;
+    int end;
+    /// Whether the edges are split between threads, otherwise processed by a single thread
+    bool parallel;
+} segment_t;
+
+/**
+ * Edges and methods of a purged supergraph stored in contiguous arrays.
+ *
+ * Only methods whose level can change get an index, other methods have a level of zero
+ * and are referred to by index -1. Edges between two such methods never change and are left out.
+ *
+ * Edges are grouped into rounds. No two edges of a round share an indexed method,
+ * and every edge comes after all preceding edges sharing such a method. Edges of a round
+ * can therefore be processed concurrently, and processing rounds in order gives the same
+ * results as processing the edges of the linked list one by one.
+ */
+typedef struct compact_graph {
+    int method_count;
+    int edge_count;
+    int round_count;
+    int segment_count;
+    /// Values of indexed methods
+    double* levels;
+    /// Indexed methods, for writing their values back
+    method_t** methods;
+    /// Source method indices of edges ordered by round
+    int* sources;
+    /// Target method indices of edges ordered by round
+    int* targets;
+    /// Values of edges ordered by round
+    double* values;
+    /// Position of each edge of the linked list in the arrays, -1 if left out
+    int* positions;
+    int list_length;
+    /// Consecutive small rounds are merged into a single serial segment
+    segment_t* segments;
+} compact_graph_t;
+
+compact_graph_t* compact_create(call_graph_t* cg);
+void compact_destroy(compact_graph_t* compact);
+size_t compact_size(compact_graph_t* compact);
+void compact_process(compact_graph_t* compact, int start, int end, double* max);
+void compact_write_back(compact_graph_t* compact, call_graph_t* cg);
+
+#endif
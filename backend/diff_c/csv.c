@@ -3,20 +3,26 @@
  * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
  * Description: Implements functions for loading methods, invokes,
  *              and call targets from CSV reports.
+ *              Reports are memory-mapped and parsed in place by multiple threads.
  */
 
+#include <fcntl.h>
+#include <pthread.h>
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <time.h>
+#include <unistd.h>
 
+#include "arena.h"
 #include "csv.h"
 #include "hashtable.h"
 #include "invoke.h"
 #include "map.h"
 #include "method.h"
 
-#define MAX_LINE_LEN 2048
-
 char* get_file_path(char* dirname, char* filename)
 {
     char* path = malloc(strlen(dirname) + strlen(filename) + 2);
@@ -31,105 +37,352 @@ char* get_file_path(char* dirname, char* filename)
     return path;
 }
 
-void csv_load_methods(char* dirname, ht** methods, method_map_t* methods_by_id)
+/// Map a file as private writable memory followed by a zero byte, NULL if it cannot be read
+char* map_file(char* path, size_t* size)
 {
-    char* path = get_file_path(dirname, "call_tree_methods.csv");
-    printf("Opening file %s\n", path);
+    int fd = open(path, O_RDONLY);
+    if (fd == -1) {
+        return NULL;
+    }
+    struct stat st;
+    if (fstat(fd, &st) != 0) {
+        close(fd);
+        return NULL;
+    }
+    *size = st.st_size;
+
+    // Anonymous mapping provides the terminating byte, even if the file ends at a page boundary
+    char* data = mmap(NULL, *size + 1, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS, -1, 0);
+    if (data == MAP_FAILED) {
+        close(fd);
+        return NULL;
+    }
+    if (*size > 0 &&
+        mmap(data, *size, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_FIXED, fd, 0) == MAP_FAILED) {
+        munmap(data, *size + 1);
+        close(fd);
+        return NULL;
+    }
+    close(fd);
+
+    return data;
+}
+
+typedef struct chunk {
+    char* start;
+    char* end;
+    /// Number of quotes in the chunk, before its boundaries are aligned to rows
+    size_t quote_count;
+    int field_count;
+    int row_count;
+    int capacity;
+    char** fields;
+} chunk_t;
+
+void* count_quotes(void* arg)
+{
+    chunk_t* chunk = arg;
+    chunk->quote_count = 0;
+    for (char* p = chunk->start; (p = memchr(p, '"', chunk->end - p)) != NULL; p++) {
+        chunk->quote_count++;
+    }
+    return NULL;
+}
+
+/// Parse one field in place, terminate it by a zero byte, return the delimiter after it
+char parse_field(char** position, char* end, char** field)
+{
+    char* p = *position;
+    char* dst;
+
+    if (p < end && *p == '"') {
+        // Quoted field, two quotes stand for one
+        *field = dst = ++p;
+        while (p < end) {
+            if (*p == '"') {
+                if (p + 1 < end && p[1] == '"') {
+                    *dst++ = '"';
+                    p += 2;
+                    continue;
+                }
+                p++;
+                break;
+            }
+            *dst++ = *p++;
+        }
+        while (p < end && *p != ',' && *p != '\n') {
+            *dst++ = *p++;
+        }
+    } else {
+        *field = p;
+        while (p < end && *p != ',' && *p != '\n') {
+            p++;
+        }
+        dst = p;
+    }
+
+    char delimiter = p < end ? *p : '\n';
+    if (delimiter == '\n' && dst > *field && dst[-1] == '\r') {
+        dst--;
+    }
+    *dst = '\0';
+    *position = p + 1;
+    return delimiter;
+}
+
+void* parse_rows(void* arg)
+{
+    chunk_t* chunk = arg;
+    char* p = chunk->start;
+
+    while (p < chunk->end) {
+        if (*p == '\n' || (*p == '\r' && p + 1 < chunk->end && p[1] == '\n')) {
+            // Empty line
+            p += *p == '\n' ? 1 : 2;
+            continue;
+        }
+
+        if (chunk->row_count == chunk->capacity) {
+            chunk->capacity = chunk->capacity > 0 ? chunk->capacity * 2 : 4096;
+            chunk->fields =
+                realloc(chunk->fields, chunk->capacity * chunk->field_count * sizeof(char*));
+        }
+        char** row = &chunk->fields[chunk->row_count++ * chunk->field_count];
+
+        int f = 0;
+        char delimiter = ',';
+        while (delimiter == ',') {
+            char* field;
+            delimiter = parse_field(&p, chunk->end, &field);
+            if (f < chunk->field_count) {
+                row[f++] = field;
+            }
+        }
+        // Missing fields are empty
+        while (f < chunk->field_count) {
+            row[f++] = "";
+        }
+    }
+    return NULL;
+}
+
+void run_threads(void* (*function)(void*), chunk_t* chunks, int count)
+{
+    pthread_t threads[CSV_MAX_THREADS];
+    for (int k = 1; k < count; k++) {
+        pthread_create(&threads[k], NULL, function, &chunks[k]);
+    }
+    function(&chunks[0]);
+    for (int k = 1; k < count; k++) {
+        pthread_join(threads[k], NULL);
+    }
+}
 
-    FILE* f = fopen(path, "r");
+/// Read all rows of a CSV file, fields stay valid until the table is freed
+bool csv_read(char* path, int field_count, csv_table_t* table)
+{
+    struct timespec started;
+    clock_gettime(CLOCK_MONOTONIC, &started);
+
+    size_t size;
+    char* data = map_file(path, &size);
+    if (data == NULL) {
+        printf("Cannot open file %s\n", path);
+        return false;
+    }
+
+    // Skip the header
+    char* end = data + size;
+    char* start = memchr(data, '\n', size);
+    start = start != NULL ? start + 1 : end;
+
+    int thread_count = sysconf(_SC_NPROCESSORS_ONLN);
+    if (thread_count > CSV_MAX_THREADS) {
+        thread_count = CSV_MAX_THREADS;
+    }
+    int chunk_limit = (end - start) / CSV_MIN_CHUNK + 1;
+    if (thread_count > chunk_limit) {
+        thread_count = chunk_limit;
+    }
+
+    chunk_t chunks[CSV_MAX_THREADS] = {};
+    for (int k = 0; k < thread_count; k++) {
+        chunks[k].start = start + (end - start) * k / thread_count;
+        chunks[k].end = start + (end - start) * (k + 1) / thread_count;
+        chunks[k].field_count = field_count;
+    }
+    run_threads(count_quotes, chunks, thread_count);
+
+    // Move chunk boundaries to the start of the next row outside of quotes
+    size_t quote_count = chunks[0].quote_count;
+    for (int k = 1; k < thread_count; k++) {
+        char* p = chunks[k].start;
+        bool quoted = quote_count % 2 == 1;
+        quote_count += chunks[k].quote_count;
+
+        if (p < chunks[k - 1].start) {
+            // The previous chunk starts after this one would, at the start of a row
+            p = chunks[k - 1].start;
+            quoted = false;
+        }
+        while (p < end && (quoted || p[-1] != '\n')) {
+            if (*p == '"') {
+                quoted = !quoted;
+            }
+            p++;
+        }
+        chunks[k - 1].end = p;
+        chunks[k].start = p;
+    }
+    chunks[thread_count - 1].end = end;
+    run_threads(parse_rows, chunks, thread_count);
+
+    table->data = data;
+    table->size = size;
+    table->field_count = field_count;
+    table->row_count = 0;
+    for (int k = 0; k < thread_count; k++) {
+        table->row_count += chunks[k].row_count;
+    }
+    table->fields = malloc(((size_t)table->row_count * field_count + 1) * sizeof(char*));
+    char** fields = table->fields;
+    for (int k = 0; k < thread_count; k++) {
+        size_t count = (size_t)chunks[k].row_count * field_count;
+        memcpy(fields, chunks[k].fields, count * sizeof(char*));
+        fields += count;
+        free(chunks[k].fields);
+    }
+
+    struct timespec finished;
+    clock_gettime(CLOCK_MONOTONIC, &finished);
+    double elapsed = finished.tv_sec - started.tv_sec + (finished.tv_nsec - started.tv_nsec) / 1e9;
+    printf("Parsed %s: %d rows, %.1f MB/s on %d threads\n", path, table->row_count,
+           size / 1e6 / elapsed, thread_count);
+    return true;
+}
+
+void csv_table_free(csv_table_t* table)
+{
+    free(table->fields);
+    munmap(table->data, table->size + 1);
+}
+
+void csv_load_methods(char* dirname, ht* methods, method_map_t* methods_by_id,
+                      string_pool_t* strings, arena_t* arena)
+{
+    char* path = get_file_path(dirname, "call_tree_methods.csv");
+    csv_table_t table;
+    bool ok = csv_read(path, 8, &table);
     free(path);
-    char line[MAX_LINE_LEN];
-    fgets(line, MAX_LINE_LEN, f);
-
-    while (fgets(line, MAX_LINE_LEN, f) != NULL) {
-        int i = 0;
-        char* fields[8] = {};
-        char* s = strtok(line, ",\n");
-        do {
-            fields[i++] = s;
-        } while ((s = strtok(NULL, ",\n")) != NULL);
-
-        // When the flags field is empty
-        if (i < 8) {
-            fields[7] = fields[6];
-            fields[6] = "";
+    if (!ok) {
+        return;
+    }
+
+    method_t* block = arena_alloc(arena, table.row_count * sizeof(method_t));
+    size_t name_capacity = 1024;
+    char* name = malloc(name_capacity);
+
+    for (int r = 0; r < table.row_count; r++) {
+        char** fields = &table.fields[r * 8];
+        method_t* method = &block[r];
+        char* params = strcmp(fields[3], "empty") == 0 ? "" : fields[3];
+
+        method->id = atoi(fields[0]);
+        method->name = string_pool_add(strings, fields[1]);
+        method->declared_type = string_pool_add(strings, fields[2]);
+        method->params = string_pool_add(strings, params);
+        method->return_type = string_pool_add(strings, fields[4]);
+        method->display = string_pool_add(strings, fields[5]);
+        method->flags = string_pool_add(strings, fields[6]);
+        method->is_entry_point = strcmp(fields[7], "true") == 0;
+        method->is_reachable = false;
+        method->value = 0;
+        method->equivalent = NULL;
+
+        size_t name_size = strlen(fields[1]) + strlen(fields[2]) + strlen(params) +
+                           strlen(fields[4]) + strlen(fields[6]) + 6;
+        while (name_size > name_capacity) {
+            name_capacity *= 2;
+            name = realloc(name, name_capacity);
         }
+        sprintf(name, "%s.%s(%s):%s:%s", fields[2], fields[1], params, fields[6], fields[4]);
+        method->qualified_name = string_pool_add(strings, name);
 
-        method_t* method = method_create(
-            atoi(fields[0]), fields[1], fields[2], strcmp(fields[3], "empty") == 0 ? "" : fields[3],
-            fields[4], fields[5], fields[6], strcmp(fields[7], "true") == 0);
-        ht_insert(*methods, method->qualified_name, method);
+        // Strings of the pool never move, so the table does not need its own copy
+        ht_insert(methods, string_pool_get(strings, method->qualified_name), method);
         method_map_add(methods_by_id, method);
     }
 
-    fclose(f);
+    free(name);
+    csv_table_free(&table);
 }
 
 void csv_load_invokes(char* dirname, invoke_t** invokes, method_map_t* methods_by_id,
-                      invoke_map_t* invokes_by_id)
+                      invoke_map_t* invokes_by_id, string_pool_t* strings, arena_t* arena)
 {
     char* path = get_file_path(dirname, "call_tree_invokes.csv");
-    printf("Opening file %s\n", path);
-
-    FILE* f = fopen(path, "r");
+    csv_table_t table;
+    bool ok = csv_read(path, 5, &table);
     free(path);
-    char line[MAX_LINE_LEN];
-    fgets(line, MAX_LINE_LEN, f);
-
-    invoke_t* prev_invoke = NULL;
-
-    while (fgets(line, MAX_LINE_LEN, f) != NULL) {
-        int i = 0;
-        char* fields[5] = {};
-        char* s = strtok(line, ",\n");
-        do {
-            fields[i++] = s;
-        } while ((s = strtok(NULL, ",\n")) != NULL);
-
-        method_t* method = method_map_get(methods_by_id, atoi(fields[1]));
-        method_t* target = method_map_get(methods_by_id, atoi(fields[3]));
-        invoke_t* invoke = invoke_create(atoi(fields[0]), method, target, fields[2],
-                                         strcmp(fields[4], "true") == 0);
-        invoke_map_add(invokes_by_id, invoke);
+    if (!ok) {
+        return;
+    }
 
-        if (prev_invoke != NULL) {
-            prev_invoke->next = invoke;
-        } else {
-            *invokes = invoke;
-        }
-        prev_invoke = invoke;
+    invoke_t* block = arena_alloc(arena, table.row_count * sizeof(invoke_t));
+    for (int r = 0; r < table.row_count; r++) {
+        char** fields = &table.fields[r * 5];
+        invoke_t* invoke = &block[r];
+
+        invoke->id = atoi(fields[0]);
+        invoke->method = method_map_get(methods_by_id, atoi(fields[1]));
+        invoke->target = method_map_get(methods_by_id, atoi(fields[3]));
+        invoke->bci = string_pool_add(strings, fields[2]);
+        invoke->is_direct = strcmp(fields[4], "true") == 0;
+        invoke->targets = NULL;
+        invoke->targets_capacity = 0;
+        invoke->target_count = 0;
+        invoke->next = r + 1 < table.row_count ? &block[r + 1] : NULL;
+        invoke_map_add(invokes_by_id, invoke);
     }
+    *invokes = table.row_count > 0 ? block : NULL;
 
-    fclose(f);
+    csv_table_free(&table);
 }
 
-void csv_load_targets(char* dirname, method_map_t* methods_by_id, invoke_map_t* invokes_by_id)
+void csv_load_targets(char* dirname, invoke_t* invokes, method_map_t* methods_by_id,
+                      invoke_map_t* invokes_by_id, arena_t* arena)
 {
     char* path = get_file_path(dirname, "call_tree_targets.csv");
-    printf("Opening file %s\n", path);
-
-    FILE* f = fopen(path, "r");
+    csv_table_t table;
+    bool ok = csv_read(path, 2, &table);
     free(path);
-    char line[MAX_LINE_LEN];
-    fgets(line, MAX_LINE_LEN, f);
+    if (!ok) {
+        return;
+    }
 
-    while (fgets(line, MAX_LINE_LEN, f) != NULL) {
-        int i = 0;
-        char* fields[2] = {};
-        char* s = strtok(line, ",\n");
-        do {
-            fields[i++] = s;
-        } while ((s = strtok(NULL, ",\n")) != NULL);
+    // Count targets of each invoke, then give each invoke its part of one block
+    invoke_t** row_invokes = malloc(table.row_count * sizeof(invoke_t*));
+    for (int r = 0; r < table.row_count; r++) {
+        row_invokes[r] = invoke_map_get(invokes_by_id, atoi(table.fields[r * 2]));
+        row_invokes[r]->targets_capacity++;
+    }
+    method_t** targets = arena_alloc(arena, table.row_count * sizeof(method_t*));
+    for (invoke_t* invoke = invokes; invoke != NULL; invoke = invoke->next) {
+        invoke->targets = targets;
+        targets += invoke->targets_capacity;
+    }
 
-        invoke_t* invoke = invoke_map_get(invokes_by_id, atoi(fields[0]));
-        method_t* target = method_map_get(methods_by_id, atoi(fields[1]));
-        invoke_add_call_target(invoke, target);
+    for (int r = 0; r < table.row_count; r++) {
+        invoke_t* invoke = row_invokes[r];
+        invoke->targets[invoke->target_count++] =
+            method_map_get(methods_by_id, atoi(table.fields[r * 2 + 1]));
     }
 
-    fclose(f);
+    free(row_invokes);
+    csv_table_free(&table);
 }
 
-void csv_save_methods(char* dirname, ht* methods)
+void csv_save_methods(char* dirname, ht* methods, string_pool_t* strings)
 {
     char* path = get_file_path(dirname, "methods.csv");
     printf("Opening file %s\n", path);
@@ -141,8 +394,10 @@ void csv_save_methods(char* dirname, ht* methods)
     ht_iter it = ht_iterator(methods);
     while (ht_next(&it)) {
         method_t* m = it.value;
-        fprintf(f, "%d,%s,%s,%s,%s,%s,%s,%s,%s\n", m->id, m->name, m->declared_type, m->params,
-                m->return_type, m->display, m->flags, m->is_entry_point ? "true" : "false",
+        fprintf(f, "%d,%s,%s,%s,%s,%s,%s,%s,%s\n", m->id, string_pool_get(strings, m->name),
+                string_pool_get(strings, m->declared_type), string_pool_get(strings, m->params),
+                string_pool_get(strings, m->return_type), string_pool_get(strings, m->display),
+                string_pool_get(strings, m->flags), m->is_entry_point ? "true" : "false",
                 m->equivalent != NULL ? "true" : "false");
     }
 
@@ -7,16 +7,41 @@
 #ifndef CSV_H
 #define CSV_H
 
+#include <stdbool.h>
+
+#include "arena.h"
 #include "hashtable.h"
 #include "invoke.h"
 #include "map.h"
 #include "method.h"
+#include "string_pool.h"
+
+/// Files smaller than this many bytes per thread are parsed by fewer threads
+#define CSV_MIN_CHUNK (1 << 20)
+#define CSV_MAX_THREADS 16
+
+/// Rows of a CSV file without the header
+typedef struct csv_table {
+    int field_count;
+    int row_count;
+    /// Fields of all rows, row by row, pointing into the mapped file
+    char** fields;
+    /// Mapping of the file, released together with the table
+    char* data;
+    size_t size;
+} csv_table_t;
+
+char* get_file_path(char* dirname, char* filename);
+bool csv_read(char* path, int field_count, csv_table_t* table);
+void csv_table_free(csv_table_t* table);
 
-void csv_load_methods(char* dirname, ht** methods, method_map_t* methods_by_id);
+void csv_load_methods(char* dirname, ht* methods, method_map_t* methods_by_id,
+                      string_pool_t* strings, arena_t* arena);
 void csv_load_invokes(char* dirname, invoke_t** invokes, method_map_t* methods_by_id,
-                      invoke_map_t* invokes_by_id);
-void csv_load_targets(char* dirname, method_map_t* methods_by_id, invoke_map_t* invokes_by_id);
+                      invoke_map_t* invokes_by_id, string_pool_t* strings, arena_t* arena);
+void csv_load_targets(char* dirname, invoke_t* invokes, method_map_t* methods_by_id,
+                      invoke_map_t* invokes_by_id, arena_t* arena);
 
-void csv_save_methods(char* dirname, ht* methods);
+void csv_save_methods(char* dirname, ht* methods, string_pool_t* strings);
 
 #endif
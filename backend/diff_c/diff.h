@@ -0,0 +1,31 @@
+/**
+ * File: backend/app/diff_c/diff.h
+ * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+ * Description: Declares parameters and functions of the call graph difference algorithm.
+ */
+
+#ifndef DIFF_H
+#define DIFF_H
+
+#include <stdbool.h>
+
+#include "call_graph.h"
+#include "method.h"
+
+#define ALPHA 0.125
+#define EPSILON 0.001
+
+/// Parameters the library was compiled with, for its callers
+extern const double diff_alpha;
+extern const double diff_epsilon;
+
+double level(method_t* m);
+void diff_purged(call_graph_t* sup, int max_iterations, int thread_count, bool active_set,
+                 const char* checkpoint_path, int* i, bool* cancel_flag);
+void diff(call_graph_t* sup, call_graph_t* sub, int max_iterations, int thread_count,
+          bool active_set, const char* checkpoint_path, int* i, bool* cancel_flag);
+call_graph_t* diff_from_dirs(char* supergraph_directory, char* subgraph_directory,
+                             int max_iterations, int thread_count, bool active_set,
+                             const char* checkpoint_path, int* i, bool* cancel_flag);
+
+#endif
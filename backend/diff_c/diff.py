@@ -7,22 +7,21 @@ Description: Declares C bindings and implements a wrapper function for the diffe
 import ctypes
 import os
 
-type EdgeDiff = dict[str, float | bool]
-
 
 class Method(ctypes.Structure):
     pass
 
 
+# Strings are handles into the string pool of the call graph
 Method._fields_ = [
     ("id", ctypes.c_int),
-    ("name", ctypes.c_char_p),
-    ("declared_type", ctypes.c_char_p),
-    ("params", ctypes.c_char_p),
-    ("return_type", ctypes.c_char_p),
-    ("qualified_name", ctypes.c_char_p),
-    ("display", ctypes.c_char_p),
-    ("flags", ctypes.c_char_p),
+    ("name", ctypes.c_uint32),
+    ("declared_type", ctypes.c_uint32),
+    ("params", ctypes.c_uint32),
+    ("return_type", ctypes.c_uint32),
+    ("qualified_name", ctypes.c_uint32),
+    ("display", ctypes.c_uint32),
+    ("flags", ctypes.c_uint32),
     ("is_entry_point", ctypes.c_bool),
     ("is_reachable", ctypes.c_bool),
     ("value", ctypes.c_double),
@@ -64,18 +63,95 @@ CallGraph._fields_ = [
     ("invokes", ctypes.POINTER(Invoke)),
     ("edges", ctypes.POINTER(Edge)),
     ("other_graph", ctypes.POINTER(CallGraph)),
+    ("arena", ctypes.c_void_p),
+    ("strings", ctypes.c_void_p),
 ]
 
 
+class DiffResultStruct(ctypes.Structure):
+    _fields_ = [
+        ("edge_count", ctypes.c_int),
+        ("source_ids", ctypes.POINTER(ctypes.c_int)),
+        ("target_ids", ctypes.POINTER(ctypes.c_int)),
+        ("values", ctypes.POINTER(ctypes.c_double)),
+        ("relevant", ctypes.POINTER(ctypes.c_bool)),
+    ]
+
+
 diff_lib = ctypes.CDLL(os.path.join(os.path.dirname(__file__), "../build/libdiff.so"))
 diff_lib.diff_from_dirs.argtypes = (
     ctypes.c_char_p,
     ctypes.c_char_p,
     ctypes.c_int,
+    ctypes.c_int,
+    ctypes.c_bool,
+    ctypes.c_char_p,
     ctypes.POINTER(ctypes.c_int),
     ctypes.POINTER(ctypes.c_bool),
 )
 diff_lib.diff_from_dirs.restype = ctypes.POINTER(CallGraph)
+diff_lib.diff_batch_from_dirs.argtypes = (
+    ctypes.c_char_p,
+    ctypes.POINTER(ctypes.c_char_p),
+    ctypes.c_int,
+    ctypes.c_int,
+    ctypes.c_int,
+    ctypes.c_int,
+    ctypes.c_bool,
+    ctypes.POINTER(ctypes.c_char_p),
+    ctypes.POINTER(ctypes.c_int),
+    ctypes.POINTER(ctypes.c_bool),
+    ctypes.POINTER(ctypes.POINTER(DiffResultStruct)),
+)
+diff_lib.call_graph_create.argtypes = (ctypes.c_char_p, ctypes.c_char_p)
+diff_lib.call_graph_create.restype = ctypes.POINTER(CallGraph)
+diff_lib.call_graph_destroy.argtypes = (ctypes.POINTER(CallGraph),)
+diff_lib.diff_result_create.argtypes = (ctypes.POINTER(CallGraph),)
+diff_lib.diff_result_create.restype = ctypes.POINTER(DiffResultStruct)
+diff_lib.diff_result_destroy.argtypes = (ctypes.POINTER(DiffResultStruct),)
+
+# Parameters the library was compiled with
+ALPHA = ctypes.c_double.in_dll(diff_lib, "diff_alpha").value
+EPSILON = ctypes.c_double.in_dll(diff_lib, "diff_epsilon").value
+
+
+def _view(pointer, count: int, format: str) -> memoryview:
+    """Wrap a C array in a memoryview without copying it."""
+    array = ctypes.cast(pointer, ctypes.POINTER(pointer._type_ * count)).contents
+    return memoryview(array).cast("B").cast(format)
+
+
+class DiffResult:
+    """
+    Edges of a supergraph after the difference algorithm, stored in C arrays.
+
+    Each column is a memoryview of the C array, valid until the result is closed.
+    """
+
+    def __init__(self, result):
+        self._result = result
+        count = result.contents.edge_count
+        self.source_ids = _view(result.contents.source_ids, count, "i")
+        self.target_ids = _view(result.contents.target_ids, count, "i")
+        self.values = _view(result.contents.values, count, "d")
+        self.relevant = _view(result.contents.relevant, count, "?")
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._result is None:
+            return
+        for view in (self.source_ids, self.target_ids, self.values, self.relevant):
+            view.release()
+        diff_lib.diff_result_destroy(self._result)
+        self._result = None
 
 
 def diff(
@@ -84,27 +160,73 @@ def diff(
     max_iterations: int,
     iteration_count: ctypes.c_int,
     cancel_flag: ctypes.c_bool,
-) -> dict[tuple[str, str], EdgeDiff]:
-    result: dict[tuple[str, str], EdgeDiff] = {}
-
+    thread_count: int = 1,
+    checkpoint_path: str | None = None,
+    active_set: bool = False,
+) -> DiffResult:
+    """
+    Run the difference algorithm on graphs loaded from the given directories.
+
+    With a checkpoint path, iterations continue from the checkpoint if it belongs
+    to the same graphs, and the state is saved there periodically and at the end.
+    With an active set, iterations skip edges whose methods did not change, on a single
+    thread, and stop once no edge changes.
+    """
     sup = diff_lib.diff_from_dirs(
         supergraph_directory.encode(),
         subgraph_directory.encode(),
         max_iterations,
+        thread_count,
+        active_set,
+        checkpoint_path.encode() if checkpoint_path is not None else None,
         ctypes.byref(iteration_count),
         ctypes.byref(cancel_flag),
     )
 
-    edge = sup.contents.edges
-    while edge:
-        source = edge.contents.source
-        target = edge.contents.target
-        result[(str(source.contents.id), str(target.contents.id))] = {
-            "value": edge.contents.value,
-            "relevant": bool(source.contents.equivalent),
-        }
-        edge = edge.contents.next
-
+    result = diff_lib.diff_result_create(sup)
     diff_lib.call_graph_destroy(sup.contents.other_graph)
     diff_lib.call_graph_destroy(sup)
-    return result
+    return DiffResult(result)
+
+
+def diff_batch(
+    supergraph_directory: str,
+    subgraph_directories: list[str],
+    max_iterations: int,
+    iteration_counts: ctypes.Array,
+    cancel_flag: ctypes.c_bool,
+    thread_count: int = 1,
+    worker_count: int = 1,
+    checkpoint_paths: list[str | None] | None = None,
+    active_set: bool = False,
+) -> list[DiffResult]:
+    """
+    Run the difference algorithm on a supergraph with each of the subgraphs, loading the
+    supergraph only once. Returns results in the order of the subgraphs.
+
+    Differences run on the given number of workers, each with its own iteration count
+    in the array of counts, and the cancel flag stops all of them.
+    """
+    count = len(subgraph_directories)
+    directories = (ctypes.c_char_p * count)(*(d.encode() for d in subgraph_directories))
+    checkpoints = None
+    if checkpoint_paths is not None:
+        checkpoints = (ctypes.c_char_p * count)(
+            *(p.encode() if p is not None else None for p in checkpoint_paths)
+        )
+    results = (ctypes.POINTER(DiffResultStruct) * count)()
+
+    diff_lib.diff_batch_from_dirs(
+        supergraph_directory.encode(),
+        directories,
+        count,
+        worker_count,
+        max_iterations,
+        thread_count,
+        active_set,
+        checkpoints,
+        iteration_counts,
+        ctypes.byref(cancel_flag),
+        results,
+    )
+    return [DiffResult(result) for result in results]
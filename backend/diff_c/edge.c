@@ -35,32 +35,40 @@ char* edge_key(int source_id, int target_id)
     return buf;
 }
 
-void edge_print(edge_t* edge)
+void edge_print(edge_t* edge, string_pool_t* strings)
 {
     printf("[%.4g] ", edge->value);
-    method_print_short(edge->source);
+    method_print_short(edge->source, strings);
     printf(" -> ");
-    method_print_short(edge->target);
+    method_print_short(edge->target, strings);
     printf("\n");
 }
 
-void edge_print_cypher(edge_t* edge, int depth)
+void edge_print_cypher(edge_t* edge, string_pool_t* strings, int depth)
 {
+    method_t* m1 = edge->source;
+    method_t* m2 = edge->target;
+    char* m1_type = string_pool_get(strings, m1->declared_type);
+    char* m1_name = string_pool_get(strings, m1->name);
+    char* m1_params = string_pool_get(strings, m1->params);
+    char* m1_return = string_pool_get(strings, m1->return_type);
+    char* m2_type = string_pool_get(strings, m2->declared_type);
+    char* m2_name = string_pool_get(strings, m2->name);
+    char* m2_params = string_pool_get(strings, m2->params);
+    char* m2_return = string_pool_get(strings, m2->return_type);
+
     if (depth > 0) {
         printf("MATCH (m1:Method {Type: '%s', Name: '%s', Parameters: '%s', Return: '%s'})\n"
                "-[:CALLS]->(m2:Method {Type: '%s', Name: '%s', Parameters: '%s', Return: '%s'})\n"
                "MATCH path = (m2)-[:CALLS]->{0,%d}(:Method {PresentInOther: 'false'})\n"
                "WHERE ALL(m IN nodes(path) WHERE m.PresentInOther = 'false')\n"
                "RETURN m1, m2, path\n",
-               edge->source->declared_type, edge->source->name, edge->source->params,
-               edge->source->return_type, edge->target->declared_type, edge->target->name,
-               edge->target->params, edge->target->return_type, depth);
+               m1_type, m1_name, m1_params, m1_return, m2_type, m2_name, m2_params, m2_return,
+               depth);
     } else {
         printf("MATCH (m1:Method {Type: '%s', Name: '%s', Parameters: '%s', Return: '%s'})\n"
                "-[:CALLS]->(m2:Method {Type: '%s', Name: '%s', Parameters: '%s', Return: '%s'})\n"
                "RETURN m1, m2\n",
-               edge->source->declared_type, edge->source->name, edge->source->params,
-               edge->source->return_type, edge->target->declared_type, edge->target->name,
-               edge->target->params, edge->target->return_type);
+               m1_type, m1_name, m1_params, m1_return, m2_type, m2_name, m2_params, m2_return);
     }
 }
@@ -21,7 +21,7 @@ typedef struct edge {
 edge_t* edge_create(method_t* source, method_t* target, int id);
 void edge_destroy(edge_t* edge);
 char* edge_key(int source_id, int target_id);
-void edge_print(edge_t* edge);
-void edge_print_cypher(edge_t* edge, int depth);
+void edge_print(edge_t* edge, string_pool_t* strings);
+void edge_print_cypher(edge_t* edge, string_pool_t* strings, int depth);
 
 #endif
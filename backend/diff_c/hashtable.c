@@ -34,17 +34,30 @@ ht* ht_create(void(*destroy_function))
     table->capacity = INITIAL_CAPACITY;
     table->size = 0;
     table->destroy_function = destroy_function;
+    table->owns_keys = true;
 
     return table;
 }
 
+/// Create a hash table which does not copy its keys
+ht* ht_create_borrowing(void(*destroy_function))
+{
+    ht* table = ht_create(destroy_function);
+    if (table != NULL) {
+        table->owns_keys = false;
+    }
+    return table;
+}
+
 void ht_destroy(ht* table)
 {
     for (size_t i = 0; i < table->capacity; i++) {
         ht_item* item = &table->items[i];
 
         if (item->key != NULL) {
-            free((void*)item->key);
+            if (table->owns_keys) {
+                free((void*)item->key);
+            }
             if (table->destroy_function != NULL) {
                 table->destroy_function(item->value);
             }
@@ -55,7 +68,7 @@ void ht_destroy(ht* table)
     free(table);
 }
 
-void ht_insert_item(ht_item* items, size_t capacity, const char* key, void* value)
+void ht_insert_item(ht_item* items, size_t capacity, const char* key, void* value, bool copy_key)
 {
     unsigned long index = hash(key) & (capacity - 1);
 
@@ -73,7 +86,7 @@ void ht_insert_item(ht_item* items, size_t capacity, const char* key, void* valu
     }
 
     // Can insert
-    items[index].key = strdup(key);
+    items[index].key = copy_key ? strdup(key) : key;
     items[index].value = value;
 }
 
@@ -85,8 +98,8 @@ void ht_grow(ht* table)
     for (size_t i = 0; i < table->capacity; i++) {
         ht_item item = table->items[i];
         if (item.key != NULL) {
-            ht_insert_item(new_items, new_capacity, item.key, item.value);
-            free((void*)item.key);
+            // Keys are moved to the new items
+            ht_insert_item(new_items, new_capacity, item.key, item.value, false);
         }
     }
 
@@ -101,7 +114,7 @@ void ht_insert(ht* table, const char* key, void* value)
         ht_grow(table);
     }
 
-    ht_insert_item(table->items, table->capacity, key, value);
+    ht_insert_item(table->items, table->capacity, key, value, table->owns_keys);
     table->size++;
 }
 
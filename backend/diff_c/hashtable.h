@@ -23,6 +23,8 @@ typedef struct ht {
     size_t capacity;
     size_t size;
     void (*destroy_function)(void*);
+    /// Whether keys are copied on insertion, otherwise they must outlive the table
+    bool owns_keys;
 } ht;
 
 typedef struct ht_iter {
@@ -35,6 +37,7 @@ typedef struct ht_iter {
 unsigned long hash(const char* key);
 
 ht* ht_create(void(*destroy_function));
+ht* ht_create_borrowing(void(*destroy_function));
 void ht_destroy(ht* table);
 void ht_insert(ht* table, const char* key, void* value);
 void* ht_get(const ht* table, const char* key);
@@ -10,7 +10,7 @@
 #include "invoke.h"
 #include "method.h"
 
-invoke_t* invoke_create(int id, method_t* method, method_t* target, char* bci, bool is_direct)
+invoke_t* invoke_create(int id, method_t* method, method_t* target, uint32_t bci, bool is_direct)
 {
     invoke_t* invoke = malloc(sizeof(invoke_t));
     if (invoke == NULL) {
@@ -41,7 +41,7 @@ void invoke_destroy(invoke_t* invoke)
     free(invoke);
 }
 
-void invoke_print(invoke_t* invoke)
+void invoke_print(invoke_t* invoke, string_pool_t* strings)
 {
     printf("Invoke %d ", invoke->id);
     if (invoke->is_direct) {
@@ -50,14 +50,14 @@ void invoke_print(invoke_t* invoke)
         printf("(virtual, %d targets): ", invoke->target_count);
     }
 
-    method_print_short(invoke->method);
+    method_print_short(invoke->method, strings);
     printf(" -> ");
-    method_print_short(invoke->target);
+    method_print_short(invoke->target, strings);
 
     if (invoke->target_count > 1) {
         for (int i = 0; i < invoke->target_count; i++) {
             printf("\n  %s -> ", invoke->targets[i]->id == invoke->target->id ? "*" : " ");
-            method_print(invoke->targets[i]);
+            method_print(invoke->targets[i], strings);
         }
     }
 }
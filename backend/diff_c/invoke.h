@@ -9,6 +9,7 @@
 #define INVOKE_H
 
 #include <stdbool.h>
+#include <stdint.h>
 
 #include "method.h"
 
@@ -16,7 +17,8 @@ typedef struct invoke {
     int id;
     method_t* method;
     method_t* target;
-    char* bci;
+    /// Handle of the bytecode index in the string pool
+    uint32_t bci;
     bool is_direct;
     method_t** targets;
     int targets_capacity;
@@ -24,9 +26,9 @@ typedef struct invoke {
     struct invoke* next;
 } invoke_t;
 
-invoke_t* invoke_create(int id, method_t* method, method_t* target, char* bci, bool is_direct);
+invoke_t* invoke_create(int id, method_t* method, method_t* target, uint32_t bci, bool is_direct);
 void invoke_destroy(invoke_t* invoke);
-void invoke_print(invoke_t* invoke);
+void invoke_print(invoke_t* invoke, string_pool_t* strings);
 void invoke_add_call_target(invoke_t* invoke, method_t* target);
 
 #endif
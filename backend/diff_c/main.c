@@ -7,34 +7,81 @@
 #include <limits.h>
 #include <stdbool.h>
 #include <stdio.h>
+#include <string.h>
 
+#include "active.h"
+#include "batch.h"
 #include "call_graph.h"
+#include "checkpoint.h"
+#include "compact.h"
+#include "diff.h"
 #include "method.h"
+#include "parallel.h"
+#include "result.h"
 
-#define ALPHA 0.125
-#define EPSILON 0.001
+const double diff_alpha = ALPHA;
+const double diff_epsilon = EPSILON;
 
 double level(method_t* m)
 {
-    if (m->equivalent != NULL && m->equivalent->is_reachable) {
-        // The method is reachable in subgraph
-        return 0;
-    }
-    if (m->equivalent == NULL && m->is_entry_point) {
-        // The method is absent from subgraph, but is an entry point
+    if (method_is_pinned(m)) {
+        // The method is reachable in subgraph, or absent from it but an entry point
         return 0;
     }
     // The method is absent from subgraph
     return m->value;
 }
 
-void diff(call_graph_t* sup, call_graph_t* sub, int max_iterations, int* i, bool* cancel_flag)
+/**
+ * Run iterations on a supergraph linked to its subgraph and purged of common edges,
+ * then write values of its edges and methods back.
+ */
+void diff_purged(call_graph_t* sup, int max_iterations, int thread_count, bool active_set,
+                 const char* checkpoint_path, int* i, bool* cancel_flag)
 {
     if (max_iterations <= 0) {
         max_iterations = INT_MAX;
     }
     double max = 1;
 
+    compact_graph_t* compact = compact_create(sup);
+    printf("Compact layout: %d methods, %d edges in %d rounds, %zu bytes\n", compact->method_count,
+           compact->edge_count, compact->round_count, compact_size(compact));
+
+    checkpoint_t checkpoint;
+    checkpoint_init(&checkpoint, checkpoint_path, compact);
+    checkpoint_load(&checkpoint, compact, max_iterations, i, &max);
+
+    if (active_set) {
+        // Edges are activated in the order of processing, which cannot be split between threads
+        printf("Starting difference algorithm with an active set\n");
+        active_diff(compact, max_iterations, i, &max, cancel_flag, &checkpoint);
+    } else if (thread_count > 1) {
+        printf("Starting difference algorithm on %d threads\n", thread_count);
+        parallel_diff(compact, thread_count, max_iterations, i, &max, cancel_flag, &checkpoint);
+    } else {
+        printf("Starting difference algorithm\n");
+        while (max > EPSILON && *i < max_iterations && !*cancel_flag) {
+            max = 0;
+            compact_process(compact, 0, compact->edge_count, &max);
+
+            (*i)++;
+            if (*i % 100 == 0 || *i == max_iterations || max <= EPSILON)
+                printf("Iteration %d, max %g\n", *i, max);
+            checkpoint_tick(&checkpoint, compact, *i, max);
+        }
+    }
+
+    // Keep the final state, so that a later difference can continue from it
+    checkpoint_save(&checkpoint, compact, *i, max);
+    compact_write_back(compact, sup);
+    compact_destroy(compact);
+    printf("Done, %d iterations.\n", *i);
+}
+
+void diff(call_graph_t* sup, call_graph_t* sub, int max_iterations, int thread_count,
+          bool active_set, const char* checkpoint_path, int* i, bool* cancel_flag)
+{
     call_graph_print(sup);
     call_graph_print(sub);
     link_equivalents(sup, sub);
@@ -43,65 +90,107 @@ void diff(call_graph_t* sup, call_graph_t* sub, int max_iterations, int* i, bool
     call_graph_print(sup);
     call_graph_print(sub);
 
-    printf("Starting difference algorithm\n");
-    while (max > EPSILON && *i < max_iterations && !*cancel_flag) {
-        max = 0;
-
-        for (edge_t* e = sup->edges; e != NULL; e = e->next) {
-            double l2 = level(e->target);
-            double l1 = level(e->source);
-
-            if (l2 > max) {
-                max = l2;
-            }
-            if (l1 > max) {
-                max = l1;
-            }
-
-            double diff = ALPHA * (l2 - l1);
-
-            if (diff > 0) {
-                e->value += diff;
-                e->target->value -= diff;
-                e->source->value += diff;
-            }
-        }
-
-        (*i)++;
-        if (*i % 100 == 0 || *i == max_iterations || max <= EPSILON)
-            printf("Iteration %d, max %g\n", *i, max);
-    }
-    printf("Done, %d iterations.\n", *i);
+    diff_purged(sup, max_iterations, thread_count, active_set, checkpoint_path, i, cancel_flag);
 }
 
 call_graph_t* diff_from_dirs(char* supergraph_directory, char* subgraph_directory,
-                             int max_iterations, int* i, bool* cancel_flag)
+                             int max_iterations, int thread_count, bool active_set,
+                             const char* checkpoint_path, int* i, bool* cancel_flag)
 {
     call_graph_t* sup = call_graph_create(supergraph_directory, "Supergraph");
     call_graph_t* sub = call_graph_create(subgraph_directory, "Subgraph");
     sup->other_graph = sub;
     sub->other_graph = sup;
 
-    diff(sup, sub, max_iterations, i, cancel_flag);
+    diff(sup, sub, max_iterations, thread_count, active_set, checkpoint_path, i, cancel_flag);
 
     // Caller should destroy the graphs, return a pointer to one of them
     return sup;
 }
 
+/// Run differences with comma-separated subgraphs on a supergraph loaded once
+int run_batch(char* supergraph_directory, char* subgraph_list, int max_iterations, int top_n,
+              int thread_count, char* checkpoint_path, bool active_set, int worker_count)
+{
+    int count = 1;
+    for (char* c = subgraph_list; *c != '\0'; c++) {
+        count += *c == ',';
+    }
+    char** directories = malloc(count * sizeof(char*));
+    directories[0] = subgraph_list;
+    int next = 1;
+    for (char* c = subgraph_list; *c != '\0'; c++) {
+        if (*c == ',') {
+            *c = '\0';
+            directories[next++] = c + 1;
+        }
+    }
+
+    // Each subgraph gets its own checkpoint, named by appending its index
+    char** checkpoint_paths = NULL;
+    if (checkpoint_path != NULL) {
+        checkpoint_paths = malloc(count * sizeof(char*));
+        for (int k = 0; k < count; k++) {
+            checkpoint_paths[k] = malloc(strlen(checkpoint_path) + 16);
+            sprintf(checkpoint_paths[k], "%s.%d", checkpoint_path, k);
+        }
+    }
+
+    int* iterations = calloc(count, sizeof(int));
+    diff_result_t** results = malloc(count * sizeof(diff_result_t*));
+    bool cancel_flag = false;
+
+    batch_t* batch = batch_create(supergraph_directory);
+    call_graph_print(batch->sup);
+    batch_diff_all(batch, directories, count, worker_count, max_iterations, thread_count,
+                   active_set, (const char**)checkpoint_paths, iterations, &cancel_flag, results);
+
+    for (int k = 0; k < count; k++) {
+        if (top_n != 0) {
+            printf("\nTop %d edges with %s, %d iterations:\n", top_n, directories[k],
+                   iterations[k]);
+            batch_print_top_edges(batch, results[k], top_n);
+        }
+        diff_result_destroy(results[k]);
+        if (checkpoint_paths != NULL) {
+            free(checkpoint_paths[k]);
+        }
+    }
+
+    batch_destroy(batch);
+    free(checkpoint_paths);
+    free(directories);
+    free(iterations);
+    free(results);
+    return 0;
+}
+
 int main(int argc, char* argv[])
 {
     if (argc < 3) {
-        printf("Usage: ./diff-tool DIR1 DIR2 [max_iterations] [top_n]\n");
+        printf("Usage: ./diff-tool DIR1 DIR2[,DIR3...] [max_iterations] [top_n] [threads] "
+               "[checkpoint|-] [full|active] [workers]\n");
         return 1;
     }
 
     int max_iterations = argc >= 4 ? atoi(argv[3]) : 1000;
+    int thread_count = argc >= 6 ? atoi(argv[5]) : 1;
+    char* checkpoint_path = argc >= 7 && strcmp(argv[6], "-") != 0 ? argv[6] : NULL;
+    bool active_set = argc >= 8 && strcmp(argv[7], "active") == 0;
+    int top_n = argc >= 5 ? atoi(argv[4]) : 10;
+
+    if (strchr(argv[2], ',') != NULL) {
+        // Several subgraphs, the supergraph is loaded only once
+        int worker_count = argc >= 9 ? atoi(argv[8]) : 1;
+        return run_batch(argv[1], argv[2], max_iterations, top_n, thread_count, checkpoint_path,
+                         active_set, worker_count);
+    }
+
     int iteration_count = 0;
     bool cancel_flag = false;
-    call_graph_t* sup =
-        diff_from_dirs(argv[1], argv[2], max_iterations, &iteration_count, &cancel_flag);
+    call_graph_t* sup = diff_from_dirs(argv[1], argv[2], max_iterations, thread_count, active_set,
+                                       checkpoint_path, &iteration_count, &cancel_flag);
 
-    int top_n = argc >= 5 ? atoi(argv[4]) : 10;
     if (top_n == 0) {
         call_graph_destroy(sup);
         return 0;
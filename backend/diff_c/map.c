@@ -39,7 +39,9 @@ void map_destroy(map_t* map)
 void map_add(map_t* map, int index, void* item)
 {
     if (index >= map->capacity) {
-        map->capacity *= 2;
+        while (index >= map->capacity) {
+            map->capacity *= 2;
+        }
         map->items = realloc(map->items, map->capacity * sizeof(void*));
     }
     map->items[index] = item;
@@ -1,82 +1,38 @@
 /**
  * File: backend/app/diff_c/method.c
  * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
- * Description: Implements functions for creating, destroying, and printing methods.
+ * Description: Implements functions for printing methods.
  */
 
 #include <stdio.h>
-#include <stdlib.h>
-#include <string.h>
 
 #include "method.h"
 
-char* get_qualified_name(char* declared_type, char* name, char* params, char* flags,
-                         char* return_type)
+void method_print(method_t* method, string_pool_t* strings)
 {
-    char* dst = malloc(strlen(declared_type) + strlen(name) + strlen(params) + strlen(flags) +
-                       strlen(return_type) + 6);
-    if (dst == NULL) {
-        return NULL;
-    }
-
-    strcpy(dst, declared_type);
-    strcat(dst, ".");
-    strcat(dst, name);
-    strcat(dst, "(");
-    strcat(dst, params);
-    strcat(dst, "):");
-    strcat(dst, flags);
-    strcat(dst, ":");
-    strcat(dst, return_type);
-
-    return dst;
+    printf("%s", string_pool_get(strings, method->qualified_name));
 }
 
-method_t* method_create(int id, char* name, char* declared_type, char* params, char* return_type,
-                        char* display, char* flags, bool is_entry_point)
+void method_print_short(method_t* method, string_pool_t* strings)
 {
-    method_t* method = malloc(sizeof(method_t));
-    if (method == NULL) {
-        return NULL;
-    }
-
-    method->id = id;
-    method->name = strdup(name);
-    method->declared_type = strdup(declared_type);
-    method->params = strdup(params);
-    method->return_type = strdup(return_type);
-    method->qualified_name = get_qualified_name(declared_type, name, params, flags, return_type);
-    method->display = strdup(display);
-    method->flags = strdup(flags);
-    method->is_entry_point = is_entry_point;
-    method->is_reachable = false;
-    method->value = 0;
-    method->equivalent = NULL;
-
-    return method;
+    printf("%s.%s(%s)", string_pool_get(strings, method->declared_type),
+           string_pool_get(strings, method->name), string_pool_get(strings, method->params));
 }
 
-void method_destroy(method_t* method)
+void method_print_cypher(method_t* method, string_pool_t* strings)
 {
-    free(method->name);
-    free(method->declared_type);
-    free(method->params);
-    free(method->return_type);
-    free(method->qualified_name);
-    free(method->display);
-    free(method->flags);
-    free(method);
-}
-
-void method_print(method_t* method) { printf("%s", method->qualified_name); }
-
-void method_print_short(method_t* method)
-{
-    printf("%s.%s(%s)", method->declared_type, method->name, method->params);
+    printf("MATCH (m:Method {Type: '%s', Name: '%s', Parameters: '%s', Return: '%s'}) RETURN m\n",
+           string_pool_get(strings, method->declared_type), string_pool_get(strings, method->name),
+           string_pool_get(strings, method->params), string_pool_get(strings, method->return_type));
 }
 
-void method_print_cypher(method_t* method)
+/// Whether the level of the method is always zero in the difference algorithm
+bool method_is_pinned(method_t* method)
 {
-    printf("MATCH (m:Method {Type: '%s', Name: '%s', Parameters: '%s', Return: '%s'}) RETURN m\n",
-           method->declared_type, method->name, method->params, method->return_type);
+    if (method->equivalent != NULL && method->equivalent->is_reachable) {
+        // The method is reachable in subgraph
+        return true;
+    }
+    // The method is absent from subgraph, but is an entry point
+    return method->equivalent == NULL && method->is_entry_point;
 }
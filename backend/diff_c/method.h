@@ -2,34 +2,36 @@
  * File: backend/app/diff_c/method.h
  * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
  * Description: Declares a structure representing call graph methods,
- *              and functions for creating, destroying, and printing them.
+ *              and functions for printing them.
  */
 
 #ifndef METHOD_H
 #define METHOD_H
 
 #include <stdbool.h>
+#include <stdint.h>
 
+#include "string_pool.h"
+
+/// Method whose strings are handles into the string pool of its call graph
 typedef struct method {
     int id;
-    char* name;
-    char* declared_type;
-    char* params;
-    char* return_type;
-    char* qualified_name;
-    char* display;
-    char* flags;
+    uint32_t name;
+    uint32_t declared_type;
+    uint32_t params;
+    uint32_t return_type;
+    uint32_t qualified_name;
+    uint32_t display;
+    uint32_t flags;
     bool is_entry_point;
     bool is_reachable;
     double value;
     struct method* equivalent;
 } method_t;
 
-method_t* method_create(int id, char* name, char* declared_type, char* params, char* return_type,
-                        char* display, char* flags, bool is_entry_point);
-void method_destroy(method_t* method);
-void method_print(method_t* method);
-void method_print_short(method_t* method);
-void method_print_cypher(method_t* method);
+void method_print(method_t* method, string_pool_t* strings);
+void method_print_short(method_t* method, string_pool_t* strings);
+void method_print_cypher(method_t* method, string_pool_t* strings);
+bool method_is_pinned(method_t* method);
 
 #endif
@@ -0,0 +1,119 @@
+/**
+ * File: backend/app/diff_c/parallel.c
+ * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+ * Description: Implements running iterations of the difference algorithm on multiple threads.
+ */
+
+#include <pthread.h>
+#include <stdio.h>
+#include <stdlib.h>
+
+#include "checkpoint.h"
+#include "compact.h"
+#include "diff.h"
+#include "parallel.h"
+
+typedef struct pool {
+    compact_graph_t* compact;
+    int thread_count;
+    pthread_barrier_t barrier;
+    bool done;
+    /// Maximum level seen by each thread in the current iteration
+    double* max;
+} pool_t;
+
+typedef struct worker {
+    pool_t* pool;
+    int index;
+} worker_t;
+
+/// Process all segments of one iteration as the given worker
+void run_iteration(worker_t* worker)
+{
+    pool_t* pool = worker->pool;
+    compact_graph_t* compact = pool->compact;
+    double max = 0;
+
+    for (int s = 0; s < compact->segment_count; s++) {
+        segment_t* segment = &compact->segments[s];
+
+        if (segment->parallel) {
+            int size = segment->end - segment->start;
+            int chunk = (size + pool->thread_count - 1) / pool->thread_count;
+            int start = segment->start + worker->index * chunk;
+            int end = start + chunk < segment->end ? start + chunk : segment->end;
+            compact_process(compact, start, end, &max);
+        } else if (worker->index == 0) {
+            compact_process(compact, segment->start, segment->end, &max);
+        }
+
+        pthread_barrier_wait(&pool->barrier);
+    }
+
+    pool->max[worker->index] = max;
+}
+
+void* worker_run(void* arg)
+{
+    worker_t* worker = arg;
+    pool_t* pool = worker->pool;
+
+    while (true) {
+        // Wait for the next iteration to start
+        pthread_barrier_wait(&pool->barrier);
+        if (pool->done) {
+            break;
+        }
+        run_iteration(worker);
+    }
+
+    return NULL;
+}
+
+/// Run iterations while the maximum level seen by the previous one is above epsilon
+void parallel_diff(compact_graph_t* compact, int thread_count, int max_iterations, int* i,
+                   double* max, bool* cancel_flag, checkpoint_t* checkpoint)
+{
+    pool_t pool = {.compact = compact, .thread_count = thread_count, .done = false};
+    pool.max = calloc(thread_count, sizeof(double));
+    pthread_barrier_init(&pool.barrier, NULL, thread_count);
+
+    pthread_t* threads = malloc(thread_count * sizeof(pthread_t));
+    worker_t* workers = malloc(thread_count * sizeof(worker_t));
+    for (int t = 0; t < thread_count; t++) {
+        workers[t] = (worker_t){.pool = &pool, .index = t};
+        if (t > 0) {
+            pthread_create(&threads[t], NULL, worker_run, &workers[t]);
+        }
+    }
+
+    while (*max > EPSILON && *i < max_iterations && !*cancel_flag) {
+        // The calling thread takes part as the first worker
+        pthread_barrier_wait(&pool.barrier);
+        run_iteration(&workers[0]);
+
+        *max = 0;
+        for (int t = 0; t < thread_count; t++) {
+            if (pool.max[t] > *max) {
+                *max = pool.max[t];
+            }
+        }
+
+        (*i)++;
+        if (*i % 100 == 0 || *i == max_iterations || *max <= EPSILON)
+            printf("Iteration %d, max %g\n", *i, *max);
+        // Other threads wait for the next iteration, levels and values do not change meanwhile
+        checkpoint_tick(checkpoint, compact, *i, *max);
+    }
+
+    pool.done = true;
+    pthread_barrier_wait(&pool.barrier);
+    for (int t = 1; t < thread_count; t++) {
+        pthread_join(threads[t], NULL);
+    }
+
+    pthread_barrier_destroy(&pool.barrier);
+    free(threads);
+    free(workers);
+    free(pool.max);
+}
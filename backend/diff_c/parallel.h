@@ -0,0 +1,19 @@
+/**
+ * File: backend/app/diff_c/parallel.h
+ * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+ * Description: Declares a function for running iterations of the difference algorithm
+ *              on multiple threads.
+ */
+
+#ifndef PARALLEL_H
+#define PARALLEL_H
+
+#include <stdbool.h>
+
+#include "checkpoint.h"
+#include "compact.h"
+
+void parallel_diff(compact_graph_t* compact, int thread_count, int max_iterations, int* i,
+                   double* max, bool* cancel_flag, checkpoint_t* checkpoint);
+
+#endif
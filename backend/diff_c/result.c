@@ -0,0 +1,44 @@
+/**
+ * File: backend/app/diff_c/result.c
+ * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+ * Description: Implements functions for creating and destroying results
+ *              of the difference algorithm.
+ */
+
+#include <stdlib.h>
+
+#include "edge.h"
+#include "result.h"
+
+diff_result_t* diff_result_create(call_graph_t* cg)
+{
+    diff_result_t* result = malloc(sizeof(diff_result_t));
+    if (result == NULL) {
+        return NULL;
+    }
+
+    result->edge_count = cg->edge_count;
+    result->source_ids = malloc(cg->edge_count * sizeof(int));
+    result->target_ids = malloc(cg->edge_count * sizeof(int));
+    result->values = malloc(cg->edge_count * sizeof(double));
+    result->relevant = malloc(cg->edge_count * sizeof(bool));
+
+    int k = 0;
+    for (edge_t* e = cg->edges; e != NULL; e = e->next, k++) {
+        result->source_ids[k] = e->source->id;
+        result->target_ids[k] = e->target->id;
+        result->values[k] = e->value;
+        result->relevant[k] = e->source->equivalent != NULL;
+    }
+
+    return result;
+}
+
+void diff_result_destroy(diff_result_t* result)
+{
+    free(result->source_ids);
+    free(result->target_ids);
+    free(result->values);
+    free(result->relevant);
+    free(result);
+}
@@ -0,0 +1,28 @@
+/**
+ * File: backend/app/diff_c/result.h
+ * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+ * Description: Declares a structure holding results of the difference algorithm
+ *              in contiguous arrays, and functions for creating and destroying it.
+ */
+
+#ifndef RESULT_H
+#define RESULT_H
+
+#include <stdbool.h>
+
+#include "call_graph.h"
+
+/// Edges of a supergraph after the difference algorithm, in the order of its edge list
+typedef struct diff_result {
+    int edge_count;
+    int* source_ids;
+    int* target_ids;
+    double* values;
+    /// Whether the source method of the edge has an equivalent in subgraph
+    bool* relevant;
+} diff_result_t;
+
+diff_result_t* diff_result_create(call_graph_t* cg);
+void diff_result_destroy(diff_result_t* result);
+
+#endif
@@ -0,0 +1,307 @@
+/**
+ * File: backend/app/diff_c/snapshot.c
+ * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+ * Description: Implements saving parsed call graphs to binary snapshots,
+ *              and loading them back by memory-mapping the snapshot file.
+ */
+
+#include <fcntl.h>
+#include <pthread.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+#include "csv.h"
+#include "edge.h"
+#include "hashtable.h"
+#include "method.h"
+#include "snapshot.h"
+
+char* report_filenames[SNAPSHOT_REPORT_COUNT] = {
+    "call_tree_methods.csv",
+    "call_tree_invokes.csv",
+    "call_tree_targets.csv",
+};
+
+static uint32_t crc_table[256];
+static pthread_once_t crc_table_once = PTHREAD_ONCE_INIT;
+
+/// Fill the CRC-32 lookup table, called once for all threads
+static void crc_table_init(void)
+{
+    for (uint32_t n = 0; n < 256; n++) {
+        uint32_t c = n;
+        for (int k = 0; k < 8; k++) {
+            c = c & 1 ? 0xEDB88320 ^ (c >> 1) : c >> 1;
+        }
+        crc_table[n] = c;
+    }
+}
+
+/// CRC-32 of a file, the same as computed by zlib
+uint32_t crc32_file(char* path, bool* ok)
+{
+    pthread_once(&crc_table_once, crc_table_init);
+
+    FILE* f = fopen(path, "rb");
+    if (f == NULL) {
+        *ok = false;
+        return 0;
+    }
+
+    unsigned char buffer[65536];
+    uint32_t crc = 0xFFFFFFFF;
+    size_t count;
+    while ((count = fread(buffer, 1, sizeof(buffer), f)) > 0) {
+        for (size_t k = 0; k < count; k++) {
+            crc = crc_table[(crc ^ buffer[k]) & 0xFF] ^ (crc >> 8);
+        }
+    }
+
+    fclose(f);
+    *ok = true;
+    return crc ^ 0xFFFFFFFF;
+}
+
+/// Size and modification time of a report file, false if it cannot be accessed
+bool report_stat(char* dirname, int k, snapshot_report_t* report)
+{
+    char* path = get_file_path(dirname, report_filenames[k]);
+    struct stat st;
+    bool ok = stat(path, &st) == 0;
+    free(path);
+    if (ok) {
+        report->size = st.st_size;
+        report->mtime_ns = (int64_t)st.st_mtim.tv_sec * 1000000000 + st.st_mtim.tv_nsec;
+    }
+    return ok;
+}
+
+uint32_t report_crc(char* dirname, int k, bool* ok)
+{
+    char* path = get_file_path(dirname, report_filenames[k]);
+    uint32_t crc = crc32_file(path, ok);
+    free(path);
+    return crc;
+}
+
+/// Whether reports in the directory are the ones the snapshot was created from
+bool reports_match(snapshot_header_t* header, char* dirname)
+{
+    for (int k = 0; k < SNAPSHOT_REPORT_COUNT; k++) {
+        snapshot_report_t current;
+        if (!report_stat(dirname, k, &current) || current.size != header->reports[k].size) {
+            return false;
+        }
+        if (current.mtime_ns == header->reports[k].mtime_ns) {
+            continue;
+        }
+
+        // Modified, but possibly with the same contents
+        bool ok;
+        uint32_t crc = report_crc(dirname, k, &ok);
+        if (!ok || crc != header->reports[k].crc) {
+            return false;
+        }
+    }
+    return true;
+}
+
+/// Number of NUL-terminated strings, or -1 if the last one is not terminated
+int64_t count_strings(char* data, size_t size)
+{
+    int64_t count = 0;
+    char* end = data + size;
+    for (char* p = data; p < end; p++) {
+        p = memchr(p, '\0', end - p);
+        if (p == NULL) {
+            return -1;
+        }
+        count++;
+    }
+    return count;
+}
+
+bool snapshot_load(call_graph_t* cg, char* dirname)
+{
+    char* path = get_file_path(dirname, SNAPSHOT_FILENAME);
+    int fd = open(path, O_RDONLY);
+    free(path);
+    if (fd == -1) {
+        return false;
+    }
+
+    struct stat st;
+    if (fstat(fd, &st) != 0 || (size_t)st.st_size < sizeof(snapshot_header_t)) {
+        close(fd);
+        return false;
+    }
+    char* data = mmap(NULL, st.st_size, PROT_READ, MAP_PRIVATE, fd, 0);
+    close(fd);
+    if (data == MAP_FAILED) {
+        return false;
+    }
+
+    snapshot_header_t* header = (snapshot_header_t*)data;
+    size_t methods_offset = sizeof(snapshot_header_t);
+    size_t edges_offset = methods_offset + header->record_count * sizeof(snapshot_method_t);
+    size_t strings_offset = edges_offset + header->edge_count * sizeof(snapshot_edge_t);
+
+    if (memcmp(header->magic, SNAPSHOT_MAGIC, sizeof(header->magic)) != 0 ||
+        header->version != SNAPSHOT_VERSION ||
+        strings_offset + header->strings_size != (size_t)st.st_size ||
+        count_strings(data + strings_offset, header->strings_size) != header->string_count ||
+        !reports_match(header, dirname)) {
+        printf("Snapshot in %s is stale\n", dirname);
+        munmap(data, st.st_size);
+        return false;
+    }
+
+    snapshot_method_t* records = (snapshot_method_t*)(data + methods_offset);
+    snapshot_edge_t* edges = (snapshot_edge_t*)(data + edges_offset);
+
+    // Strings are used directly from the mapped file
+    arena_add_mapping(cg->arena, data, st.st_size);
+    string_pool_load(cg->strings, data + strings_offset, header->strings_size,
+                     header->string_count);
+
+    method_t* methods = arena_alloc(cg->arena, header->record_count * sizeof(method_t));
+    cg->methods = ht_create_borrowing(NULL);
+    for (uint32_t k = 0; k < header->record_count; k++) {
+        snapshot_method_t* r = &records[k];
+        method_t* m = &methods[k];
+        m->id = r->id;
+        m->name = r->strings[0];
+        m->declared_type = r->strings[1];
+        m->params = r->strings[2];
+        m->return_type = r->strings[3];
+        m->qualified_name = r->strings[4];
+        m->display = r->strings[5];
+        m->flags = r->strings[6];
+        m->is_entry_point = r->is_entry_point;
+        m->is_reachable = r->is_reachable;
+        m->value = r->value;
+        m->equivalent = NULL;
+        if (r->in_table) {
+            ht_insert(cg->methods, string_pool_get(cg->strings, m->qualified_name), m);
+        }
+    }
+
+    edge_t* prev = NULL;
+    for (uint32_t k = 0; k < header->edge_count; k++) {
+        edge_t* edge = edge_create(&methods[edges[k].source], &methods[edges[k].target], k);
+        if (prev != NULL) {
+            prev->next = edge;
+        } else {
+            cg->edges = edge;
+        }
+        prev = edge;
+    }
+
+    cg->method_count = header->method_count;
+    cg->edge_count = header->edge_count;
+    cg->reachable_count = header->reachable_count;
+
+    // Only the strings are used from now on, release pages of records and edges
+    size_t page_size = sysconf(_SC_PAGESIZE);
+    madvise(data, strings_offset / page_size * page_size, MADV_DONTNEED);
+    return true;
+}
+
+void snapshot_save(call_graph_t* cg, char* dirname)
+{
+    snapshot_header_t header = {.version = SNAPSHOT_VERSION};
+    memcpy(header.magic, SNAPSHOT_MAGIC, sizeof(header.magic));
+    for (int k = 0; k < SNAPSHOT_REPORT_COUNT; k++) {
+        bool ok = report_stat(dirname, k, &header.reports[k]);
+        if (ok) {
+            header.reports[k].crc = report_crc(dirname, k, &ok);
+        }
+        if (!ok) {
+            return;
+        }
+    }
+
+    // Covers methods replaced in the hash table by a duplicate, referred to by edges
+    int method_slots = call_graph_id_bound(cg);
+    method_t** by_id = calloc(method_slots, sizeof(method_t*));
+    ht_iter it = ht_iterator(cg->methods);
+    while (ht_next(&it)) {
+        method_t* m = it.value;
+        by_id[m->id] = m;
+    }
+    for (edge_t* e = cg->edges; e != NULL; e = e->next) {
+        by_id[e->source->id] = e->source;
+        by_id[e->target->id] = e->target;
+    }
+
+    int* record_indices = malloc(method_slots * sizeof(int));
+    snapshot_method_t* records = calloc(method_slots, sizeof(snapshot_method_t));
+
+    for (int id = 0; id < method_slots; id++) {
+        method_t* m = by_id[id];
+        if (m == NULL) {
+            continue;
+        }
+        record_indices[id] = header.record_count;
+        snapshot_method_t* r = &records[header.record_count++];
+        uint32_t strings[] = {m->name,           m->declared_type, m->params, m->return_type,
+                              m->qualified_name, m->display,       m->flags};
+        r->id = m->id;
+        memcpy(r->strings, strings, sizeof(strings));
+        r->is_entry_point = m->is_entry_point;
+        r->is_reachable = m->is_reachable;
+        r->in_table = ht_get(cg->methods, string_pool_get(cg->strings, m->qualified_name)) == m;
+        r->value = m->value;
+    }
+
+    snapshot_edge_t* edges = malloc(cg->edge_count * sizeof(snapshot_edge_t));
+    for (edge_t* e = cg->edges; e != NULL; e = e->next) {
+        edges[header.edge_count++] = (snapshot_edge_t){
+            .source = record_indices[e->source->id],
+            .target = record_indices[e->target->id],
+        };
+    }
+
+    header.method_count = cg->method_count;
+    header.reachable_count = cg->reachable_count;
+    header.string_count = cg->strings->count;
+    for (uint32_t k = 0; k < cg->strings->count; k++) {
+        header.strings_size += strlen(string_pool_get(cg->strings, k)) + 1;
+    }
+
+    // Write to a temporary file first, so that readers never see a partial snapshot
+    char* path = get_file_path(dirname, SNAPSHOT_FILENAME);
+    char* tmp_path = malloc(strlen(path) + 32);
+    sprintf(tmp_path, "%s.%d.tmp", path, getpid());
+
+    FILE* f = fopen(tmp_path, "wb");
+    if (f != NULL) {
+        bool ok = fwrite(&header, sizeof(header), 1, f) == 1 &&
+                  fwrite(records, sizeof(snapshot_method_t), header.record_count, f) ==
+                      header.record_count &&
+                  fwrite(edges, sizeof(snapshot_edge_t), header.edge_count, f) == header.edge_count;
+        // Strings in the order of their handles
+        for (uint32_t k = 0; ok && k < cg->strings->count; k++) {
+            ok = fputs(string_pool_get(cg->strings, k), f) >= 0 && fputc('\0', f) == 0;
+        }
+        ok = fclose(f) == 0 && ok;
+        if (ok && rename(tmp_path, path) == 0) {
+            printf("Saved snapshot %s\n", path);
+        } else {
+            remove(tmp_path);
+        }
+    } else {
+        printf("Cannot save snapshot %s\n", path);
+    }
+
+    free(path);
+    free(tmp_path);
+    free(edges);
+    free(records);
+    free(record_indices);
+    free(by_id);
+}
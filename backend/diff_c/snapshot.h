@@ -0,0 +1,72 @@
+/**
+ * File: backend/app/diff_c/snapshot.h
+ * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+ * Description: Declares the binary snapshot format of parsed call graphs,
+ *              and functions for saving and memory-mapping snapshots.
+ */
+
+#ifndef SNAPSHOT_H
+#define SNAPSHOT_H
+
+#include <stdbool.h>
+#include <stdint.h>
+
+#include "call_graph.h"
+
+#define SNAPSHOT_FILENAME "call_graph.snapshot"
+#define SNAPSHOT_MAGIC "EDGESNAP"
+/// Increase when the layout of the file or the meaning of its fields changes
+#define SNAPSHOT_VERSION 2
+#define SNAPSHOT_REPORT_COUNT 3
+#define SNAPSHOT_STRING_COUNT 7
+
+/// Report file the snapshot was created from
+typedef struct snapshot_report {
+    uint64_t size;
+    int64_t mtime_ns;
+    /// CRC-32 of the file contents
+    uint32_t crc;
+    uint32_t reserved;
+} snapshot_report_t;
+
+/**
+ * Start of a snapshot file, followed by method records, edges, and a pool
+ * of distinct NUL-terminated strings. All integers are little-endian.
+ */
+typedef struct snapshot_header {
+    char magic[8];
+    uint32_t version;
+    /// Number of rows of the methods report
+    uint32_t method_count;
+    uint32_t record_count;
+    uint32_t edge_count;
+    uint32_t reachable_count;
+    uint32_t string_count;
+    uint64_t strings_size;
+    /// Methods, invokes and targets reports, in this order
+    snapshot_report_t reports[SNAPSHOT_REPORT_COUNT];
+} snapshot_header_t;
+
+/// Method ordered by ID, strings are indices of strings in the pool
+typedef struct snapshot_method {
+    int32_t id;
+    /// Name, declared type, parameters, return type, qualified name, display, and flags
+    uint32_t strings[SNAPSHOT_STRING_COUNT];
+    uint8_t is_entry_point;
+    uint8_t is_reachable;
+    /// Whether the method is in the hash table of methods, not replaced by a later duplicate
+    uint8_t in_table;
+    uint8_t reserved[5];
+    double value;
+} snapshot_method_t;
+
+/// Edge in the order of the edge list, methods are indices of method records
+typedef struct snapshot_edge {
+    uint32_t source;
+    uint32_t target;
+} snapshot_edge_t;
+
+bool snapshot_load(call_graph_t* cg, char* dirname);
+void snapshot_save(call_graph_t* cg, char* dirname);
+
+#endif
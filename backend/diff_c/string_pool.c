@@ -0,0 +1,130 @@
+/**
+ * File: backend/app/diff_c/string_pool.c
+ * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+ * Description: Implements a pool of interned strings, referred to by integer handles.
+ */
+
+#include <stdlib.h>
+#include <string.h>
+
+#include "arena.h"
+#include "hashtable.h"
+#include "string_pool.h"
+
+string_pool_t* string_pool_create(arena_t* arena)
+{
+    string_pool_t* pool = malloc(sizeof(string_pool_t));
+    if (pool == NULL) {
+        return NULL;
+    }
+
+    pool->count = 0;
+    pool->capacity = 1024;
+    pool->strings = malloc(pool->capacity * sizeof(char*));
+    pool->slot_capacity = 2048;
+    pool->slots = calloc(pool->slot_capacity, sizeof(uint32_t));
+    pool->free = NULL;
+    pool->free_size = 0;
+    pool->arena = arena;
+
+    return pool;
+}
+
+/// Destroy the pool, string data is released together with the arena
+void string_pool_destroy(string_pool_t* pool)
+{
+    free(pool->strings);
+    free(pool->slots);
+    free(pool);
+}
+
+/// Slot of the string in the hash table, or of the empty slot where it belongs
+uint32_t* string_pool_slot(uint32_t* slots, uint32_t slot_capacity, char** strings, const char* s)
+{
+    uint32_t index = hash(s) & (slot_capacity - 1);
+    while (slots[index] != 0 && strcmp(strings[slots[index] - 1], s) != 0) {
+        index = (index + 1) & (slot_capacity - 1);
+    }
+    return &slots[index];
+}
+
+/// Rebuild the hash table of handles with the given capacity
+void string_pool_index(string_pool_t* pool, uint32_t slot_capacity)
+{
+    uint32_t* slots = calloc(slot_capacity, sizeof(uint32_t));
+    for (uint32_t handle = 0; handle < pool->count; handle++) {
+        uint32_t* slot =
+            string_pool_slot(slots, slot_capacity, pool->strings, pool->strings[handle]);
+        if (*slot == 0) {
+            *slot = handle + 1;
+        }
+    }
+
+    free(pool->slots);
+    pool->slots = slots;
+    pool->slot_capacity = slot_capacity;
+}
+
+/// Copy the string into the pool unless it is already there, return its handle
+uint32_t string_pool_add(string_pool_t* pool, const char* s)
+{
+    if (pool->slots == NULL) {
+        uint32_t slot_capacity = pool->slot_capacity;
+        while (pool->count >= slot_capacity / 2) {
+            slot_capacity *= 2;
+        }
+        string_pool_index(pool, slot_capacity);
+    }
+
+    uint32_t* slot = string_pool_slot(pool->slots, pool->slot_capacity, pool->strings, s);
+    if (*slot != 0) {
+        return *slot - 1;
+    }
+
+    size_t length = strlen(s) + 1;
+    if (length > pool->free_size) {
+        // Rest of the previous block is wasted, strings longer than a block get their own
+        size_t block_size = length > STRING_POOL_BLOCK_SIZE ? length : STRING_POOL_BLOCK_SIZE;
+        pool->free = arena_alloc(pool->arena, block_size);
+        pool->free_size = block_size;
+    }
+    char* copy = pool->free;
+    memcpy(copy, s, length);
+    pool->free += length;
+    pool->free_size -= length;
+
+    if (pool->count == pool->capacity) {
+        pool->capacity *= 2;
+        pool->strings = realloc(pool->strings, pool->capacity * sizeof(char*));
+    }
+    pool->strings[pool->count] = copy;
+    *slot = ++pool->count;
+
+    if (pool->count >= pool->slot_capacity / 2) {
+        string_pool_index(pool, pool->slot_capacity * 2);
+    }
+    return pool->count - 1;
+}
+
+char* string_pool_get(string_pool_t* pool, uint32_t handle) { return pool->strings[handle]; }
+
+/**
+ * Add distinct strings stored consecutively in memory owned by the caller, each terminated by NUL.
+ * Strings get handles in the order they are stored, the hash table is built on the next addition.
+ */
+void string_pool_load(string_pool_t* pool, char* data, size_t size, uint32_t count)
+{
+    while (pool->count + count > pool->capacity) {
+        pool->capacity *= 2;
+    }
+    pool->strings = realloc(pool->strings, pool->capacity * sizeof(char*));
+
+    char* end = data + size;
+    for (uint32_t k = 0; k < count && data < end; k++) {
+        pool->strings[pool->count++] = data;
+        data += strlen(data) + 1;
+    }
+
+    free(pool->slots);
+    pool->slots = NULL;
+}
@@ -0,0 +1,40 @@
+/**
+ * File: backend/app/diff_c/string_pool.h
+ * Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+ * Description: Declares a pool of interned strings, referred to by integer handles,
+ *              and functions for manipulating it.
+ */
+
+#ifndef STRING_POOL_H
+#define STRING_POOL_H
+
+#include <stddef.h>
+#include <stdint.h>
+
+#include "arena.h"
+
+/// Size of the blocks of string data allocated from the arena
+#define STRING_POOL_BLOCK_SIZE (1 << 16)
+
+typedef struct string_pool {
+    /// Strings by handle, each stored once
+    char** strings;
+    uint32_t count;
+    uint32_t capacity;
+    /// Open-addressing hash table of handles increased by one, zero in empty slots
+    uint32_t* slots;
+    uint32_t slot_capacity;
+    /// Unused part of the current block of string data
+    char* free;
+    size_t free_size;
+    /// Owner of the string data
+    arena_t* arena;
+} string_pool_t;
+
+string_pool_t* string_pool_create(arena_t* arena);
+void string_pool_destroy(string_pool_t* pool);
+uint32_t string_pool_add(string_pool_t* pool, const char* s);
+char* string_pool_get(string_pool_t* pool, uint32_t handle);
+void string_pool_load(string_pool_t* pool, char* data, size_t size, uint32_t count);
+
+#endif
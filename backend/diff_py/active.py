@@ -0,0 +1,94 @@
+"""
+File: backend/app/diff_py/active.py
+Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+Description: Active set engine for the call graph difference algorithm, which processes
+             only edges whose methods changed.
+"""
+
+import heapq
+
+from edge import Edge
+from method import Method
+
+# Smallest change of a level, relative to epsilon, that makes edges of the method active again
+THRESHOLD = 1e-4
+
+
+def iterate(edges: list[Edge], max_iterations: int, alpha: float, epsilon: float):
+    """
+    Process edges in order like the loop engine, but skip edges whose methods did not change
+    since they were last processed and did nothing. Stops once no edge is active.
+
+    A changed method activates its edges after the changing edge in the current iteration,
+    and its edges up to the last changing edge in the next one.
+    """
+    threshold = epsilon * THRESHOLD
+    adjacent: dict[Method, list[int]] = {}
+    for k, edge in enumerate(edges):
+        for m in (edge.source, edge.target):
+            if not m.is_pinned:
+                adjacent.setdefault(m, []).append(k)
+
+    i = 0
+    max = 1.0
+    active = list(range(len(edges)))
+    processed_total = 0
+
+    while active and i < max_iterations:
+        max = 0.0
+        # Positions to process in this iteration, as a heap, which the sorted list already is
+        queued = set(active)
+        activated: set[Method] = set()
+        last_change: dict[Method, int] = {}
+
+        while active:
+            k = heapq.heappop(active)
+            edge = edges[k]
+            l2 = 0 if edge.target.is_pinned else edge.target.value
+            l1 = 0 if edge.source.is_pinned else edge.source.value
+            if l2 > max:
+                max = l2
+            if l1 > max:
+                max = l1
+
+            diff = alpha * (l2 - l1)
+            if diff > 0:
+                edge.value += diff
+                edge.target.value -= diff
+                edge.source.value += diff
+                if diff <= threshold:
+                    continue
+
+                for m in (edge.target, edge.source):
+                    if m.is_pinned:
+                        continue
+                    last_change[m] = k
+                    if m in activated:
+                        continue
+                    activated.add(m)
+                    for p in reversed(adjacent[m]):
+                        if p <= k:
+                            break
+                        if p not in queued:
+                            queued.add(p)
+                            heapq.heappush(active, p)
+
+        next_active = set()
+        for m, last in last_change.items():
+            for p in adjacent[m]:
+                if p > last:
+                    break
+                next_active.add(p)
+        active = sorted(next_active)
+        processed_total += len(queued)
+
+        i += 1
+        if i % 100 == 0 or not active:
+            print(
+                f"Iteration {i}, max {max}, {len(queued)} of {len(edges)} edges processed"
+            )
+
+    if i > 0:
+        share = processed_total / (len(edges) * i) if edges else 0
+        print(f"Processed {processed_total} edges, {share:.1%} of full iterations")
+    return i
@@ -7,9 +7,11 @@ Description: Defines a class for call graphs, which are created from the given C
 import os
 from csv import DictReader
 
+import snapshot
 from edge import Edge
 from invoke import Invoke
 from method import Method, MethodKey
+from string_pool import StringPool
 
 type MethodsById = dict[int, Method]
 type MethodsLookupTable = dict[MethodKey, Method]
@@ -19,10 +21,16 @@ type EdgeId = tuple[Method, Method]
 
 
 class CallGraph:
-    def __init__(self, dir_name: str, name: str):
+    def __init__(self, dir_name: str, name: str, pool: StringPool | None = None):
         self.directory = os.path.join(os.path.dirname(__file__), dir_name)
         self.name = name
+        # Strings of methods, shared with the graph this one is compared with
+        self.pool = pool if pool is not None else StringPool()
         self.edges: dict[EdgeId, Edge] = {}
+        self.invokes: InvokesById = {}
+        if self._load_snapshot():
+            return
+
         self.methods, self.methods_lut = self._load_methods()
         self.invokes = self._load_invokes()
         self._load_call_targets()
@@ -33,22 +41,69 @@ class CallGraph:
             self.reachable_count += 1
         self._compute_reachability()
 
+        snapshot.save(
+            self.directory,
+            len(self.methods),
+            self.reachable_count,
+            sorted(self.methods.values(), key=lambda m: m.id),
+            self.edges.keys(),
+        )
+
+    def _load_snapshot(self) -> bool:
+        """Restore the graph from a snapshot of its reports, False if there is none."""
+        loaded = snapshot.load(self.directory)
+        if loaded is None:
+            return False
+
+        self.methods = {}
+        self.methods_lut = {}
+        records: list[Method] = []
+        handles = [self.pool.add(s) for s in loaded.strings]
+        for r in loaded.methods:
+            key = MethodKey(
+                handles[r.name],
+                handles[r.class_],
+                handles[r.parameters],
+                handles[r.return_type],
+                handles[r.flags],
+                r.is_entry_point,
+            )
+            method = Method(self.pool, r.id, key, handles[r.display])
+            method.is_reachable = r.is_reachable
+            method.value = r.value
+            self.methods[r.id] = method
+            self.methods_lut[key] = method
+            records.append(method)
+
+        for k in range(0, len(loaded.edges), 2):
+            source = records[loaded.edges[k]]
+            target = records[loaded.edges[k + 1]]
+            edge = Edge(source, target)
+            self.edges[(source, target)] = edge
+            source.add_outgoing_edge(edge)
+            target.add_incoming_edge(edge)
+
+        self.reachable_count = loaded.reachable_count
+        print(f"Loaded snapshot of {self.directory}")
+        return True
+
     def _load_methods(self) -> tuple[MethodsById, MethodsLookupTable]:
         methods: MethodsById = {}
         lut: MethodsLookupTable = {}
+        add = self.pool.add
         with open(os.path.join(self.directory, "call_tree_methods.csv")) as f:
             reader = DictReader(f)
             for line in reader:
                 id = int(line["Id"])
                 key = MethodKey(
-                    line["Name"],
-                    line["Type"],
-                    line["Parameters"] if line["Parameters"] != "empty" else None,
-                    line["Return"],
-                    line["Flags"],
+                    add(line["Name"]),
+                    add(line["Type"]),
+                    add(line["Parameters"] if line["Parameters"] != "empty" else ""),
+                    add(line["Return"]),
+                    add(line["Flags"]),
                     line["IsEntryPoint"] == "true",
                 )
-                method = Method(id, *key, line["Display"])
+                method = Method(self.pool, id, key, add(line["Display"]))
                 methods[id] = method
                 lut[key] = method
         return methods, lut
@@ -61,12 +116,14 @@ class CallGraph:
                 id = int(line["Id"])
                 source_id = int(line["MethodId"])
                 target_id = int(line["TargetId"])
-                invokes[id] = Invoke(
+                invoke = Invoke(
                     id,
                     self.methods[source_id],
                     self.methods[target_id],
                     line["IsDirect"] == "true",
                 )
+                invokes[id] = invoke
+                invoke.source.add_invoke(invoke)
         return invokes
 
     def _load_call_targets(self):
@@ -87,19 +144,22 @@ class CallGraph:
                     target.add_incoming_edge(edge)
 
     def _compute_reachability(self):
-        prev_count = 0
-        while self.reachable_count > prev_count:
-            prev_count = self.reachable_count
-            for edge in self.edges.values():
-                if not edge.source.is_reachable or edge.target.is_reachable:
-                    continue
-                edge.target.is_reachable = True
-                edge.target.value = 1.0
-                self.reachable_count += 1
-        for invoke in self.invokes.values():
-            if invoke.source.is_reachable and not invoke.target.is_reachable:
-                invoke.target.is_reachable = True
-                self.reachable_count += 1
+        # Queue of reached methods, starting with all entry points
+        queue = [m for m in self.methods.values() if m.is_reachable]
+        for method in queue:
+            for edge in method.outgoing_edges:
+                if not edge.target.is_reachable:
+                    edge.target.is_reachable = True
+                    edge.target.value = 1.0
+                    self.reachable_count += 1
+                    queue.append(edge.target)
+
+        # Abstract methods, invoked from reached methods but without edges to them
+        for method in queue:
+            for invoke in method.invokes:
+                if not invoke.target.is_reachable:
+                    invoke.target.is_reachable = True
+                    self.reachable_count += 1
 
     def purge_common_edges(self):
         self.edges = {
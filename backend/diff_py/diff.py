@@ -7,17 +7,23 @@ Description: Entry point and logic of the call graph difference algorithm.
 import sys
 
 from call_graph import CallGraph
+from edge import Edge
 from method import Method
+from string_pool import StringPool
 
 ALPHA = 0.125
 EPSILON = 0.001
 
+ENGINES = ("loop", "numpy", "active")
+
 
 def link_equivalents(sup: CallGraph, sub: CallGraph):
+    if sup.pool is not sub.pool:
+        raise ValueError("Compared graphs must share a string pool")
     for m in sup.methods.values():
-        m.equivalent = sub.methods_lut.get(m.key())
+        m.equivalent = sub.methods_lut.get(m.key)
     for m in sub.methods.values():
-        m.equivalent = sup.methods_lut.get(m.key())
+        m.equivalent = sup.methods_lut.get(m.key)
 
 
 def level(m: Method) -> float:
@@ -28,23 +34,14 @@ def level(m: Method) -> float:
     return m.value
 
 
-def diff(sup: CallGraph, sub: CallGraph, max_iterations: int):
+def iterate(edges: list[Edge], max_iterations: int) -> int:
     i = 0
     max = 1
 
-    print(sup)
-    print(sub)
-    link_equivalents(sup, sub)
-    print("Purging common edges")
-    sup.purge_common_edges()
-    print(sup)
-    print(sub)
-
-    print("Starting difference algorithm")
     while max > EPSILON and i < max_iterations:
         max = 0
 
-        for edge in sup.edges.values():
+        for edge in edges:
             l2 = level(edge.target)
             l1 = level(edge.source)
             if l2 > max:
@@ -62,30 +59,66 @@ def diff(sup: CallGraph, sub: CallGraph, max_iterations: int):
         if i % 100 == 0 or max <= EPSILON:
             print(f"Iteration {i}, max {max}")
 
+    return i
+
+
+def diff(sup: CallGraph, sub: CallGraph, max_iterations: int, engine: str = "loop"):
+    print(sup)
+    print(sub)
+    link_equivalents(sup, sub)
+    print("Purging common edges")
+    sup.purge_common_edges()
+    print(sup)
+    print(sub)
+
+    print(f"Starting difference algorithm ({engine} engine)")
+    edges = list(sup.edges.values())
+    if engine == "numpy":
+        from vectorized import iterate as iterate_vectorized
+
+        i = iterate_vectorized(edges, max_iterations, ALPHA, EPSILON)
+    elif engine == "active":
+        from active import iterate as iterate_active
+
+        i = iterate_active(edges, max_iterations, ALPHA, EPSILON)
+    else:
+        i = iterate(edges, max_iterations)
+
     print(f"Done, {i} iterations.")
 
 
 def diff_from_dirs(
-    supergraph_directory: str, subgraph_directory: str, max_iterations: int
+    supergraph_directory: str,
+    subgraph_directory: str,
+    max_iterations: int,
+    engine: str = "loop",
 ):
-    sup = CallGraph(supergraph_directory, "Supergraph")
-    sub = CallGraph(subgraph_directory, "Subgraph")
-    diff(sup, sub, max_iterations)
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
+
+    pool = StringPool()
+    sup = CallGraph(supergraph_directory, "Supergraph", pool)
+    sub = CallGraph(subgraph_directory, "Subgraph", pool)
+    diff(sup, sub, max_iterations, engine)
     return sup
 
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
         print(
-            "Usage: python diff.py DIR1 DIR2 [max_iterations] [top_n]", file=sys.stderr
+            "Usage: python diff.py DIR1 DIR2 [max_iterations] [top_n] [loop|numpy|active]",
+            file=sys.stderr,
         )
         exit(1)
 
     sup = diff_from_dirs(
-        sys.argv[1], sys.argv[2], int(sys.argv[3]) if len(sys.argv) >= 4 else 1000
+        sys.argv[1],
+        sys.argv[2],
+        int(sys.argv[3]) if len(sys.argv) >= 4 else 1000,
+        sys.argv[5] if len(sys.argv) >= 6 else "loop",
     )
 
-    top_n = int(sys.argv[4]) if len(sys.argv) == 5 else 10
+    top_n = int(sys.argv[4]) if len(sys.argv) >= 5 else 10
     if top_n == 0:
         exit()
 
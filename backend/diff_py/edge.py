@@ -13,6 +13,8 @@ if TYPE_CHECKING:
 
 
 class Edge:
+    __slots__ = ("source", "target", "value")
+
     def __init__(self, source: Method, target: Method):
         self.source = source
         self.target = target
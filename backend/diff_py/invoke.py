@@ -8,6 +8,8 @@ from method import Method
 
 
 class Invoke:
+    __slots__ = ("id", "source", "target", "is_direct", "call_targets")
+
     def __init__(self, id: int, source: Method, target: Method, is_direct: bool):
         self.id = id
         self.source = source
@@ -10,59 +10,89 @@ from typing import TYPE_CHECKING, NamedTuple
 
 if TYPE_CHECKING:
     from edge import Edge
+    from invoke import Invoke
+    from string_pool import StringPool
 
 
 class MethodKey(NamedTuple):
-    name: str
-    class_: str
-    parameters: str | None
-    return_type: str
-    flags: str
+    """Handles of the strings identifying a method, comparable only within one string pool."""
+
+    name: int
+    class_: int
+    parameters: int
+    return_type: int
+    flags: int
     is_entry_point: bool
 
 
 class Method:
-    def __init__(
-        self,
-        id: int,
-        name: str,
-        class_: str,
-        parameters: str | None,
-        return_type: str,
-        flags: str,
-        is_entry_point: bool,
-        display: str,
-    ):
+    __slots__ = (
+        "pool",
+        "id",
+        "key",
+        "is_entry_point",
+        "_display",
+        "equivalent",
+        "outgoing_edges",
+        "incoming_edges",
+        "invokes",
+        "is_reachable",
+        "value",
+    )
+
+    def __init__(self, pool: StringPool, id: int, key: MethodKey, display: int):
+        self.pool = pool
         self.id = id
-        self.name = name
-        self.class_ = class_
-        self.parameters = parameters
-        self.return_type = return_type
-        self.flags = flags
-        self.is_entry_point = is_entry_point
-        self.display = display
+        self.key = key
+        self.is_entry_point = key.is_entry_point
+        self._display = display
 
         self.equivalent: Method | None = None
-        self.outgoing_edges: set[Edge] = set()
-        self.incoming_edges: set[Edge] = set()
+        self.outgoing_edges: list[Edge] = []
+        self.incoming_edges: list[Edge] = []
+        self.invokes: list[Invoke] = []
         self.is_reachable = False
         self.value = 0.0
 
-    def key(self) -> MethodKey:
-        return MethodKey(
-            self.name,
-            self.class_,
-            self.parameters,
-            self.return_type,
-            self.flags,
-            self.is_entry_point,
-        )
+    @property
+    def name(self) -> str:
+        return self.pool[self.key.name]
+
+    @property
+    def class_(self) -> str:
+        return self.pool[self.key.class_]
+
+    @property
+    def parameters(self) -> str | None:
+        return self.pool[self.key.parameters] or None
+
+    @property
+    def return_type(self) -> str:
+        return self.pool[self.key.return_type]
+
+    @property
+    def flags(self) -> str:
+        return self.pool[self.key.flags]
+
+    @property
+    def display(self) -> str:
+        return self.pool[self._display]
+
+    @property
+    def is_pinned(self) -> bool:
+        """Whether the level of the method is always zero, regardless of its value."""
+        if self.equivalent is not None and self.equivalent.is_reachable:
+            return True
+        return self.equivalent is None and self.is_entry_point
 
     def add_outgoing_edge(self, edge: Edge):
-        self.outgoing_edges.add(edge)
+        self.outgoing_edges.append(edge)
 
     def add_incoming_edge(self, edge: Edge):
-        self.incoming_edges.add(edge)
+        self.incoming_edges.append(edge)
+
+    def add_invoke(self, invoke: Invoke):
+        self.invokes.append(invoke)
 
     def __repr__(self) -> str:
         return f"{self.class_}.{self.name}({self.parameters if self.parameters is not None else ''})"
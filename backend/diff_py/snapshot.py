@@ -0,0 +1,238 @@
+"""
+File: backend/app/diff_py/snapshot.py
+Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+Description: Reads and writes binary snapshots of parsed call graphs, in the format used by libdiff.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, NamedTuple
+
+from string_pool import StringPool
+
+if TYPE_CHECKING:
+    from method import Method
+
+FILENAME = "call_graph.snapshot"
+MAGIC = b"EDGESNAP"
+# Must match SNAPSHOT_VERSION of libdiff
+VERSION = 2
+REPORTS = ["call_tree_methods.csv", "call_tree_invokes.csv", "call_tree_targets.csv"]
+
+# Layouts of snapshot_header_t, snapshot_report_t, snapshot_method_t and snapshot_edge_t
+HEADER = struct.Struct("<8s6IQ")
+REPORT = struct.Struct("<QqII")
+METHOD = struct.Struct("<i7I3B5xd")
+EDGE = struct.Struct("<2I")
+
+
+class MethodRecord(NamedTuple):
+    """Method whose strings are indices into the strings of the snapshot."""
+
+    id: int
+    name: int
+    class_: int
+    parameters: int
+    return_type: int
+    display: int
+    flags: int
+    is_entry_point: bool
+    is_reachable: bool
+    value: float
+
+
+class Snapshot(NamedTuple):
+    method_count: int
+    reachable_count: int
+    strings: list[str]
+    methods: list[MethodRecord]
+    # Pairs of method record indices, in the order of edges
+    edges: array
+
+
+def qualified_name(m: Method) -> str:
+    """Key of the method in libdiff."""
+    return f"{m.class_}.{m.name}({m.parameters or ''}):{m.flags}:{m.return_type}"
+
+
+def report_crc(path: str) -> int:
+    crc = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def reports_match(directory: str, reports: list[tuple]) -> bool:
+    """Whether reports in the directory are the ones the snapshot was created from."""
+    for filename, (size, mtime_ns, crc, _) in zip(REPORTS, reports):
+        path = os.path.join(directory, filename)
+        try:
+            st = os.stat(path)
+            if st.st_size != size:
+                return False
+            # Modified, but possibly with the same contents
+            if st.st_mtime_ns != mtime_ns and report_crc(path) != crc:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def load(directory: str) -> Snapshot | None:
+    """Read the snapshot of reports in the directory, None if missing or stale."""
+    try:
+        with open(os.path.join(directory, FILENAME), "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    with data:
+        if len(data) < HEADER.size + 3 * REPORT.size:
+            return None
+        (
+            magic,
+            version,
+            method_count,
+            record_count,
+            edge_count,
+            reachable_count,
+            string_count,
+            strings_size,
+        ) = HEADER.unpack_from(data)
+        reports = [
+            REPORT.unpack_from(data, HEADER.size + k * REPORT.size)
+            for k in range(len(REPORTS))
+        ]
+        methods_offset = HEADER.size + len(REPORTS) * REPORT.size
+        edges_offset = methods_offset + record_count * METHOD.size
+        strings_offset = edges_offset + edge_count * EDGE.size
+
+        if (
+            magic != MAGIC
+            or version != VERSION
+            or strings_offset + strings_size != len(data)
+            or not reports_match(directory, reports)
+        ):
+            print(f"Snapshot in {directory} is stale")
+            return None
+
+        # Strings are NUL-terminated, in the order of their indices
+        strings = data[strings_offset:].split(b"\0")
+        if strings.pop() != b"" or len(strings) != string_count:
+            print(f"Snapshot in {directory} is corrupted")
+            return None
+
+        methods = [
+            MethodRecord(
+                id,
+                name,
+                class_,
+                parameters,
+                return_type,
+                display,
+                flags,
+                bool(is_entry_point),
+                bool(is_reachable),
+                value,
+            )
+            for (
+                id,
+                name,
+                class_,
+                parameters,
+                return_type,
+                _,
+                display,
+                flags,
+                is_entry_point,
+                is_reachable,
+                _,
+                value,
+            ) in METHOD.iter_unpack(data[methods_offset:edges_offset])
+        ]
+        edges = array("I", data[edges_offset:strings_offset])
+
+    return Snapshot(
+        method_count, reachable_count, [s.decode() for s in strings], methods, edges
+    )
+
+
+def save(
+    directory: str,
+    method_count: int,
+    reachable_count: int,
+    methods: list[Method],
+    edges: Iterable[tuple[Method, Method]],
+):
+    """Write a snapshot of methods ordered by ID and edges between them."""
+    reports = []
+    try:
+        for filename in REPORTS:
+            path = os.path.join(directory, filename)
+            st = os.stat(path)
+            reports.append(REPORT.pack(st.st_size, st.st_mtime_ns, report_crc(path), 0))
+    except OSError:
+        return
+
+    pool = StringPool()
+    add = pool.add
+
+    # Later duplicates replace earlier methods in the hash table of libdiff
+    in_table = {qualified_name(m): m for m in methods}
+    indices = {m: k for k, m in enumerate(methods)}
+    records = bytearray()
+    for m in methods:
+        name = qualified_name(m)
+        records += METHOD.pack(
+            m.id,
+            add(m.name),
+            add(m.class_),
+            add(m.parameters or ""),
+            add(m.return_type),
+            add(name),
+            add(m.display),
+            add(m.flags),
+            m.is_entry_point,
+            m.is_reachable,
+            in_table[name] is m,
+            m.value,
+        )
+    edge_indices = array("I")
+    for source, target in edges:
+        edge_indices.extend((indices[source], indices[target]))
+
+    strings = b"".join(s.encode() + b"\0" for s in pool.strings)
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        method_count,
+        len(methods),
+        len(edge_indices) // 2,
+        reachable_count,
+        len(pool),
+        len(strings),
+    )
+
+    # Write to a temporary file first, so that readers never see a partial snapshot
+    path = os.path.join(directory, FILENAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            f.writelines(reports)
+            f.write(records)
+            f.write(edge_indices.tobytes())
+            f.write(strings)
+        os.replace(tmp_path, path)
+        print(f"Saved snapshot {path}")
+    except OSError:
+        print(f"Cannot save snapshot {path}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
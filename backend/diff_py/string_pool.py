@@ -0,0 +1,34 @@
+"""
+File: backend/app/diff_py/string_pool.py
+Author: Milan Vodák <xvodak07@stud.fit.vut.cz>
+Description: Defines a pool of interned strings, referred to by integer handles.
+"""
+
+
+class StringPool:
+    """
+    Strings stored once each, referred to by their index in the pool.
+
+    Graphs compared with each other must share a pool, so that equal strings
+    have equal handles in both of them.
+    """
+
+    __slots__ = ("strings", "handles")
+
+    def __init__(self):
+        self.strings: list[str] = []
+        self.handles: dict[str, int] = {}
+
+    def add(self, s: str) -> int:
+        """Handle of the string, which is added to the pool unless it is already there."""
+        handle = self.handles.get(s)
+        if handle is None:
+            handle = self.handles[s] = len(self.strings)
+            self.strings.append(s)
+        return handle
+
+    def __getitem__(self, handle: int) -> str:
+        return self.strings[handle]
+
+    def __len__(self) -> int:
+        return len(self.strings)
@@ -9,8 +9,11 @@ import { PUBLIC_API_URL } from "$env/static/public";
 import View from "./view.svelte";
 import type { EdgeDefinition, NodeDefinition } from "cytoscape";
 import type { BackendResponseData, GraphInfo } from "./types";
+import { expandCompact } from "./utils";
 
 const MAX_VIEWS = 10;
+/** Callers or callees fetched at once, as listed by the backend with each method. */
+export const NEIGHBOR_PAGE_SIZE = 100;
 
 export default class Graph {
   readonly name: string;
@@ -21,8 +24,11 @@ export default class Graph {
 
   diffStatus: undefined | "calculating" | "saving" | "cancelling" = $state();
   currentIterations: number = $state(0);
+  savedEdges: number = $state(0);
+  edgesToSave: number = $state(0);
   diffOk: boolean = $state(false);
   diffMessage: string | undefined = $state();
+  diffJob: string | undefined = $state();
 
   views: View[] = $state([]);
   viewIndex: number = $state(0);
@@ -34,6 +40,8 @@ export default class Graph {
   graphDetailsTab: "properties" | "edges" = $state("properties");
   selectedOtherGraph: string = $state("");
   selectedMaxIterations: number = $state(10000);
+  /** Start the difference from zero instead of a checkpoint of an earlier one. */
+  selectedFreshDiff: boolean = $state(false);
 
   /** Mapping of node ID to definition of corresponding node and its parents. */
   nodeDefinitions: Map<string, NodeDefinition[]> = new Map();
@@ -65,6 +73,16 @@ export default class Graph {
     return view;
   };
 
+  /** Show a method with its entry point path, in a new view unless told otherwise. */
+  openMethod = (id: string, name: string, newView: boolean = true) => {
+    if (newView || this.views.length === 0) {
+      // Create new view
+      this.createView(name);
+      this.viewIndex = 0;
+    }
+    this.currentView.showMethod(id, true).then(() => this.currentView.resetLayout());
+  };
+
   closeView = (index: number) => {
     this.currentView?.detach();
     this.views[index].destroy();
@@ -125,15 +143,15 @@ export default class Graph {
   };
 
   fetchMethod = async (id: string, withEntryPoint: boolean = false) => {
-    let url = `${PUBLIC_API_URL}/graphs/${this.name}/method/${id}`;
-    if (withEntryPoint) url += "?with_entry_point=1";
+    let url = `${PUBLIC_API_URL}/graphs/${this.name}/method/${id}?format=compact`;
+    if (withEntryPoint) url += "&with_entry_point=1";
     const resp = await fetch(url);
-    const data: BackendResponseData = await resp.json();
+    const data = expandCompact(await resp.json());
     this.setDefinitions(data);
     return data;
   };
 
-  getOrFetchAllMethodNeighbors = async (methodId: string, type: "callers" | "callees") => {
+  getOrFetchMethodNeighbors = async (methodId: string, type: "callers" | "callees") => {
     if (this.nodeDefinitions.has(methodId)) {
       // Node definition is present, use it
       const nodeWithParents = this.nodeDefinitions.get(methodId) as NodeDefinition[];
@@ -168,12 +186,20 @@ export default class Graph {
     }
 
     // Neighbor definition or edge definition is missing, fetch it
-    return await this.fetchAllMethodNeighbors(methodId, type);
+    return await this.fetchMethodNeighbors(methodId, type);
   };
 
-  fetchAllMethodNeighbors = async (methodId: string, type: "callers" | "callees") => {
-    const resp = await fetch(`${PUBLIC_API_URL}/graphs/${this.name}/method/${methodId}/${type}`);
-    const data: BackendResponseData = await resp.json();
+  /** Fetch a page of neighbors ordered by difference value of the edges. */
+  fetchMethodNeighbors = async (
+    methodId: string,
+    type: "callers" | "callees",
+    offset: number = 0,
+  ) => {
+    const resp = await fetch(
+      `${PUBLIC_API_URL}/graphs/${this.name}/method/${methodId}/${type}?format=compact` +
+        `&offset=${offset}&limit=${NEIGHBOR_PAGE_SIZE}`,
+    );
+    const data = expandCompact(await resp.json());
     this.setDefinitions(data);
     return data;
   };
@@ -205,10 +231,10 @@ export default class Graph {
   };
 
   fetchEdge = async (edgeId: string, withNodes: boolean = false) => {
-    let url = `${PUBLIC_API_URL}/graphs/${this.name}/edge/${edgeId}`;
-    if (withNodes) url += "?with_nodes=1";
+    let url = `${PUBLIC_API_URL}/graphs/${this.name}/edge/${edgeId}?format=compact`;
+    if (withNodes) url += "&with_nodes=1";
     const resp = await fetch(url);
-    const data: BackendResponseData = await resp.json();
+    const data = expandCompact(await resp.json());
     this.setDefinitions(data);
     return data;
   };
@@ -229,7 +255,9 @@ export default class Graph {
     const ws = new WebSocket(`${PUBLIC_API_URL}/graphs/${this.name}/diff`);
 
     ws.onopen = () => {
-      ws.send(`${this.name},${this.selectedOtherGraph},${this.selectedMaxIterations}`);
+      let message = `${this.name},${this.selectedOtherGraph},${this.selectedMaxIterations}`;
+      if (this.selectedFreshDiff) message += ",fresh";
+      ws.send(message);
       this.diffStatus = "calculating";
     };
 
@@ -242,13 +270,23 @@ export default class Graph {
       const data = JSON.parse(e.data);
       if (typeof data === "number") {
         this.currentIterations = data;
+      } else if ("job" in data) {
+        this.diffJob = data.job;
+      } else if ("saved" in data) {
+        this.savedEdges = data.saved;
+        this.edgesToSave = data.total;
       } else {
         this.diffStatus = undefined;
+        this.diffJob = undefined;
         this.currentIterations = 0;
-        this.diffOk = true;
+        this.savedEdges = 0;
+        this.edgesToSave = 0;
+        this.diffOk = !data.error;
         this.diffMessage = data.message;
-        this.iterations = data.iterations;
-        this.otherGraph = this.selectedOtherGraph;
+        if (!data.error) {
+          this.iterations = data.iterations;
+          this.otherGraph = this.selectedOtherGraph;
+        }
       }
     };
 
@@ -277,8 +315,10 @@ export default class Graph {
       n = this.topEdges.length + 10;
     }
 
-    const resp = await fetch(`${PUBLIC_API_URL}/graphs/${this.name}/topedges?n=${n}`);
-    const data: BackendResponseData = await resp.json();
+    const resp = await fetch(
+      `${PUBLIC_API_URL}/graphs/${this.name}/topedges?n=${n}&format=compact`,
+    );
+    const data = expandCompact(await resp.json());
     this.setDefinitions(data);
     for (const [i, edge] of (data.topEdges ?? []).entries()) {
       this.edgeDefinitions.set(edge.data.id as string, edge);
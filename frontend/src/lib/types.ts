@@ -12,6 +12,17 @@ export type BackendResponseData = {
   topEdges?: EdgeDefinition[];
 };
 
+/** Compound nodes as `[id, label, parent index]`, edges as `[source, target, value, relevant]`. */
+export type CompactResponseData = {
+  compounds: [string, string, number | null][];
+  methods: Record<string, any>[];
+  nodes: number[];
+  edges: CompactEdge[];
+  topEdges?: CompactEdge[];
+};
+
+export type CompactEdge = [string, string, number | null, boolean | null];
+
 export type EdgeWithNodesDefinition = {
   source: NodeDefinition;
   target: NodeDefinition;
@@ -26,6 +37,13 @@ export type GraphInfo = {
   iterations: number | null;
 };
 
-export type Tree = {
-  [key: string]: string | Tree;
+export type TreeChildren = {
+  types: { name: string; count: number }[];
+  methods: { name: string; id: string }[];
+  total: number;
+};
+
+export type SearchResult = {
+  methods: { id: string; name: string; parentClass: string; display: string; score: number }[];
+  more: boolean;
 };
@@ -4,7 +4,8 @@
  * Description: Utility functions for manipulating element definitions.
  */
 
-import type { ElementDefinition } from "cytoscape";
+import type { EdgeDefinition, ElementDefinition, NodeDefinition } from "cytoscape";
+import type { BackendResponseData, CompactEdge, CompactResponseData } from "./types";
 
 export const deduplicate = (elements: ElementDefinition[]) => {
   const seen = new Set<string>();
@@ -20,3 +21,46 @@ export const deduplicate = (elements: ElementDefinition[]) => {
 export const clone = (elements: ElementDefinition[]): ElementDefinition[] => {
   return elements.map((ele) => ({ group: ele.group, data: { ...ele.data } }));
 };
+
+/** Convert a response in the compact format back to definitions with compound nodes. */
+export const expandCompact = (data: CompactResponseData): BackendResponseData => {
+  const parentsOf = (index: number | null) => {
+    const parents: NodeDefinition[] = [];
+    while (index !== null) {
+      const [id, label, parent] = data.compounds[index];
+      const parentNode: NodeDefinition = {
+        group: "nodes",
+        data: { id, label, level: parents.length + 1 },
+      };
+      if (parent !== null) parentNode.data.parent = data.compounds[parent][0];
+      parents.push(parentNode);
+      index = parent;
+    }
+    return parents;
+  };
+
+  const methodWithParents = (index: number, withNeighbors: boolean): NodeDefinition[] => {
+    const { parent, callers, callees, ...method } = data.methods[index];
+    const node: NodeDefinition = {
+      group: "nodes",
+      data: { ...method, parent: parent !== null ? data.compounds[parent][0] : null },
+    };
+    if (withNeighbors) {
+      if (callers) node.data.callers = callers.map((k: number) => methodWithParents(k, false));
+      if (callees) node.data.callees = callees.map((k: number) => methodWithParents(k, false));
+    }
+    return [node, ...parentsOf(parent)];
+  };
+
+  const expandEdges = (edges: CompactEdge[]): EdgeDefinition[] =>
+    edges.map(([source, target, value, relevant]) => ({
+      group: "edges",
+      data: { id: `${source}->${target}`, source, target, value, relevant },
+    }));
+
+  return {
+    nodes: data.nodes.map((k) => methodWithParents(k, true)),
+    edges: expandEdges(data.edges),
+    topEdges: data.topEdges && expandEdges(data.topEdges),
+  };
+};
@@ -289,7 +289,7 @@ export default class View {
       const neighborNode = neighborId && this.nodes.get(neighborId);
       if (!neighborNode) {
         // A neighbor node is missing, get or fetch all neighbors
-        const data = await this.graph.getOrFetchAllMethodNeighbors(node.id(), type);
+        const data = await this.graph.getOrFetchMethodNeighbors(node.id(), type);
         this.add(deduplicate([...data.nodes.flat(), ...data.edges]));
         this.resetLayout();
         return;